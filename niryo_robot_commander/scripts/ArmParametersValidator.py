@@ -6,6 +6,7 @@ from urdf_parser_py.urdf import URDF
 from math import sqrt
 
 from niryo_robot_commander.command_enums import ArmCommanderException
+from niryo_robot_commander.limits_validation import LimitsValidator
 
 # Command Status
 from niryo_robot_msgs.msg import CommandStatus
@@ -18,14 +19,30 @@ from niryo_robot_msgs.msg import RPY
 class ArmParametersValidator:
     """
     Object which allows to validate arm movement
+    Limits are stored as arrays, so whole trajectories are validated in one vectorized pass
     """
 
     def __init__(self, validation_consts):
         self.validation_consts = validation_consts
+        self.robot_urdf = None
         self.joints_limits = self.joints_limits_from_urdf()
 
+        joints_names = ["joint_{}".format(i + 1) for i in range(len(self.joints_limits))]
+        self.__joints_validator = LimitsValidator(joints_names,
+                                                  [limit.lower if limit else None for limit in self.joints_limits],
+                                                  [limit.upper if limit else None for limit in self.joints_limits],
+                                                  "{} not in range ({}, {})", CommandStatus.INVALID_PARAMETERS)
+        self.__position_validator = self.__validator_from_consts('position_limits', ['x', 'y', 'z'])
+        self.__rpy_validator = self.__validator_from_consts('rpy_limits', ['roll', 'pitch', 'yaw'])
+
+    def __validator_from_consts(self, limits_name, names):
+        limits = self.validation_consts[limits_name]
+        return LimitsValidator(names, [limits[name]['min'] for name in names], [limits[name]['max'] for name in names],
+                               "{} not in range ( {} , {} )", CommandStatus.INVALID_PARAMETERS)
+
     def joints_limits_from_urdf(self):
         robot_urdf = URDF.from_parameter_server()
+        self.robot_urdf = robot_urdf
         joint_name_list = ["joint_1", "joint_2", "joint_3", "joint_4", "joint_5", "joint_6"]
 
         self.joints_limits = []
@@ -40,66 +57,63 @@ class ArmParametersValidator:
     def get_joints_limits(self):
         return self.joints_limits
 
+    def get_robot_urdf(self):
+        return self.robot_urdf
+
+    # - Whole trajectories
+
+    def get_first_invalid_joints_index(self, joints_trajectory):
+        """
+        :param joints_trajectory: Nx(number of joints) positions
+        :return: index of the first point out of the joints limits, None if all are valid
+        :rtype: int
+        """
+        violation = self.__joints_validator.get_first_violation(joints_trajectory)
+        return None if violation is None else violation[0]
+
+    def validate_joints_trajectory(self, joints_trajectory):
+        """
+        Validate all the points of a trajectory at once
+        :param joints_trajectory: Nx(number of joints) positions
+        :raise ArmCommanderException: with the index of the first invalid point
+        :return: None
+        """
+        self.__joints_validator.validate(joints_trajectory, "joint")
+
+    def validate_positions(self, positions):
+        """
+        Validate N positions at once against the workspace bounds
+        :param positions: Nx3 positions
+        :raise ArmCommanderException: with the index of the first invalid position
+        :return: None
+        """
+        self.__position_validator.validate(positions, "position")
+
     def validate_trajectory(self, plan):
         rospy.loginfo("Checking trajectory validity")
-        for joint in plan.trajectory.joint_trajectory.points:
-            self.validate_joints(joint.positions)
+        self.validate_joints_trajectory([point.positions for point in plan.trajectory.joint_trajectory.points])
+
+    # - Single points
 
     def validate_joints(self, joint_array):
         if len(joint_array) != len(self.joints_limits):
             raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
                                         "Joint array must have {} joints".format(len(self.joints_limits)))
-
-        for joint_index, joint_cmd in enumerate(joint_array):
-            if self.joints_limits[joint_index] and not self.joints_limits[joint_index].lower <= joint_cmd <= \
-                                                       self.joints_limits[joint_index].upper:
-                raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                            "joint_{} not in range ({}, {})".format(joint_index + 1, self.joints_limits[
-                                                joint_index].lower, self.joints_limits[joint_index].upper))
+        self.__joints_validator.validate([joint_array])
 
     def validate_position(self, position):
         if isinstance(position, Point):
-            x = position.x
-            y = position.y
-            z = position.z
+            values = [position.x, position.y, position.z]
         else:
-            x, y, z = position
-
-        v = self.validation_consts['position_limits']
-
-        if x < v['x']['min'] or x > v['x']['max']:
-            raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                        "x not in range ( {} , {} )".format(v['x']['min'], v['x']['max']))
-        if y < v['y']['min'] or y > v['y']['max']:
-            raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                        "y not in range ( {} , {} )".format(v['y']['min'], v['y']['max']))
-        if z < v['z']['min'] or z > v['z']['max']:
-            raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                        "z not in range ( {} , {} )".format(v['z']['min'], v['z']['max']))
+            values = position
+        self.__position_validator.validate([values])
 
     def validate_orientation(self, orientation):
         if isinstance(orientation, RPY):
-            roll = orientation.roll
-            pitch = orientation.pitch
-            yaw = orientation.yaw
+            values = [orientation.roll, orientation.pitch, orientation.yaw]
         else:
-            roll = orientation[0]
-            pitch = orientation[1]
-            yaw = orientation[2]
-
-        v = self.validation_consts['rpy_limits']
-
-        if roll < v['roll']['min'] or roll > v['roll']['max']:
-            raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                        "roll not in range ( {} , {} )".format(v['roll']['min'], v['roll']['max']))
-
-        if pitch < v['pitch']['min'] or pitch > v['pitch']['max']:
-            raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                        "pitch not in range ( {} , {} )".format(v['pitch']['min'], v['pitch']['max']))
-
-        if yaw < v['yaw']['min'] or yaw > v['yaw']['max']:
-            raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
-                                        "yaw not in range ( {} , {} )".format(v['yaw']['min'], v['yaw']['max']))
+            values = orientation[:3]
+        self.__rpy_validator.validate([values])
 
     @staticmethod
     def validate_orientation_quaternion(quat):
@@ -6,6 +6,8 @@ import moveit_commander
 from tf.transformations import quaternion_from_euler, euler_from_quaternion
 
 import copy
+import hashlib
+import os
 import threading
 
 import math
@@ -14,6 +16,7 @@ import random
 
 # Command Status
 from niryo_robot_msgs.msg import CommandStatus
+from niryo_robot_msgs.service_proxy_pool import call_service
 
 # Messages
 from actionlib_msgs.msg import GoalStatus
@@ -23,23 +26,39 @@ from control_msgs.msg import FollowJointTrajectoryActionResult
 from control_msgs.msg import FollowJointTrajectoryActionFeedback
 from moveit_msgs.msg import PositionIKRequest
 from moveit_msgs.msg import MoveItErrorCodes
+from moveit_msgs.msg import PlanningScene, PlanningSceneComponents, Constraints
+from moveit_msgs.msg import RobotTrajectory
 from moveit_msgs.msg import RobotState as RobotStateMoveIt
 from sensor_msgs.msg import JointState
 from std_msgs.msg import Empty, Header, Int32
-from trajectory_msgs.msg import JointTrajectory
+from trajectory_msgs.msg import JointTrajectory, JointTrajectoryPoint
 from visualization_msgs.msg import Marker, MarkerArray
 
 from niryo_robot_msgs.msg import RobotState, RPY
+from niryo_robot_commander.msg import PlanCacheStatus, TrackingStatistics
 
 # Services
-from moveit_msgs.srv import GetPositionFK, GetPositionIK
-from niryo_robot_msgs.srv import Trigger
+from moveit_msgs.srv import GetPositionFK, GetPositionIK, GetPlanningScene, GetStateValidity
+from niryo_robot_msgs.srv import GetNameDescriptionList, Trigger
+from niryo_robot_poses_handlers.srv import GetPose
 from niryo_robot_commander.srv import GetFK, GetIK
-from niryo_robot_msgs.srv import SetInt
+from niryo_robot_msgs.srv import SetInt, SetString
 
 # Enums
 from niryo_robot_commander.command_enums import MoveCommandType, ArmCommanderException
 
+# Kinematics
+from niryo_robot_commander.kinematics import NedKinematics, KinematicsException
+from niryo_robot_commander.kinematics import homogeneous_matrix, matrix_from_quaternion, quaternion_from_matrix
+from niryo_robot_commander.kinematics import matrix_from_rpy
+from niryo_robot_commander.plan_cache import PlanCache
+from niryo_robot_commander.pose_roadmap import PoseRoadmap
+from niryo_robot_commander.execution_monitor import ExecutionMonitor
+from niryo_robot_commander.command_telemetry import CommandTelemetry
+from niryo_robot_commander.blended_trajectory import BlendedJointPath, find_first_invalid_position
+from niryo_robot_commander.time_parameterization import TimeParameterizationException, time_optimal_parameterization
+from niryo_robot_commander.streamed_trajectory import join_chunks, get_divergence_time
+
 
 class ArmCommander:
     """
@@ -67,6 +86,13 @@ class ArmCommander:
 
         self.__joints = None
         self.__joints_name = ['joint_1', 'joint_2', 'joint_3', 'joint_4', 'joint_5', 'joint_6']
+
+        # Timestamps of each command stages, trajectories sent and joint states measured
+        self.__telemetry = CommandTelemetry(self.__joints_name, rospy.get_param("~telemetry/buffer_size"),
+                                            rospy.get_param("~telemetry/history_size"),
+                                            rospy.get_param("~telemetry/enabled"))
+        self.__telemetry_directory = rospy.get_param("~telemetry/dump_directory")
+        self.__waiting_first_feedback = False
         rospy.Subscriber('/joint_states', JointState, self.__callback_sub_joint_states)
 
         # - Direct topic to joint_trajectory_controller
@@ -95,6 +121,12 @@ class ArmCommander:
         self.__arm.set_goal_position_tolerance(rospy.get_param("~goal_position_tolerance"))
         self.__arm.set_goal_orientation_tolerance(rospy.get_param("~goal_orientation_tolerance"))
 
+        # OMPL runs the planning attempts of a request in parallel threads and keeps the shortest path found
+        # The next planners of the list are only tried when the previous ones failed before the deadline
+        self.__arm.set_num_planning_attempts(rospy.get_param("~planning/parallel_attempts"))
+        self.__arm.set_planning_time(rospy.get_param("~planning/time"))
+        self.__planners = rospy.get_param("~planning/planners")
+
         rospy.loginfo("Arm commander - MoveIt! successfully connected to move_group '{}'".format(self.__arm.get_name()))
         rospy.logdebug("Arm commander - MoveIt! will move '{}' in the"
                        " planning_frame '{}'".format(self.__end_effector_link, self.__arm.get_planning_frame()))
@@ -102,13 +134,84 @@ class ArmCommander:
         # Validation
         self.__parameters_validator = parameters_validator
 
-        # Event which allows to timeout if trajectory take too long
+        # In-process kinematics, MoveIt! services are only used as fallback
+        self.__kinematics = None
+        if rospy.get_param("~use_native_kinematics"):
+            try:
+                self.__kinematics = NedKinematics.from_urdf(parameters_validator.get_robot_urdf(),
+                                                            self.__reference_frame, self.__end_effector_link)
+                rospy.loginfo("Arm commander - Native kinematics loaded from URDF")
+            except (KinematicsException, AttributeError) as e:
+                rospy.logwarn("Arm commander - Cannot load native kinematics, MoveIt! will be used : " + str(e))
+
+        # Event set when the trajectory is finished, or when the execution monitor detects a failure
         self.__traj_finished_event = threading.Event()
+        self.__execution_monitor = ExecutionMonitor(rospy.get_param("~execution_monitor/start_timeout"),
+                                                    rospy.get_param("~execution_monitor/feedback_timeout"),
+                                                    rospy.get_param("~execution_monitor/max_tracking_error"),
+                                                    rospy.get_param("~execution_monitor/max_consecutive_errors"))
+        self.__execution_monitor_period = rospy.get_param("~execution_monitor/check_period")
+        self.__tracking_statistics_pub = rospy.Publisher('/niryo_robot_commander/tracking_statistics',
+                                                         TrackingStatistics, queue_size=10)
 
         # Others params
         self.__trajectory_minimum_timeout = rospy.get_param("~trajectory_minimum_timeout")
         self.__compute_plan_max_tries = rospy.get_param("~compute_plan_max_tries")
 
+        # Planning can be done by a thread while another one executes a plan
+        self.__planning_lock = threading.Lock()
+        self.__plan_start_tolerance = rospy.get_param("~plan_start_tolerance")
+        self.__executing_plan_end_joints = None
+        self.__executing_plan_time = 0.0
+        # True once the trajectory sent by MoveIt has been replaced by a goal sent to the controller
+        self.__executing_replaced_plan = False
+        self.__plan_execution_callback = None
+        self.__execution_gate = None
+
+        # Blended trajectories limits
+        self.__joints_max_velocities = np.array([limit.velocity for limit in
+                                                 parameters_validator.get_joints_limits()])
+        self.__joints_max_accelerations = np.array(rospy.get_param("~blended_trajectory/max_accelerations"))
+        self.__trajectory_sampling_step = rospy.get_param("~blended_trajectory/sampling_step")
+
+        # Cartesian paths
+        self.__cartesian_first_chunk_size = rospy.get_param("~cartesian_path/first_chunk_size")
+        self.__cartesian_max_chunk_size = rospy.get_param("~cartesian_path/max_chunk_size")
+        self.__cartesian_eef_step_min = rospy.get_param("~cartesian_path/eef_step_min")
+        self.__cartesian_eef_step_max = rospy.get_param("~cartesian_path/eef_step_max")
+        self.__cartesian_max_turn_per_step = rospy.get_param("~cartesian_path/max_turn_per_step")
+        self.__cartesian_min_fraction = rospy.get_param("~cartesian_path/min_fraction")
+        self.__cartesian_min_replacement_delay = rospy.get_param("~cartesian_path/min_replacement_delay")
+
+        # Every plan is retimed before its execution, so the speed can change without replanning
+        self.__retiming_algorithm = rospy.get_param("~retiming/algorithm")
+        self.__acceleration_scaling_factor = rospy.get_param("~retiming/acceleration_scaling_factor")
+
+        # Plan cache, emptied each time the planning scene world changes
+        self.__plan_cache = PlanCache(rospy.get_param("~plan_cache/size"),
+                                      rospy.get_param("~plan_cache/joints_precision"),
+                                      rospy.get_param("~plan_cache/target_precision"))
+        self.__plan_cache_status_pub = rospy.Publisher('/niryo_robot_commander/plan_cache_status',
+                                                       PlanCacheStatus, latch=True, queue_size=1)
+        rospy.Subscriber('/move_group/monitored_planning_scene', PlanningScene,
+                         self.__callback_planning_scene)
+        rospy.Service('/niryo_robot_commander/clear_plan_cache', Trigger, self.__callback_clear_plan_cache)
+        self.__publish_plan_cache_status()
+
+        # Roadmap of paths planned in advance between the saved poses, built with the service build_roadmap
+        # It is checked against the planning scene before its first use and after each change of the world
+        self.__roadmap = PoseRoadmap(rospy.get_param("~roadmap/joints_tolerance"),
+                                     rospy.get_param("~roadmap/position_tolerance"),
+                                     rospy.get_param("~roadmap/orientation_tolerance"))
+        self.__roadmap_enabled = rospy.get_param("~roadmap/enabled")
+        self.__roadmap_file = os.path.expanduser(rospy.get_param("~roadmap/file"))
+        self.__roadmap_scene_changed = True
+        if self.__roadmap_enabled:
+            self.__load_roadmap()
+        rospy.Service('/niryo_robot_commander/build_roadmap', Trigger, self.__callback_build_roadmap)
+
+        rospy.Service('/niryo_robot_commander/dump_telemetry', SetString, self.__callback_dump_telemetry)
+
         # - CALLABLE SERVICES
 
         # Arm velocity
@@ -136,6 +239,10 @@ class ArmCommander:
         msg.data = self.__max_velocity_scaling_factor
         self.__max_velocity_scaling_factor_pub.publish(msg)
 
+    def __publish_plan_cache_status(self):
+        hits, misses, size, capacity = self.__plan_cache.get_stats()
+        self.__plan_cache_status_pub.publish(PlanCacheStatus(hits, misses, size, capacity))
+
     def __set_position_hold_mode(self):
         """
         Stop the Robot where it is
@@ -154,6 +261,7 @@ class ArmCommander:
     # -- Callbacks
     def __callback_sub_joint_states(self, joint_states):
         self.__joints = list(joint_states.position[:6])
+        self.__telemetry.record_joint_states(rospy.get_time(), self.__joints)
 
     def __callback_new_goal(self, msg):
         """
@@ -163,10 +271,22 @@ class ArmCommander:
         :return: None
         """
         self.__current_goal_id = msg.goal_id.id
+        self.__telemetry.mark("controller_goal", rospy.get_time())
         rospy.logdebug("Arm commander - Got a goal id : {}".format(self.__current_goal_id))
 
     def __callback_current_feedback(self, msg):
         self.__current_feedback = msg
+        if self.__current_goal_id is None or msg.status.goal_id.id != self.__current_goal_id:
+            return
+        if self.__waiting_first_feedback:
+            self.__waiting_first_feedback = False
+            self.__telemetry.mark("first_feedback", rospy.get_time())
+        feedback = msg.feedback
+        failure = self.__execution_monitor.update(feedback.desired.time_from_start.to_sec(),
+                                                  feedback.actual.positions, rospy.get_time())
+        if failure is not None:
+            # Wake up the execution thread
+            self.__traj_finished_event.set()
 
     def __callback_goal_result(self, msg):
         """
@@ -176,6 +296,7 @@ class ArmCommander:
         """
         if msg.status.goal_id.id == self.__current_goal_id:
             self.__current_goal_result = msg.status.status
+            self.__telemetry.mark("controller_result", rospy.get_time())
             rospy.logdebug("Arm commander - Result : ".format(self.__current_goal_result))
             self.__traj_finished_event.set()
         else:
@@ -188,10 +309,186 @@ class ArmCommander:
             self.__set_max_velocity_scaling_factor(req.value / 100.0)
         except ArmCommanderException as e:
             return {'status': CommandStatus.ARM_COMMANDER_FAILURE, 'message': e.message}
+        # Cached paths stay valid : they will be retimed with the new factor
         self.__max_velocity_scaling_factor = req.value
         self.__publish_arm_max_velocity_scaling_factor(None)
         return {'status': CommandStatus.SUCCESS, 'message': 'Success'}
 
+    def __callback_planning_scene(self, msg):
+        """
+        Empty the plan cache if the world or the collisions of the planning scene have changed,
+        the roadmap will be checked before its next use
+        Diffs which only update the robot state are ignored
+        :param msg: planning scene, usually a diff
+        :type msg: PlanningScene
+        :return: None
+        """
+        if (not msg.is_diff or msg.world.collision_objects or msg.world.octomap.octomap.data
+                or msg.robot_state.attached_collision_objects or msg.allowed_collision_matrix.entry_names):
+            self.__clear_plan_cache()
+            self.__roadmap_scene_changed = True
+
+    def __callback_clear_plan_cache(self, _):
+        self.__plan_cache.clear()
+        self.__plan_cache.reset_stats()
+        self.__publish_plan_cache_status()
+        return CommandStatus.SUCCESS, "Plan cache cleared"
+
+    def __callback_build_roadmap(self, _):
+        """
+        Plan the paths between every pair of saved poses in the current planning scene, and save them
+        """
+        try:
+            nodes = self.__get_saved_poses_nodes()
+            scene_signature = self.__get_scene_signature()
+        except (rospy.ServiceException, rospy.ROSException) as e:
+            return CommandStatus.ROS_ERROR, "Cannot build the roadmap : {}".format(e)
+
+        rospy.loginfo("Arm commander - Building the roadmap between {} saved poses".format(len(nodes)))
+        failures = self.__roadmap.build(nodes, scene_signature, self.__plan_roadmap_path)
+        self.__roadmap_scene_changed = False
+        for start_name, end_name in failures:
+            rospy.logwarn("Arm commander - Roadmap : no path found from {} to {}".format(start_name, end_name))
+        message = "Roadmap built : {} poses, {} paths".format(*self.__roadmap.get_size())
+
+        try:
+            directory = os.path.dirname(self.__roadmap_file)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            self.__roadmap.save(self.__roadmap_file)
+        except (IOError, OSError) as e:
+            return CommandStatus.FAILURE, "{}, but it cannot be saved : {}".format(message, e)
+        return CommandStatus.SUCCESS, message
+
+    def __load_roadmap(self):
+        if not os.path.isfile(self.__roadmap_file):
+            rospy.loginfo("Arm commander - No roadmap built yet")
+            return
+        try:
+            self.__roadmap.load(self.__roadmap_file)
+        except (IOError, ValueError) as e:
+            rospy.logwarn("Arm commander - Cannot load the roadmap : {}".format(e))
+            return
+        rospy.loginfo("Arm commander - Roadmap loaded : {} poses, {} paths".format(*self.__roadmap.get_size()))
+
+    def __get_saved_poses_nodes(self):
+        """
+        :return: name, joints and tip pose of each saved pose
+        :rtype: list[(str, list[float], numpy.array)]
+        """
+        nodes = []
+        for name in call_service('/niryo_robot_poses_handlers/get_pose_list', GetNameDescriptionList,
+                                 timeout=2).name_list:
+            response = call_service('/niryo_robot_poses_handlers/get_pose', GetPose, name, timeout=2)
+            pose = response.pose
+            if response.status != CommandStatus.SUCCESS or len(pose.joints) != len(self.__joints_name):
+                rospy.logwarn("Arm commander - Saved pose {} is not added to the roadmap".format(name))
+                continue
+            tip = homogeneous_matrix(matrix_from_rpy(pose.rpy.roll, pose.rpy.pitch, pose.rpy.yaw),
+                                     [pose.position.x, pose.position.y, pose.position.z])
+            nodes.append((name, list(pose.joints), tip))
+        return nodes
+
+    @staticmethod
+    def __get_scene_signature():
+        """
+        :return: hash of the collision objects of the planning scene world
+        :rtype: str
+        """
+        components = PlanningSceneComponents(PlanningSceneComponents.WORLD_OBJECT_NAMES |
+                                             PlanningSceneComponents.WORLD_OBJECT_GEOMETRY)
+        world = call_service('/get_planning_scene', GetPlanningScene, components, timeout=2).scene.world
+
+        def round_pose(pose):
+            return [round(value, 4) for value in (pose.position.x, pose.position.y, pose.position.z,
+                                                  pose.orientation.x, pose.orientation.y, pose.orientation.z,
+                                                  pose.orientation.w)]
+
+        description = sorted((obj.id,
+                              [(primitive.type, [round(value, 4) for value in primitive.dimensions])
+                               for primitive in obj.primitives],
+                              [round_pose(pose) for pose in obj.primitive_poses],
+                              [len(mesh.vertices) for mesh in obj.meshes],
+                              [round_pose(pose) for pose in obj.mesh_poses])
+                             for obj in world.collision_objects)
+        return hashlib.md5(repr(description).encode()).hexdigest()
+
+    def __plan_roadmap_path(self, start_joints, end_joints):
+        plan = self.__get_computed_plan(MoveCommandType.JOINTS, end_joints, start_joints=start_joints,
+                                        use_roadmap=False)
+        if plan is None:
+            return None
+        points = plan.joint_trajectory.points
+        return [point.time_from_start.to_sec() for point in points], [point.positions for point in points]
+
+    def __get_roadmap_plan(self, target_type, target_values, start_joints):
+        """
+        :return: the path of the roadmap from start_joints to the target as a plan, None if there is none
+        :rtype: RobotTrajectory
+        """
+        if start_joints is None or self.__roadmap.is_empty():
+            return None
+        if target_type == MoveCommandType.JOINTS:
+            path = self.__roadmap.find_path_to_joints(start_joints, target_values)
+        elif target_type == MoveCommandType.POSE:
+            path = self.__roadmap.find_path_to_pose(start_joints, homogeneous_matrix(
+                matrix_from_rpy(*target_values[3:]), target_values[:3]))
+        elif target_type == MoveCommandType.POSE_QUAT:
+            path = self.__roadmap.find_path_to_pose(start_joints, homogeneous_matrix(
+                matrix_from_quaternion(*target_values[3:]), target_values[:3]))
+        else:
+            return None
+        if path is None:
+            return None
+
+        if self.__roadmap_scene_changed:
+            self.__roadmap_scene_changed = False
+            try:
+                scene_signature = self.__get_scene_signature()
+            except (rospy.ServiceException, rospy.ROSException) as e:
+                rospy.logwarn("Arm commander - Cannot check the planning scene of the roadmap : {}".format(e))
+                scene_signature = None
+            if scene_signature != self.__roadmap.get_scene_signature():
+                rospy.logwarn("Arm commander - The planning scene changed since the roadmap was built, "
+                              "it is not used until it is built again")
+                self.__roadmap.clear()
+                return None
+
+        times, positions = path
+        plan = RobotTrajectory()
+        plan.joint_trajectory.header.frame_id = self.__reference_frame
+        plan.joint_trajectory.joint_names = self.__joints_name
+        plan.joint_trajectory.points = [JointTrajectoryPoint(positions=list(point_positions),
+                                                             time_from_start=rospy.Duration(time))
+                                        for point_positions, time in zip(positions, times)]
+        # The robot is only close to the pose the path was planned from, and a joints target only close to the pose
+        # the path goes to. A pose target is reached up to the roadmap position and orientation tolerances
+        plan.joint_trajectory.points[0].positions = list(start_joints)
+        if target_type == MoveCommandType.JOINTS:
+            plan.joint_trajectory.points[-1].positions = list(target_values)
+        rospy.logdebug("Arm commander - Plan found in roadmap")
+        return plan
+
+    def __callback_dump_telemetry(self, req):
+        if not self.__telemetry.is_enabled():
+            return CommandStatus.ABORTED, "Telemetry is disabled"
+        try:
+            path = self.__telemetry.dump(self.__telemetry_directory, req.value if req.value else None)
+        except (IOError, OSError) as e:
+            return CommandStatus.FAILURE, "Cannot write telemetry : {}".format(e)
+        if path is None:
+            return CommandStatus.INVALID_PARAMETERS, "No telemetry recorded for command '{}'".format(req.value)
+        return CommandStatus.SUCCESS, path
+
+    def get_telemetry(self):
+        return self.__telemetry
+
+    def __clear_plan_cache(self):
+        if self.__plan_cache.get_stats()[2] > 0:
+            rospy.logdebug("Arm commander - Clear plan cache")
+            self.__plan_cache.clear()
+            self.__publish_plan_cache_status()
+
     def __callback_get_forward_kinematics(self, req):
         return self.get_forward_kinematics(joints=req.joints)
 
@@ -206,28 +503,53 @@ class ArmCommander:
         return success, joints
 
     # -- Executors
-    def __compute_and_execute_plan_to_target(self):
+    def __compute_and_execute_plan_to_target(self, target_type, target_values, plan=None, is_last=True):
         """
         Firstly try to compute the plan to the set target.
         If fails a first time, will try ComputePMaxTries times to stop the arm and recompute the plan
         Then, execute the plan
+        The plan is taken from the plan cache when the same move has already been computed
+        :param target_type: kind of target, from MoveCommandType
+        :type target_type: int
+        :param target_values: values of the target
+        :type target_values: list[float]
+        :param plan: plan already computed to the target, used if it starts where the robot is
+        :type plan: RobotTrajectory
+        :param is_last: False if the command moves the arm again after reaching the target
+        :type is_last: bool
         :return: status, message
         """
+        self.__telemetry.mark("validated", rospy.get_time())
+        if plan is not None and not self.__plan_starts_at_current_state(plan):
+            rospy.logwarn("Arm commander - Plan computed in advance doesn't start from the robot state, replanning")
+            plan = None
+        cache_key = self.__get_plan_cache_key(target_type, target_values, self.__joints)
+
         for tries in range(self.__compute_plan_max_tries + 1):  # We are going to try 3 times
             # if we are re-trying, first stop current plan
             if tries > 0:
                 self.stop_current_plan()
                 rospy.sleep(0.1)
+                # The robot may have moved, do not use the cache anymore
+                cache_key = None
+                plan = None
 
-            plan = self.__get_computed_plan()
+            if plan is None:
+                plan = self.__get_computed_plan(target_type, target_values, cache_key)
             if not plan:
                 raise ArmCommanderException(
                     CommandStatus.PLAN_FAILED, "MoveIt failed to compute the plan.")
+            self.__telemetry.mark("planned", rospy.get_time())
+            timed_plan = self.__get_timed_plan(plan, cache_key)
 
+            self.__wait_execution_gate()
             self.__reset_controller()
             rospy.logdebug("Arm commander - Send MoveIt trajectory to controller.")
-            status, message = self.__execute_plan(plan)
+            # A retry goes to the same target : what has been planned from the end of the first try is kept
+            status, message = self.__execute_plan(timed_plan, is_last and tries == 0)
 
+            if cache_key is not None and status not in (CommandStatus.SUCCESS, CommandStatus.STOPPED):
+                self.__plan_cache.remove(cache_key)
             if status != CommandStatus.SHOULD_RESTART:
                 return status, message
             if tries >= self.__compute_plan_max_tries:
@@ -236,35 +558,100 @@ class ArmCommander:
             rospy.logwarn("Arm commander - Will retry to compute "
                           "& execute trajectory {} time(s)".format(self.__compute_plan_max_tries - tries))
 
-    def __compute_and_execute_trajectory(self, list_poses, dist_smoothing=0.01):
+    def __compute_and_execute_trajectory(self, list_poses, blend_radii):
         """
-        Hard try to to smooth Trajectories, not really working at the moment
+        Compute one continuous trajectory going through all the poses, then execute it
+        Poses are converted to joints with a batch IK and linked by straight joint segments,
+        which are blended around each pose so the robot doesn't stop. The path is then timed with the joints limits
+        The path is checked against the planning scene : if it is in collision, the poses are reached one by one
+        with MoveIt plans
         :param list_poses: list of Pose object
-        :param dist_smoothing: smoothing distance
-        :return: None
+        :param blend_radii: for each pose, distance (m) from the pose where the robot starts blending to the next one
+        :type blend_radii: list[float]
+        :return: status, message
         """
-        # rospy.logerr(list_poses)
-        list_plans = []
-        new_state = RobotStateMoveIt()
-        new_state.joint_state.header.stamp = rospy.Time.now()
-        new_state.joint_state.name = self.__joints_name
-        # rospy.logerr(list_poses)
-        for i, pose_target in enumerate(list_poses):
-            # Getting plan to target
-            self.__arm.set_pose_target(pose_target, self.__end_effector_link)
-            list_plans.append(self.__arm.plan())
-
-            # Generating new start state for future iteration
-            success, new_state.joint_state.position = self.get_inverse_kinematics(pose=pose_target)
-            if not success:
-                self.__arm.set_start_state_to_current_state()
-                raise ArmCommanderException(CommandStatus.INVERT_KINEMATICS_FAILURE, "IK Fail")
-            self.__arm.set_start_state(new_state)
-
-        self.__arm.set_start_state_to_current_state()
-        plan = self.__link_plans(dist_smoothing, *list_plans)
-        # self.__display_traj(plan, id_=int(1000 * dist_smoothing))
-        return self.__execute_plan(plan)
+        if self.__joints is None:
+            raise ArmCommanderException(CommandStatus.ARM_COMMANDER_FAILURE, "Joint states have not been received")
+        self.__parameters_validator.validate_positions([[pose.position.x, pose.position.y, pose.position.z]
+                                                        for pose in list_poses])
+        for pose in list_poses:
+            self.__parameters_validator.validate_orientation_quaternion(pose.orientation)
+        self.__telemetry.mark("validated", rospy.get_time())
+
+        success, poses_joints = self.get_inverse_kinematics_batch(list_poses)
+        if not success:
+            raise ArmCommanderException(CommandStatus.INVERT_KINEMATICS_FAILURE,
+                                        "IK Fail on waypoint {}".format(len(poses_joints) + 1))
+        self.__parameters_validator.validate_joints_trajectory(poses_joints)
+        waypoints = np.array([self.__joints] + poses_joints)
+        self.__telemetry.mark("planned", rospy.get_time())
+
+        # Blend radii are cartesian distances : they are converted to the same ratio of the joints segments
+        start_position = self.get_forward_kinematics(self.__joints).position
+        cartesian_waypoints = np.array([[start_position.x, start_position.y, start_position.z]] +
+                                       [[pose.position.x, pose.position.y, pose.position.z] for pose in list_poses])
+        cartesian_lengths = np.linalg.norm(np.diff(cartesian_waypoints, axis=0), axis=1)
+        joints_lengths = np.linalg.norm(np.diff(waypoints, axis=0), axis=1)
+        blend_distances = np.zeros(len(waypoints))
+        for i in range(1, len(waypoints) - 1):
+            radius = blend_radii[i - 1]
+            if radius <= 0.0:
+                continue
+            shortest_segment = min(cartesian_lengths[i - 1], cartesian_lengths[i])
+            ratio = min(radius / shortest_segment, 0.5) if shortest_segment > 1e-6 else 0.5
+            blend_distances[i] = ratio * min(joints_lengths[i - 1], joints_lengths[i])
+
+        max_velocities = self.__joints_max_velocities * self.__max_velocity_scaling_factor / 100.0
+        path = BlendedJointPath(waypoints, blend_distances)
+        try:
+            positions, times, velocities, accelerations = path.compute_trajectory(
+                self.__trajectory_sampling_step, max_velocities, self.__joints_max_accelerations)
+        except TimeParameterizationException as e:
+            raise ArmCommanderException(CommandStatus.PLAN_FAILED, str(e))
+        self.__telemetry.mark("retimed", rospy.get_time())
+
+        invalid_index = find_first_invalid_position(positions, self.__is_state_valid)
+        if invalid_index is not None:
+            rospy.logwarn("Arm commander - Blended trajectory in collision at {:.2f}s, "
+                          "reaching the poses one by one".format(times[invalid_index]))
+            return self.__execute_poses_one_by_one(list_poses)
+        self.__telemetry.mark("collision_checked", rospy.get_time())
+
+        return self.__execute_plan(self.__get_plan_from_trajectory(positions, times, velocities, accelerations))
+
+    def __get_plan_from_trajectory(self, positions, times, velocities, accelerations):
+        plan = RobotTrajectory()
+        plan.joint_trajectory.header.frame_id = self.__reference_frame
+        plan.joint_trajectory.joint_names = self.__joints_name
+        plan.joint_trajectory.points = [
+            JointTrajectoryPoint(positions=list(point_positions), velocities=list(point_velocities),
+                                 accelerations=list(point_accelerations), time_from_start=rospy.Duration(time))
+            for point_positions, point_velocities, point_accelerations, time in
+            zip(positions, velocities, accelerations, times)]
+        return plan
+
+    def __is_state_valid(self, joints):
+        """
+        :return: False if the robot is in collision at these joints, or if the planning scene cannot be checked
+        :rtype: bool
+        """
+        state = RobotStateMoveIt()
+        state.joint_state.name = self.__joints_name
+        state.joint_state.position = list(joints)
+        try:
+            response = call_service('/check_state_validity', GetStateValidity, state, self.__arm.get_name(),
+                                    Constraints(), timeout=2, retry=True)
+        except (rospy.ROSException, rospy.ServiceException) as e:
+            rospy.logwarn("Arm commander - Cannot check state validity : " + str(e))
+            return False
+        return response.valid
+
+    def __execute_poses_one_by_one(self, list_poses):
+        for index, pose in enumerate(list_poses):
+            ret = self.set_pose_quat_from_pose(pose, is_last=index == len(list_poses) - 1)
+            if ret[0] != CommandStatus.SUCCESS:
+                return ret
+        return CommandStatus.SUCCESS, "Trajectory is Good!"
 
     def __display_traj(self, plan, id_=1):
         topic_display = 'visualization_marker_array'
@@ -290,66 +677,330 @@ class ArmCommander:
         cardboard_marker.color.b = random.random()
         cardboard_marker.color.a = 0.8
 
-        cardboard_marker.points = [self.get_forward_kinematics(joints.positions).position for joints in
-                                   plan.joint_trajectory.points]
+        cardboard_marker.points = [Point(*position) for position in self.get_plan_positions(plan)]
 
         cardboard_marker.lifetime = rospy.Duration(0)
         markers_array.append(cardboard_marker)
         marker_pub.publish(markers_array)
 
-    def __get_computed_plan(self):
+    def __get_computed_plan(self, target_type, target_values, cache_key=None, start_joints=None, use_roadmap=True):
         """
-        Get computed plan from MoveIt
+        Get computed plan from the plan cache, from the roadmap between saved poses, or from MoveIt
+        :param target_type: kind of target, from MoveCommandType
+        :type target_type: int
+        :param target_values: values of the target
+        :type target_values: list[float]
+        :param cache_key: key of the plan in the plan cache. None bypasses the cache
+        :type cache_key: tuple
+        :param start_joints: joints the plan starts from. None to start from the current robot state
+        :type start_joints: list[float]
+        :param use_roadmap: False to bypass the roadmap
+        :type use_roadmap: bool
         :return: the computed plan if MoveIt succeed else None
         """
-        plan = self.__arm.plan()
-        return None if not plan.joint_trajectory.points else plan
+        if cache_key is not None:
+            plan = self.__plan_cache.get(cache_key)
+            self.__publish_plan_cache_status()
+            if plan is not None:
+                rospy.logdebug("Arm commander - Plan found in cache")
+                return plan
+
+        if use_roadmap and self.__roadmap_enabled:
+            plan = self.__get_roadmap_plan(target_type, target_values,
+                                           start_joints if start_joints is not None else self.__joints)
+            if plan is not None:
+                if cache_key is not None:
+                    self.__plan_cache.add(cache_key, plan)
+                return plan
+
+        # MoveIt targets and start state are shared by every thread which plans
+        with self.__planning_lock:
+            self.__set_moveit_target(target_type, target_values)
+            if start_joints is None:
+                self.__arm.set_start_state_to_current_state()
+            else:
+                start_state = RobotStateMoveIt()
+                start_state.joint_state.name = self.__joints_name
+                start_state.joint_state.position = start_joints
+                self.__arm.set_start_state(start_state)
+            try:
+                plan = self.__plan_with_planners()
+            finally:
+                self.__arm.set_start_state_to_current_state()
+
+        if not plan.joint_trajectory.points:
+            return None
+        if cache_key is not None:
+            self.__plan_cache.add(cache_key, plan)
+        return plan
+
+    def __plan_with_planners(self):
+        """
+        Plan to the MoveIt target with each planner until one succeeds
+        :return: the plan, empty if every planner failed
+        :rtype: RobotTrajectory
+        """
+        plan = RobotTrajectory()
+        for planner_id in self.__planners:
+            self.__arm.set_planner_id(planner_id)
+            plan = self.__arm.plan()
+            if plan.joint_trajectory.points:
+                break
+            rospy.logwarn("Arm commander - Planner {} failed".format(planner_id))
+        return plan
+
+    def __set_moveit_target(self, target_type, target_values):
+        """
+        Give the target to MoveIt
+        :param target_type: kind of target, from MoveCommandType
+        :type target_type: int
+        :param target_values: values of the target
+        :type target_values: list[float]
+        :return: None
+        """
+        if target_type == MoveCommandType.JOINTS:
+            self.__arm.set_joint_value_target(target_values)
+        elif target_type in (MoveCommandType.POSE, MoveCommandType.POSE_QUAT):
+            self.__arm.set_pose_target(target_values, self.__end_effector_link)
+        elif target_type == MoveCommandType.POSITION:
+            self.__arm.set_position_target(target_values, self.__end_effector_link)
+        elif target_type == MoveCommandType.RPY:
+            self.__arm.set_rpy_target(target_values, self.__end_effector_link)
+        elif target_type == MoveCommandType.SHIFT_POSE:
+            axis_number, value = target_values
+            self.__arm.shift_pose_target(int(axis_number), value, self.__end_effector_link)
+        else:
+            raise ArmCommanderException(CommandStatus.UNKNOWN_COMMAND, "Unknown target type : {}".format(target_type))
+
+    def __get_plan_cache_key(self, target_type, target_values, start_joints):
+        if not self.__plan_cache.is_enabled() or start_joints is None:
+            return None
+        return self.__plan_cache.make_key(start_joints, target_type, target_values)
+
+    def __plan_starts_at_current_state(self, plan):
+        if self.__joints is None:
+            return False
+        start = np.array(plan.joint_trajectory.points[0].positions)
+        return np.max(np.abs(start - np.array(self.__joints))) < self.__plan_start_tolerance
 
     def __compute_and_execute_cartesian_plan(self, list_poses):
         """
         Compute a cartesian plan according to list_poses and then, execute it
         The robot will follow a straight line between each points
-        If the plan is not validate, raise ArmCommanderException
-        :param list_poses:
+        The path is computed by chunks in a separate thread, each chunk twice as long as the previous one,
+        up to a maximum size. The robot starts as soon as the first chunk is computed. Each chunk computed
+        meanwhile is appended to the trajectory being executed : the whole path is timed again and replaces
+        the trajectory of the controller before it brakes, so the robot doesn't stop between chunks.
+        The robot only stops where the computation is behind the execution
+        As before chunks, a path partially computed is executed up to where it has been computed, unless
+        the computed fraction of its chunk is below cartesian_path/min_fraction : raise ArmCommanderException
+        :param list_poses: list of Pose Object
         :return: status, message
         """
+        list_poses = self.__filter_cartesian_waypoints(list_poses)
+        if len(list_poses) == 0:
+            raise ArmCommanderException(CommandStatus.NO_PLAN_AVAILABLE, "No Waypoints")
+        self.__telemetry.mark("validated", rospy.get_time())
+
+        chunks = []
+        begin, chunk_size = 0, self.__cartesian_first_chunk_size
+        while begin < len(list_poses):
+            chunks.append(list_poses[begin:begin + chunk_size])
+            begin += chunk_size
+            chunk_size = min(2 * chunk_size, self.__cartesian_max_chunk_size)
+
+        results = [None] * len(chunks)
+        computed_events = [threading.Event() for _ in chunks]
+        abort_event = threading.Event()
+
+        def compute_chunks():
+            start_joints = None
+            previous_pose = None
+            for index, chunk in enumerate(chunks):
+                if abort_event.is_set():
+                    break
+                try:
+                    plan, fraction = self.__compute_cartesian_plan(chunk, start_joints, previous_pose)
+                    results[index] = plan, fraction
+                except Exception as e:
+                    results[index] = e
+                computed_events[index].set()
+                # The next chunks cannot start from a chunk partially computed
+                if isinstance(results[index], Exception) or fraction < 1.0:
+                    break
+                start_joints = plan.joint_trajectory.points[-1].positions
+                previous_pose = chunk[-1]
+
+        def take_computed_chunks(index, chunks_positions):
+            """
+            Append the positions of the chunks computed from index
+            :return: index of the next chunk, True if the path ends with the chunks taken
+            """
+            while index < len(chunks) and computed_events[index].is_set():
+                if isinstance(results[index], Exception):
+                    rospy.logerr("Arm commander - Cartesian path computation failed : {}".format(results[index]))
+                    raise ArmCommanderException(CommandStatus.ARM_COMMANDER_FAILURE, "IK Fail")
+                plan, fraction = results[index]
+                rospy.loginfo("Arm commander - Cartesian path chunk {}/{} : {} waypoints, {:.1f}% computed".format(
+                    index + 1, len(chunks), len(chunks[index]), 100 * fraction))
+                if fraction < self.__cartesian_min_fraction:
+                    raise ArmCommanderException(
+                        CommandStatus.PLAN_FAILED, "Only {:.1f}% of the cartesian path chunk {}/{} has been "
+                                                   "computed".format(100 * fraction, index + 1, len(chunks)))
+                chunks_positions.append([point.positions for point in plan.joint_trajectory.points])
+                index += 1
+                if fraction < 1.0:
+                    return index, True
+            return index, index >= len(chunks)
+
+        planning_thread = threading.Thread(target=compute_chunks, name="worker_cartesian_chunks")
+        planning_thread.start()
+
+        status, message = CommandStatus.NO_PLAN_AVAILABLE, "No Waypoints"
+        try:
+            index = 0
+            ended = False
+            while not ended:
+                computed_events[index].wait()
+                chunks_positions = []
+                index, ended = take_computed_chunks(index, chunks_positions)
+                self.__telemetry.mark("planned", rospy.get_time())
+                # Chunks sent to the controller, shared with the extension of the trajectory
+                executed = {'chunks': chunks_positions, 'index': index, 'ended': ended, 'times': None,
+                            'too_late': False}
+                plan = self.__get_streamed_plan(chunks_positions)
+                executed['times'] = [point.time_from_start.to_sec() for point in plan.joint_trajectory.points]
+
+                def get_extension(elapsed_time, executed=executed):
+                    # The next chunk has to be computed, and the trajectory replaced before it begins to brake
+                    if executed['ended'] or executed['too_late'] or \
+                            not computed_events[executed['index']].is_set():
+                        return None
+                    next_chunks = list(executed['chunks'])
+                    try:
+                        next_index, next_ended = take_computed_chunks(executed['index'], next_chunks)
+                        next_plan = self.__get_streamed_plan(next_chunks)
+                    except ArmCommanderException:
+                        # Reported once the trajectory executed ends
+                        executed['too_late'] = True
+                        return None
+                    next_times = [point.time_from_start.to_sec() for point in next_plan.joint_trajectory.points]
+                    if get_divergence_time(executed['times'], next_times) < \
+                            elapsed_time + self.__cartesian_min_replacement_delay:
+                        rospy.logwarn("Arm commander - Cartesian path chunk {}/{} computed too late, "
+                                      "the robot stops before it".format(executed['index'] + 1, len(chunks)))
+                        executed['too_late'] = True
+                        return None
+                    executed.update(chunks=next_chunks, index=next_index, ended=next_ended, times=next_times)
+                    return next_plan, next_ended
+
+                status, message = self.__execute_plan(plan, is_last=ended, get_extension=get_extension)
+                index, ended = executed['index'], executed['ended']
+                if status != CommandStatus.SUCCESS:
+                    break
+            if index < len(chunks) and status == CommandStatus.SUCCESS:
+                rospy.logwarn("Arm commander - Cartesian path executed up to chunk {}/{}, "
+                              "the next chunks have not been computed".format(index, len(chunks)))
+        finally:
+            abort_event.set()
+        return status, message
+
+    def __get_streamed_plan(self, chunks_positions):
+        """
+        :param chunks_positions: joints positions of consecutive cartesian path chunks
+        :type chunks_positions: list[list[list[float]]]
+        :return: plan going through all the chunks without stopping, timed with the joints limits
+        :rtype: RobotTrajectory
+        """
+        max_velocities = self.__joints_max_velocities * self.__max_velocity_scaling_factor / 100.0
         try:
-            plan = self.__compute_cartesian_plan(list_poses)
-        except Exception:
-            raise ArmCommanderException(CommandStatus.ARM_COMMANDER_FAILURE, "IK Fail")
-        return self.__execute_plan(plan)
+            return self.__get_plan_from_trajectory(*time_optimal_parameterization(
+                join_chunks(chunks_positions)[0], max_velocities, self.__joints_max_accelerations))
+        except TimeParameterizationException as e:
+            raise ArmCommanderException(CommandStatus.PLAN_FAILED, str(e))
 
-    def __compute_cartesian_plan(self, list_poses):
+    def __compute_cartesian_plan(self, list_poses, start_joints=None, previous_pose=None):
         """
         Compute cartesian plan from a list of poses
-        As 2 poses cannot be the same, the first operation is to filter list_poses to be sure this condition is met
+        The interpolation step is adapted to the curvature of the path
         :param list_poses: list of Pose Object
-        :return: Computed plan : RobotTrajectory object
+        :param start_joints: joints the plan starts from. None to start from the current robot state
+        :type start_joints: list[float]
+        :param previous_pose: pose reached before the first pose of the list, used to estimate the curvature
+        :type previous_pose: Pose
+        :return: Computed plan : RobotTrajectory object, fraction of the path computed
+        :rtype: (RobotTrajectory, float)
         """
+        poses = list_poses if previous_pose is None else [previous_pose] + list(list_poses)
+        eef_step = self.__get_cartesian_eef_step([[pose.position.x, pose.position.y, pose.position.z]
+                                                  for pose in poses])
 
-        def dist_2_poses(p1, p2):
-            np_pose1 = np.array([p1.position.x, p1.position.y, p1.position.z, p1.orientation.x, p1.orientation.y,
-                                 p1.orientation.z, p1.orientation.w])
-            np_pose2 = np.array([p2.position.x, p2.position.y, p2.position.z, p2.orientation.x, p2.orientation.y,
-                                 p2.orientation.z, p2.orientation.w])
-
-            return np.linalg.norm(np_pose1 - np_pose2)
+        # MoveIt start state is shared by every thread which plans
+        with self.__planning_lock:
+            if start_joints is None:
+                self.__arm.set_start_state_to_current_state()
+            else:
+                start_state = RobotStateMoveIt()
+                start_state.joint_state.name = self.__joints_name
+                start_state.joint_state.position = start_joints
+                self.__arm.set_start_state(start_state)
+            try:
+                return self.__arm.compute_cartesian_path(list_poses, eef_step=eef_step, jump_threshold=0.0)
+            finally:
+                self.__arm.set_start_state_to_current_state()
 
-        if len(list_poses) == 0:
-            return GoalStatus.REJECTED, "No Waypoints"
-        for i in reversed(range(len(list_poses) - 1)):
-            if dist_2_poses(list_poses[i + 1], list_poses[i]) < 0.001:
-                list_poses.pop(i)
-        trajectory_plan, fraction = self.__arm.compute_cartesian_path(list_poses, eef_step=0.05, jump_threshold=0.0)
-        return trajectory_plan
+    def __get_cartesian_eef_step(self, positions):
+        """
+        Interpolation step of a cartesian path : the biggest step on straight lines,
+        smaller steps where the path turns so that the direction changes of at most max_turn_per_step between steps
+        :param positions: Nx3 waypoints positions
+        :return: eef_step in meters
+        :rtype: float
+        """
+        segments = np.diff(np.array(positions, dtype=float).reshape(-1, 3), axis=0)
+        lengths = np.linalg.norm(segments, axis=1)
+        segments, lengths = segments[lengths > 1e-6], lengths[lengths > 1e-6]
+        if len(segments) < 2:
+            return self.__cartesian_eef_step_max
+
+        directions = segments / lengths[:, np.newaxis]
+        angles = np.arccos(np.clip(np.sum(directions[:-1] * directions[1:], axis=1), -1.0, 1.0))
+        curvatures = angles / ((lengths[:-1] + lengths[1:]) / 2.0)
+        max_curvature = np.max(curvatures)
+        if max_curvature <= 0.0:
+            return self.__cartesian_eef_step_max
+        return float(np.clip(self.__cartesian_max_turn_per_step / max_curvature,
+                             self.__cartesian_eef_step_min, self.__cartesian_eef_step_max))
 
-    def __execute_plan(self, plan):
+    @staticmethod
+    def __filter_cartesian_waypoints(list_poses):
+        """
+        As 2 consecutive poses cannot be the same, remove poses too close to the next one
+        :param list_poses: list of Pose Object
+        :return: filtered list of Pose Object
+        """
+        if len(list_poses) < 2:
+            return list(list_poses)
+        poses_array = np.array([[p.position.x, p.position.y, p.position.z, p.orientation.x, p.orientation.y,
+                                 p.orientation.z, p.orientation.w] for p in list_poses])
+        keep = np.ones(len(list_poses), dtype=bool)
+        keep[:-1] = np.linalg.norm(np.diff(poses_array, axis=0), axis=1) >= 0.001
+        return [pose for pose, kept in zip(list_poses, keep) if kept]
+
+    def __execute_plan(self, plan, is_last=True, get_extension=None):
         """
         Execute the plan given
-        Firstly, calculate a timeout which is : 1.5 times *the estimated time of the plan*
-        Then send execute command to MoveIt and wait until the execution finished or the timeout happens
+        Send execute command to MoveIt, then follow the execution with the controller feedbacks until it finishes
+        The execution monitor stops the robot as soon as it diverges from the plan, and detects
+        controller stalls. The timeout (plan duration + trajectory_minimum_timeout) is only a last resort
         :param plan: Computed plan
         :type plan: RobotTrajectory
+        :param is_last: False if the command sends other trajectories after this one.
+                        Only the end of the last trajectory is given as the start of the next command
+        :type is_last: bool
+        :param get_extension: function called during the execution with the time elapsed since the plan was sent.
+                              It returns None, or a plan starting like the plan executed and going further, with its
+                              is_last flag : the trajectory of the controller is replaced by this plan
         :return: CommandStatus, message
         """
         if not plan:
@@ -359,44 +1010,156 @@ class ArmCommander:
         self.__traj_finished_event.clear()
         self.__current_goal_id = None
         self.__current_goal_result = GoalStatus.LOST
-
-        trajectory_time_out = max(1.5 * self.__get_plan_time(plan), self.__trajectory_minimum_timeout)
+        self.__executing_plan_time = self.__get_plan_time(plan)
 
         # Send trajectory and wait
+        self.__wait_execution_gate()
+        points = plan.joint_trajectory.points
+        self.__execution_monitor.start([point.time_from_start.to_sec() for point in points],
+                                       [point.positions for point in points], rospy.get_time())
+        execution_start = rospy.get_time()
+        self.__waiting_first_feedback = True
         self.__arm.execute(plan, wait=False)
-        if self.__traj_finished_event.wait(trajectory_time_out):
-            if self.__current_goal_result == GoalStatus.SUCCEEDED:
-                return CommandStatus.SUCCESS, "Command has been successfully processed"
-            elif self.__current_goal_result == GoalStatus.PREEMPTED:
-                return CommandStatus.STOPPED, "Command has been successfully stopped"
-            elif self.__current_goal_result == GoalStatus.ABORTED:
-                # if joint_trajectory_controller aborts the goal, it will still try to
-                # finish executing the trajectory --> so we ask it to stop from here
-                # http://wiki.ros.org/joint_trajectory_controller -> preemption policy
-                # Send an empty trajectory from the topic interface
-                self.__set_position_hold_mode()
-                abort_str = "Command has been aborted due to a collision or " \
-                            "a motor not able to follow the given trajectory"
-                return CommandStatus.CONTROLLER_PROBLEMS, abort_str
-
-            else:  # problem from ros_control itself
-                self.__current_goal_id = None
+        self.__telemetry.mark("sent", rospy.get_time())
+        self.__on_plan_sent(plan, execution_start, is_last)
+        try:
+            return self.__wait_plan_execution(execution_start, get_extension)
+        finally:
+            self.__telemetry.mark("executed", rospy.get_time())
+            self.__executing_plan_end_joints = None
+            self.__executing_replaced_plan = False
+            self.__execution_monitor.stop()
+            self.__publish_tracking_statistics(self.__executing_plan_time, rospy.get_time() - execution_start)
+
+    def __on_plan_sent(self, plan, start_time, is_last):
+        points = plan.joint_trajectory.points
+        self.__telemetry.add_planned_trajectory(start_time, [point.time_from_start.to_sec() for point in points],
+                                                [point.positions for point in points])
+        if is_last:
+            self.__executing_plan_end_joints = list(points[-1].positions)
+        if self.__plan_execution_callback is not None:
+            self.__plan_execution_callback(plan, start_time, is_last)
+
+    def __replace_executing_plan(self, plan, start_time, is_last):
+        """
+        Replace the trajectory executed by the controller by a plan with the same start
+        The goal is sent to the controller directly : the controller keeps the trajectory executed
+        until the first point of the plan to come, which is at the same place if both trajectories are the same there
+        :param plan: plan going further than the plan executed
+        :type plan: RobotTrajectory
+        :param start_time: time at which the plan executed was sent
+        :type start_time: float
+        :param is_last: False if the command sends other trajectories after this one
+        :type is_last: bool
+        :return: None
+        """
+        goal = FollowJointTrajectoryActionGoal()
+        goal.header.stamp = rospy.Time.now()
+        goal.goal_id.stamp = goal.header.stamp
+        goal.goal_id.id = "{}-replacement-{}".format(rospy.get_name(), goal.header.stamp.to_nsec())
+        goal.goal.trajectory = copy.deepcopy(plan.joint_trajectory)
+        goal.goal.trajectory.header.stamp = rospy.Time.from_sec(start_time)
+
+        points = plan.joint_trajectory.points
+        self.__execution_monitor.replace_trajectory([point.time_from_start.to_sec() for point in points],
+                                                    [point.positions for point in points])
+        self.__executing_plan_time = self.__get_plan_time(plan)
+        self.__executing_replaced_plan = True
+        # The result of the replaced goal, preempted, must not end the execution
+        self.__current_goal_id = goal.goal_id.id
+        self.__traj_goal_pub.publish(goal)
+        self.__on_plan_sent(plan, start_time, is_last)
+
+    def __wait_execution_gate(self):
+        if self.__execution_gate is not None:
+            self.__execution_gate()
+
+    def __wait_plan_execution(self, start_time, get_extension=None):
+        """
+        Wait until the execution of the plan sent finishes, the execution monitor detects a failure,
+        or the timeout happens
+        :param start_time: time at which the plan was sent
+        :type start_time: float
+        :param get_extension: see __execute_plan
+        :return: CommandStatus, message
+        """
+        while not self.__traj_finished_event.wait(self.__execution_monitor_period):
+            if get_extension is not None:
+                extension = get_extension(rospy.get_time() - start_time)
+                if extension is not None:
+                    self.__replace_executing_plan(extension[0], start_time, extension[1])
+            deadline = start_time + self.__executing_plan_time + self.__trajectory_minimum_timeout
+            stall = self.__execution_monitor.check_stall(rospy.get_time())
+            if stall is not None:
+                # Not related to a trajectory failure, something fails in ros_control
+                # The controller may still execute the trajectory : stop the robot where it is
+                rospy.logerr("Arm commander - {}".format(stall))
+                self.__stop_after_execution_failure()
+                return CommandStatus.SHOULD_RESTART, stall
+            if rospy.get_time() > deadline:
+                # This timeout will happen if something fails in ros_control
+                # It is not related to a trajectory failure
+                self.__stop_after_execution_failure()
                 return CommandStatus.SHOULD_RESTART, ""
-        else:
-            # This timeout will happen if something fails in ros_control
-            # It is not related to a trajectory failure
+
+        divergence = self.__execution_monitor.get_failure()
+        if divergence is not None:
+            # Same as an abort from the controller : stop the robot where it is
+            self.__arm.stop()
+            self.__set_position_hold_mode()
+            rospy.logerr("Arm commander - {}".format(divergence))
+            return CommandStatus.CONTROLLER_PROBLEMS, divergence
+
+        if self.__current_goal_result == GoalStatus.SUCCEEDED:
+            return CommandStatus.SUCCESS, "Command has been successfully processed"
+        elif self.__current_goal_result == GoalStatus.PREEMPTED:
+            return CommandStatus.STOPPED, "Command has been successfully stopped"
+        elif self.__current_goal_result == GoalStatus.ABORTED:
+            # if joint_trajectory_controller aborts the goal, it will still try to
+            # finish executing the trajectory --> so we ask it to stop from here
+            # http://wiki.ros.org/joint_trajectory_controller -> preemption policy
+            # Send an empty trajectory from the topic interface
+            self.__set_position_hold_mode()
+            abort_str = "Command has been aborted due to a collision or " \
+                        "a motor not able to follow the given trajectory"
+            return CommandStatus.CONTROLLER_PROBLEMS, abort_str
+
+        else:  # problem from ros_control itself
             self.__current_goal_id = None
             return CommandStatus.SHOULD_RESTART, ""
 
+    def __stop_after_execution_failure(self):
+        self.__current_goal_id = None
+        self.__arm.stop()
+        self.__set_position_hold_mode()
+
+    def __publish_tracking_statistics(self, planned_duration, execution_duration):
+        nb_samples, max_errors, rms_errors = self.__execution_monitor.get_statistics()
+        rospy.logdebug("Arm commander - Tracking error over {} feedbacks : max {}, rms {}".format(
+            nb_samples, np.round(max_errors, 4).tolist(), np.round(rms_errors, 4).tolist()))
+        msg = TrackingStatistics()
+        msg.joint_names = self.__joints_name
+        msg.samples = nb_samples
+        msg.max_errors = max_errors.tolist()
+        msg.rms_errors = rms_errors.tolist()
+        msg.planned_duration = planned_duration
+        msg.execution_duration = execution_duration
+        self.__tracking_statistics_pub.publish(msg)
+
     # --- Callable functions
 
     def stop_arm(self):
         rospy.loginfo("Arm commander - Send STOP to arm")
         self.__arm.stop()
+        if self.__executing_replaced_plan:
+            # MoveIt is not aware of a trajectory sent to the controller
+            self.__set_position_hold_mode()
 
     def stop_current_plan(self):
         rospy.loginfo("Arm commander - Send STOP to arm and RESET to controller")
         self.__arm.stop()
+        if self.__executing_replaced_plan:
+            self.__set_position_hold_mode()
         self.__reset_controller()
 
     def set_joint_target(self, arm_cmd):
@@ -407,20 +1170,7 @@ class ArmCommander:
         :type : ArmMoveCommand
         :return: status, message
         """
-        joints = list(arm_cmd.joints)
-        self.__validate_params_move(MoveCommandType.JOINTS, joints)
-        return self.__set_joint_target_moveit(joints)
-
-    def __set_joint_target_moveit(self, joints):
-        """
-        Set MoveIt target to a joint target
-        Then execute the trajectory to the target
-        :param joints: joints list
-        :type : list[float]
-        :return: status, message
-        """
-        self.__arm.set_joint_value_target(joints)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(*self.__target_from_cmd(MoveCommandType.JOINTS, arm_cmd))
 
     def set_pose_target_from_cmd(self, arm_cmd):
         """
@@ -430,14 +1180,7 @@ class ArmCommander:
         :type : ArmMoveCommand
         :return: status, message
         """
-        self.__validate_params_move(MoveCommandType.POSE, arm_cmd.position, arm_cmd.rpy)
-        x, y, z = arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z
-        roll, pitch, yaw = arm_cmd.rpy.roll, arm_cmd.rpy.pitch, arm_cmd.rpy.yaw
-        return self.__set_pose_target_moveit(x, y, z, roll, pitch, yaw)
-
-    def __set_pose_target_moveit(self, x, y, z, roll, pitch, yaw):
-        self.__arm.set_pose_target([x, y, z, roll, pitch, yaw], self.__end_effector_link)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(*self.__target_from_cmd(MoveCommandType.POSE, arm_cmd))
 
     def set_position_target(self, arm_cmd):
         """
@@ -447,10 +1190,7 @@ class ArmCommander:
         :type : ArmMoveCommand
         :return: status, message
         """
-        self.__validate_params_move(MoveCommandType.POSITION, arm_cmd.position)
-        x, y, z = arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z
-        self.__arm.set_position_target([x, y, z], self.__end_effector_link)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(*self.__target_from_cmd(MoveCommandType.POSITION, arm_cmd))
 
     def set_rpy_target(self, arm_cmd):
         """
@@ -460,10 +1200,7 @@ class ArmCommander:
         :type : ArmMoveCommand
         :return: status, message
         """
-        self.__validate_params_move(MoveCommandType.RPY, arm_cmd.rpy)
-        roll, pitch, yaw = arm_cmd.rpy.roll, arm_cmd.rpy.pitch, arm_cmd.rpy.yaw
-        self.__arm.set_rpy_target([roll, pitch, yaw], self.__end_effector_link)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(*self.__target_from_cmd(MoveCommandType.RPY, arm_cmd))
 
     def set_pose_quat_target(self, arm_cmd):
         """
@@ -473,23 +1210,22 @@ class ArmCommander:
         :type : ArmMoveCommand
         :return: status, message
         """
-        self.__validate_params_move(MoveCommandType.POSE_QUAT, arm_cmd.position, arm_cmd.orientation)
-        x, y, z = arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z
-        q_x, q_y, q_z, q_w = arm_cmd.orientation.x, arm_cmd.orientation.y, arm_cmd.orientation.z, arm_cmd.orientation.w
-        self.__arm.set_pose_target([x, y, z, q_x, q_y, q_z, q_w], self.__end_effector_link)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(*self.__target_from_cmd(MoveCommandType.POSE_QUAT, arm_cmd))
 
-    def set_pose_quat_from_pose(self, pose):
+    def set_pose_quat_from_pose(self, pose, is_last=True):
         """
         Set MoveIt target to a Pose target with quaternion
         Then execute the trajectory to the target
         :param pose: Pose message containing target values
         :type : Pose
+        :param is_last: False if the command moves the arm again after reaching the pose
+        :type is_last: bool
         :return: status, message
         """
         self.__validate_params_move(MoveCommandType.POSE_QUAT, pose.position, pose.orientation)
-        self.__arm.set_pose_target(pose, self.__end_effector_link)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(
+            MoveCommandType.POSE_QUAT, [pose.position.x, pose.position.y, pose.position.z, pose.orientation.x,
+                                        pose.orientation.y, pose.orientation.z, pose.orientation.w], is_last=is_last)
 
     def set_shift_pose_target(self, arm_cmd):
         """
@@ -499,9 +1235,102 @@ class ArmCommander:
         :type : ArmMoveCommand
         :return: status, message
         """
-        self.__validate_params_move(MoveCommandType.SHIFT_POSE, arm_cmd.shift)
-        self.__arm.shift_pose_target(arm_cmd.shift.axis_number, arm_cmd.shift.value, self.__end_effector_link)
-        return self.__compute_and_execute_plan_to_target()
+        return self.__compute_and_execute_plan_to_target(*self.__target_from_cmd(MoveCommandType.SHIFT_POSE, arm_cmd))
+
+    def __target_from_cmd(self, target_type, arm_cmd):
+        """
+        Validate the target of a command and extract its values
+        :param target_type: kind of target, from MoveCommandType
+        :type target_type: int
+        :param arm_cmd: ArmMoveCommand message containing target values
+        :type : ArmMoveCommand
+        :return: target_type, target_values
+        :rtype: (int, list[float])
+        """
+        if target_type == MoveCommandType.JOINTS:
+            joints = list(arm_cmd.joints)
+            self.__validate_params_move(target_type, joints)
+            return target_type, joints
+        elif target_type == MoveCommandType.POSE:
+            self.__validate_params_move(target_type, arm_cmd.position, arm_cmd.rpy)
+            return target_type, [arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z,
+                                 arm_cmd.rpy.roll, arm_cmd.rpy.pitch, arm_cmd.rpy.yaw]
+        elif target_type == MoveCommandType.POSITION:
+            self.__validate_params_move(target_type, arm_cmd.position)
+            return target_type, [arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z]
+        elif target_type == MoveCommandType.RPY:
+            self.__validate_params_move(target_type, arm_cmd.rpy)
+            return target_type, [arm_cmd.rpy.roll, arm_cmd.rpy.pitch, arm_cmd.rpy.yaw]
+        elif target_type == MoveCommandType.POSE_QUAT:
+            self.__validate_params_move(target_type, arm_cmd.position, arm_cmd.orientation)
+            return target_type, [arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z, arm_cmd.orientation.x,
+                                 arm_cmd.orientation.y, arm_cmd.orientation.z, arm_cmd.orientation.w]
+        elif target_type == MoveCommandType.SHIFT_POSE:
+            self.__validate_params_move(target_type, arm_cmd.shift)
+            return target_type, [arm_cmd.shift.axis_number, arm_cmd.shift.value]
+        raise ArmCommanderException(CommandStatus.UNKNOWN_COMMAND, "Unknown target type : {}".format(target_type))
+
+    # - Planning ahead
+
+    @staticmethod
+    def can_plan_ahead(arm_cmd):
+        """
+        :return: True if the plan of the command only depends on its start joints and its target
+        :rtype: bool
+        """
+        return arm_cmd.cmd_type in (MoveCommandType.JOINTS, MoveCommandType.POSE, MoveCommandType.POSITION,
+                                    MoveCommandType.RPY, MoveCommandType.POSE_QUAT)
+
+    def get_executing_plan_end_joints(self):
+        """
+        :return: joints at the end of the trajectory being executed, None if the arm is not executing a plan
+        :rtype: list[float]
+        """
+        return self.__executing_plan_end_joints
+
+    def set_plan_execution_callback(self, callback):
+        """
+        :param callback: function called with each plan, the time it is sent and whether it is the last plan
+                         of the command, when its execution starts
+        """
+        self.__plan_execution_callback = callback
+
+    def set_execution_gate(self, gate):
+        """
+        :param gate: function called before sending a trajectory, which waits until the robot can move.
+                     It raises ArmCommanderException if the robot cannot move
+        """
+        self.__execution_gate = gate
+
+    def compute_plan_from_state(self, arm_cmd, start_joints):
+        """
+        Compute the plan of a command as if the robot was at start_joints
+        Used to plan a command while the previous one is executed
+        :param arm_cmd: ArmMoveCommand message containing target values
+        :type : ArmMoveCommand
+        :param start_joints: joints the plan starts from
+        :type start_joints: list[float]
+        :return: the computed plan, None if the command cannot be planned ahead or if MoveIt failed
+        :rtype: RobotTrajectory
+        """
+        if not self.can_plan_ahead(arm_cmd):
+            return None
+        target_type, target_values = self.__target_from_cmd(arm_cmd.cmd_type, arm_cmd)
+        cache_key = self.__get_plan_cache_key(target_type, target_values, start_joints)
+        return self.__get_computed_plan(target_type, target_values, cache_key, start_joints)
+
+    def execute_planned_command(self, arm_cmd, plan):
+        """
+        Execute a command with a plan computed in advance with compute_plan_from_state
+        The plan is recomputed if it doesn't start from the current robot state
+        :param arm_cmd: ArmMoveCommand message containing target values
+        :type : ArmMoveCommand
+        :param plan: plan computed in advance
+        :type plan: RobotTrajectory
+        :return: status, message
+        """
+        target_type, target_values = self.__target_from_cmd(arm_cmd.cmd_type, arm_cmd)
+        return self.__compute_and_execute_plan_to_target(target_type, target_values, plan)
 
     def set_linear_trajectory(self, arm_cmd):
         """
@@ -523,30 +1352,36 @@ class ArmCommander:
         """
         Version 1 : Go to first pose using "classic" trajectory then compute cartesian path between all points
         Version 2 : Going to all poses one by one using "classical way"
-        Version 3 : Generate all plans, merge them & smooth transitions
+        Version 3 : Compute one continuous trajectory through all poses, blended around each of them
 
+        :param arm_cmd: ArmMoveCommand message containing list_poses, and dist_smoothing or blend_radii
+        :type : ArmMoveCommand
+        :return: status, message
         """
         list_poses = arm_cmd.list_poses
         if len(list_poses) == 0:
             return CommandStatus.NO_PLAN_AVAILABLE, "Can't generate plan from a list of length 0"
 
         dist_smoothing = arm_cmd.dist_smoothing
+        if arm_cmd.blend_radii:
+            if len(arm_cmd.blend_radii) != len(list_poses):
+                raise ArmCommanderException(CommandStatus.INVALID_PARAMETERS,
+                                            "One blend radius is needed per pose")
+            blend_radii = list(arm_cmd.blend_radii)
+        else:
+            blend_radii = [dist_smoothing] * len(list_poses)
 
-        if dist_smoothing == 0.0:
+        if not any(blend_radii):
             if len(list_poses) < 3:  # Classical moves
-                for pose in list_poses:
-                    ret = self.set_pose_quat_from_pose(pose)
-                    if ret[0] != CommandStatus.SUCCESS:
-                        return ret
-                return CommandStatus.SUCCESS, "Trajectory is Good!"
+                return self.__execute_poses_one_by_one(list_poses)
             else:  # Linear path
                 # We are going to the initial pose using "classical" method
                 pose_init = list_poses.pop(0)
-                self.set_pose_quat_from_pose(pose_init)
+                self.set_pose_quat_from_pose(pose_init, is_last=False)
                 return self.__compute_and_execute_cartesian_plan(list_poses)
 
         else:
-            return self.__compute_and_execute_trajectory(list_poses, dist_smoothing=dist_smoothing)
+            return self.__compute_and_execute_trajectory(list_poses, blend_radii)
 
     def draw_spiral_trajectory(self, arm_cmd):
         """
@@ -579,21 +1414,44 @@ class ArmCommander:
                 angle += angle_step_rad
         return self.__compute_and_execute_cartesian_plan(waypoints)
 
-    def __retime_plan(self, plan, velocity_scaling_factor=1.0, acceleration_scaling_factor=1.0, optimize=False):
+    def __get_timed_plan(self, plan, cache_key=None):
+        """
+        Retime the path of a plan with the current velocity and acceleration scaling factors
+        Timings of cached plans are cached too, so going back to a previous speed costs nothing
+        :param plan: plan to retime, only its path is used
+        :type plan: RobotTrajectory
+        :param cache_key: key of the plan in the plan cache. None bypasses the cache
+        :type cache_key: tuple
+        :return: the plan retimed, or the plan given if the retiming fails
+        :rtype: RobotTrajectory
         """
-        Take a plan and retime it
+        scaling_factors = (self.__max_velocity_scaling_factor / 100.0, self.__acceleration_scaling_factor)
+        if cache_key is not None:
+            timed_plan = self.__plan_cache.get_timing(cache_key, scaling_factors)
+            if timed_plan is not None:
+                return timed_plan
+
+        timed_plan = self.__retime_plan(plan, *scaling_factors)
+        if not timed_plan.joint_trajectory.points:
+            rospy.logwarn("Arm commander - Retiming failed, the plan is executed with its original timing")
+            return plan
+        self.__telemetry.mark("retimed", rospy.get_time())
+        rospy.logdebug("Arm commander - Plan retimed from {:.2f}s to {:.2f}s".format(
+            self.__get_plan_time(plan), self.__get_plan_time(timed_plan)))
+        if cache_key is not None:
+            self.__plan_cache.add_timing(cache_key, scaling_factors, timed_plan)
+        return timed_plan
+
+    def __retime_plan(self, plan, velocity_scaling_factor=1.0, acceleration_scaling_factor=1.0):
+        """
+        Take a plan and retime it with the retiming algorithm from the parameters
         """
         start_state = self.__get_plan_start_robot_state(plan)
 
-        if optimize:
-            algorithm = "time_optimal_trajectory_generation"
-        else:
-            algorithm = "iterative_time_parameterization"
-
         plan_out = self.__arm.retime_trajectory(start_state, plan,
                                                 velocity_scaling_factor=velocity_scaling_factor,
                                                 acceleration_scaling_factor=acceleration_scaling_factor,
-                                                algorithm=algorithm
+                                                algorithm=self.__retiming_algorithm
                                                 )
         return plan_out
 
@@ -604,73 +1462,6 @@ class ArmCommander:
         start_state.joint_state.name = self.__joints_name
         return start_state
 
-    def __link_plans(self, dist_smoothing=0.0, *plans):
-        """
-        Link plans together with a smooth transition between each of them
-        """
-
-        def dist_2_poses(p1, p2):
-            np_pose1 = np.array([p1.position.x, p1.position.y, p1.position.z])
-            np_pose2 = np.array([p2.position.x, p2.position.y, p2.position.z])
-            dist = np.linalg.norm(np_pose1 - np_pose2)
-            return dist
-
-        def find_limit_point(plan_, dist_smooth, reverse):
-            len_plan = len(plan_.joint_trajectory.points)
-            ind_ref = -1 if reverse else 0
-            reference_pos = self.get_forward_kinematics(plan_.joint_trajectory.points[ind_ref].positions)
-            for raw_ind in range(1, len_plan):
-                if reverse:
-                    ind = len_plan - raw_ind - 1
-                else:
-                    ind = raw_ind
-                pose_i = self.get_forward_kinematics(plan_.joint_trajectory.points[ind].positions)
-                dist_pose_to_target = dist_2_poses(reference_pos, pose_i)
-                if dist_pose_to_target > dist_smooth:
-                    return ind
-            else:
-                if reverse:
-                    return 0
-                else:
-                    return len_plan - 1
-
-        smooth_zones = []
-        offset = 0
-        for plan_in, plan_out in zip(plans[:-1], plans[1:]):
-            begin_index = offset + find_limit_point(plan_in, dist_smoothing, reverse=True)
-            offset += len(plan_in.joint_trajectory.points) - 1
-            mid_index = offset
-            end_index = mid_index + find_limit_point(plan_out, dist_smoothing, reverse=False)
-            smooth_zones.append((begin_index, mid_index, end_index))
-
-        big_plan = plans[0]
-        time_offset = big_plan.joint_trajectory.points[-1].time_from_start
-
-        for plan in plans[1:]:
-            for i in range(1, len(plan.joint_trajectory.points)):
-                plan.joint_trajectory.points[i].time_from_start += time_offset
-
-            big_plan.joint_trajectory.points += plan.joint_trajectory.points[1:]
-
-            time_offset += plan.joint_trajectory.points[-1].time_from_start
-
-        def ind_to_pos(ind):
-            return np.array(big_plan.joint_trajectory.points[ind].positions)
-
-        def bezier(p0, p1, p2, t):
-            return ((1 - t) ** 2) * p0 + 2 * (1 - t) * t * p1 + (t ** 2) * p2
-
-        for smooth_zone in smooth_zones:
-            begin_index, mid_index, end_index = smooth_zone
-            begin_positions, mid_positions, end_positions = map(ind_to_pos, [begin_index, mid_index, end_index])
-            for point_index in range(begin_index + 1, end_index):
-                ratio = float(point_index - begin_index) / (end_index - begin_index)
-                bezier_result = bezier(begin_positions, mid_positions, end_positions, ratio)
-                big_plan.joint_trajectory.points[point_index].positions = bezier_result
-
-        final_plan = self.__retime_plan(big_plan, optimize=True)
-        return final_plan
-
     def __set_max_velocity_scaling_factor(self, percentage):
         """
         Ask MoveIt to set the relative speed to (percentage)%
@@ -726,23 +1517,75 @@ class ArmCommander:
     def get_forward_kinematics(self, joints):
         """
         Get forward kinematic from joints
+        Computed in-process if native kinematics are loaded, else asked to MoveIt
         :param joints: list of joints value
-        :type joints: Pose
+        :type joints: list[float]
         :return: A RobotState object
         """
+        if self.__kinematics is not None:
+            try:
+                return self.__robot_state_from_matrix(self.__kinematics.forward_kinematics(joints))
+            except KinematicsException as e:
+                rospy.logwarn("Arm commander - Native FK failed, fallback on MoveIt : " + str(e))
+        return self.__get_forward_kinematics_moveit(joints)
+
+    @staticmethod
+    def __robot_state_from_matrix(matrix):
+        """
+        Format an homogeneous transform as the MoveIt FK result
+        :param matrix: 4x4 transform
+        :return: A RobotState object
+        """
+        quaternion = quaternion_from_matrix(matrix)
+        rpy = euler_from_quaternion(quaternion)
+        quaternion = tuple(round(q, 3) for q in quaternion)
+        point = tuple(round(v, 3) for v in matrix[:3, 3])
+        return RobotState(Point(*point), RPY(*rpy), Quaternion(*quaternion))
+
+    def get_forward_kinematics_batch(self, joints_array):
+        """
+        Get forward kinematics for a whole list of joints in one call
+        :param joints_array: Nx6 joints values, one configuration per row
+        :type joints_array: list[list[float]] | numpy.array
+        :return: list of RobotState objects
+        :rtype: list[RobotState]
+        """
+        if self.__kinematics is not None:
+            try:
+                return [self.__robot_state_from_matrix(matrix) for matrix in
+                        self.__kinematics.forward_kinematics_batch(joints_array)]
+            except KinematicsException as e:
+                rospy.logwarn("Arm commander - Native FK failed, fallback on MoveIt : " + str(e))
+        return [self.__get_forward_kinematics_moveit(list(joints)) for joints in joints_array]
+
+    def get_plan_positions(self, plan):
+        """
+        End effector positions of every plan point
+        :param plan: plan given by MoveIt
+        :type plan: RobotTrajectory
+        :return: Nx3 positions
+        :rtype: numpy.array
+        """
+        joints_array = np.array([point.positions for point in plan.joint_trajectory.points])
+        if self.__kinematics is not None:
+            try:
+                return self.__kinematics.positions_batch(joints_array)
+            except KinematicsException as e:
+                rospy.logwarn("Arm commander - Native FK failed, fallback on MoveIt : " + str(e))
+        return np.array([[state.position.x, state.position.y, state.position.z] for state in
+                         self.get_forward_kinematics_batch(joints_array)])
+
+    def __get_forward_kinematics_moveit(self, joints):
         try:
-            rospy.wait_for_service('compute_fk', 2)
-        except (rospy.ServiceException, rospy.ROSException) as e:
-            rospy.logerr("Arm commander - Impossible to connect to FK service : " + str(e))
-            return RobotState()
-        try:
-            moveit_fk = rospy.ServiceProxy('compute_fk', GetPositionFK)
             fk_link = ['base_link', 'tool_link']
             header = Header(0, rospy.Time.now(), "world")
             rs = RobotStateMoveIt()
             rs.joint_state.name = self.__joints_name
             rs.joint_state.position = joints
-            response = moveit_fk(header, fk_link, rs)
+            response = call_service('compute_fk', GetPositionFK, header, fk_link, rs, timeout=2, retry=True)
+        except rospy.ROSException as e:
+            rospy.logerr("Arm commander - Impossible to connect to FK service : " + str(e))
+            return RobotState()
         except rospy.ServiceException as e:
             rospy.logerr("Arm commander - Failed to get FK : " + str(e))
             return RobotState()
@@ -759,23 +1602,89 @@ class ArmCommander:
 
         return RobotState(Point(*point), RPY(*rpy), Quaternion(*quaternion))
 
+    def get_kinematics(self):
+        """
+        :return: native kinematics of the arm, None if they are not loaded
+        :rtype: NedKinematics
+        """
+        return self.__kinematics
+
     def get_inverse_kinematics(self, pose):
+        """
+        Get joints which bring the end effector to pose
+        Solved in-process from the current joints if native kinematics are loaded,
+        MoveIt is asked if it fails
+        :param pose: target pose
+        :type pose: Pose
+        :return: success, joints
+        :rtype: (bool, list[float])
+        """
+        if self.__kinematics is not None:
+            seed = self.__joints if self.__joints is not None else [0.0] * len(self.__joints_name)
+            try:
+                success, joints = self.__kinematics.inverse_kinematics(self.__matrix_from_pose(pose), seed)
+                if success:
+                    return True, joints
+                rospy.logdebug("Arm commander - Native IK didn't find a solution, fallback on MoveIt")
+            except KinematicsException as e:
+                rospy.logwarn("Arm commander - Native IK failed, fallback on MoveIt : " + str(e))
+        return self.__get_inverse_kinematics_moveit(pose)
+
+    def get_inverse_kinematics_batch(self, poses):
+        """
+        Get joints for consecutive poses, each solution is used as seed for the next pose
+        so that the solutions stay on the same branch along the path
+        :param poses: target poses
+        :type poses: list[Pose]
+        :return: success, joints of each pose. On failure, solutions found before the first unreachable pose
+        :rtype: (bool, list[list[float]])
+        """
+        if self.__kinematics is not None:
+            seed = self.__joints if self.__joints is not None else [0.0] * len(self.__joints_name)
+            try:
+                success, solutions = self.__kinematics.inverse_kinematics_batch(
+                    [self.__matrix_from_pose(pose) for pose in poses], seed)
+                if success:
+                    return True, solutions
+                rospy.logdebug("Arm commander - Native IK didn't find a solution, fallback on MoveIt")
+            except KinematicsException as e:
+                rospy.logwarn("Arm commander - Native IK failed, fallback on MoveIt : " + str(e))
+        solutions = []
+        seed = self.__joints
+        for pose in poses:
+            success, joints = self.__get_inverse_kinematics_moveit(pose, seed)
+            if not success:
+                return False, solutions
+            solutions.append(joints)
+            seed = joints
+        return True, solutions
+
+    @staticmethod
+    def __matrix_from_pose(pose):
+        orientation = pose.orientation
+        return homogeneous_matrix(matrix_from_quaternion(orientation.x, orientation.y, orientation.z, orientation.w),
+                                  [pose.position.x, pose.position.y, pose.position.z])
+
+    def __get_inverse_kinematics_moveit(self, pose, seed=None):
+        """
+        :param seed: joints MoveIt starts the search from. The current joints if None
+        :type seed: list[float]
+        :return: success, joints
+        :rtype: (bool, list[float])
+        """
         try:
-            rospy.wait_for_service('compute_ik', 2)
-        except (rospy.ServiceException, rospy.ROSException) as e:
-            rospy.logerr("Arm commander - Impossible to connect to IK service : " + str(e))
-            return False, []
-        try:
-            moveit_ik = rospy.ServiceProxy('compute_ik', GetPositionIK)
             req = PositionIKRequest()
             req.group_name = self.__arm.get_name()
             req.ik_link_name = self.__end_effector_link
 
             req.robot_state.joint_state.name = self.__joints_name
-            req.robot_state.joint_state.position = self.__joints
+            req.robot_state.joint_state.position = self.__joints if seed is None else seed
             req.pose_stamped.pose = pose
 
-            response = moveit_ik(req)
+            response = call_service('compute_ik', GetPositionIK, req, timeout=2, retry=True)
+        except rospy.ROSException as e:
+            rospy.logerr("Arm commander - Impossible to connect to IK service : " + str(e))
+            return False, []
         except rospy.ServiceException as e:
             rospy.logerr("Arm commander - Service call failed: {}".format(e))
             return False, []
@@ -12,10 +12,15 @@ a mouse to control the robot)
 
 import rospy
 import math
+import threading
+import numpy as np
 from niryo_robot_commander.command_enums import ArmCommanderException
+from niryo_robot_commander.kinematics import KinematicsException, homogeneous_matrix, matrix_from_rpy
+from niryo_robot_commander.jog_streaming import VelocityRamp, twist_to_joint_velocities, scale_to_limits
 
 # Command Status
 from niryo_robot_msgs.msg import CommandStatus
+from niryo_robot_msgs.service_proxy_pool import call_service
 
 # Messages
 from geometry_msgs.msg import Quaternion
@@ -26,6 +31,7 @@ from trajectory_msgs.msg import JointTrajectoryPoint
 
 from niryo_robot_msgs.msg import HardwareStatus
 from niryo_robot_msgs.msg import RobotState
+from niryo_robot_commander.msg import JogVelocity
 
 # Services
 from niryo_robot_commander.srv import GetIK
@@ -35,7 +41,7 @@ from niryo_robot_msgs.srv import GetBool
 
 
 class JogController:
-    def __init__(self, parameters_validator):
+    def __init__(self, parameters_validator, kinematics=None):
         # - Publisher which publishes if JogController is enabled
         self._enabled = False
         self._jog_enabled_publisher = rospy.Publisher('/niryo_robot/jog_interface/is_enabled',
@@ -76,6 +82,11 @@ class JogController:
         rospy.Subscriber('/niryo_robot_hardware_interface/hardware_status', HardwareStatus,
                          self.__callback_hardware_status)
 
+        # Jog readiness is maintained from these topics, so a jog command doesn't wait for any service
+        self.__commander_active = None
+        rospy.Subscriber('/niryo_robot_commander/is_active', Bool,
+                         self.__callback_commander_active)
+
         # - Service
         rospy.Service('/niryo_robot/jog_interface/jog_shift_commander', JogShift,
                       self.__callback_jog_commander)
@@ -84,6 +95,9 @@ class JogController:
         self._new_robot_state = RobotState()
         self._last_robot_state_published = RobotState()
         self._service_ik = rospy.ServiceProxy('/niryo_robot/kinematics/inverse', GetIK)
+        # Native kinematics allow to solve pose jog in-process, without service round-trip
+        self.__kinematics = kinematics
+        self.__differential_ik_max_iterations = rospy.get_param("~jog_differential_ik_max_iterations")
 
         # - Values Init
         self._shift_mode = None
@@ -100,6 +114,31 @@ class JogController:
         # - Others param
         self.__time_without_jog_limit = rospy.get_param("~time_without_jog_limit")
 
+        # - Velocity streaming : velocities are integrated at a fixed rate with limited accelerations
+        stream_params = rospy.get_param("~jog_velocity")
+        joints_limits = parameters_validator.get_joints_limits()
+        self.__joints_lower_limits = np.array([limit.lower for limit in joints_limits])
+        self.__joints_upper_limits = np.array([limit.upper for limit in joints_limits])
+        self.__stream_joints_max_velocities = np.array([limit.velocity for limit in joints_limits]) * \
+            stream_params["joints_velocity_ratio"]
+        linear_velocity, angular_velocity = stream_params["pose_max_velocity"]
+        linear_acceleration, angular_acceleration = stream_params["pose_max_acceleration"]
+        self.__stream_ramps = {
+            JogVelocity.JOINTS_VELOCITY: VelocityRamp(self.__stream_joints_max_velocities,
+                                                      [stream_params["joints_max_acceleration"]] * len(joints_limits),
+                                                      stream_params["deadman_timeout"]),
+            JogVelocity.POSE_VELOCITY: VelocityRamp([linear_velocity] * 3 + [angular_velocity] * 3,
+                                                    [linear_acceleration] * 3 + [angular_acceleration] * 3,
+                                                    stream_params["deadman_timeout"]),
+        }
+        self.__stream_period = 1.0 / stream_params["rate"]
+        self.__stream_lock = threading.Lock()
+        self.__stream_timer = None
+        self.__stream_mode = None
+        self.__stream_joints = None
+        rospy.Subscriber('/niryo_robot/jog_interface/jog_velocity', JogVelocity,
+                         self.__callback_jog_velocity, queue_size=1)
+
     # - Callbacks
 
     def __callback_sub_robot_state(self, robot_state):
@@ -109,10 +148,24 @@ class JogController:
         self._joint_states = joint_states_msg.position[:6]
 
     def __callback_sub_learning_mode(self, learning_mode):
+        activated = learning_mode.data and self.__learning_mode_on is False
         self.__learning_mode_on = learning_mode.data
+        if activated and self._enabled:
+            rospy.loginfo("Jog Controller - Learning mode activated")
+            self.disable()
 
     def __callback_hardware_status(self, msg):
         self.__hardware_status = msg
+        if self._enabled and not self.__is_calibrated():
+            rospy.loginfo("Jog Controller - Calibration needed")
+            self.disable()
+
+    def __callback_commander_active(self, msg):
+        activated = msg.data and not self.__commander_active
+        self.__commander_active = msg.data
+        if activated and self._enabled:
+            rospy.loginfo("Jog Controller - A command is executed by the commander")
+            self.disable()
 
     def __callback_enable_jog(self, req):
         if req.value:
@@ -121,24 +174,11 @@ class JogController:
             return self.disable()
 
     def __callback_jog_commander(self, msg):
-        if self.__hardware_status.calibration_needed or self.__hardware_status.calibration_in_progress:
-            return CommandStatus.ABORTED, "Cannot send command cause Jog because calibration is not done"
-        if self.__learning_mode_on:
-            try:
-                rospy.wait_for_service('/niryo_robot/learning_mode/activate', 2)
-                service = rospy.ServiceProxy('/niryo_robot/learning_mode/activate', SetBool)
-                result = service(True)
-                if result.status != CommandStatus.SUCCESS:
-                    return CommandStatus.ABORTED, "Cannot send command cause Jog because learning mode is on and" \
-                                                  " cannot be disabled"
-                rospy.sleep(0.1)
-            except (rospy.ROSException, rospy.ServiceException):
-                return CommandStatus.ABORTED, "Error while trying to turn Off learning mode"
-
-        if not self._enabled:
-            ret, str_msg = self.enable()
-            if ret == CommandStatus.ABORTED:
-                return CommandStatus.ABORTED, "Cannot send command cause Jog is not activated and cannot be"
+        if self.__stream_timer is not None:
+            return CommandStatus.ABORTED, "Cannot send command cause Jog velocity is streamed"
+        status, message = self.__prepare_jog()
+        if status != CommandStatus.SUCCESS:
+            return status, message
         self._last_command_timer = rospy.get_time()
 
         shift_mode = msg.cmd
@@ -177,6 +217,31 @@ class JogController:
             self._new_robot_state = RobotState()
         return CommandStatus.SUCCESS, "Command send"
 
+    def __callback_jog_velocity(self, msg):
+        if msg.cmd not in self.__stream_ramps or len(msg.velocities) != len(self.__stream_joints_max_velocities):
+            rospy.logwarn_throttle(1.0, "Jog Controller - Invalid jog velocity command")
+            return
+        if msg.cmd == JogVelocity.POSE_VELOCITY and self.__kinematics is None:
+            rospy.logwarn_throttle(1.0, "Jog Controller - Pose velocity needs the native kinematics")
+            return
+        if self.__stream_timer is None:
+            status, message = self.__prepare_jog()
+            if status != CommandStatus.SUCCESS:
+                rospy.logwarn_throttle(1.0, "Jog Controller - {}".format(message))
+                return
+            self.__start_stream()
+
+        now = rospy.get_time()
+        with self.__stream_lock:
+            self._last_command_timer = now
+            if msg.cmd != self.__stream_mode:
+                if self.__stream_mode is not None and not self.__stream_ramps[self.__stream_mode].is_stopped():
+                    # The current motion is stopped before changing mode
+                    self.__stream_ramps[self.__stream_mode].set_target([0.0] * len(msg.velocities), now)
+                    return
+                self.__stream_mode = msg.cmd
+            self.__stream_ramps[msg.cmd].set_target(msg.velocities, now)
+
     # - Publishers
 
     def _publish_jog_enabled(self, *_):
@@ -187,6 +252,41 @@ class JogController:
         except rospy.ROSException:
             return
 
+    def __publish_stream_step(self, *_):
+        """
+        Integrate the streamed velocity over one period and send the next point to the controller
+        The stream stops when the velocity has ramped down to zero
+        """
+        with self.__stream_lock:
+            if self.__stream_timer is None or self.__stream_mode is None:
+                return
+            ramp = self.__stream_ramps[self.__stream_mode]
+            velocities = ramp.step(self.__stream_period, rospy.get_time())
+            if self.__stream_mode == JogVelocity.POSE_VELOCITY:
+                jacobian, _ = self.__kinematics.jacobian(self.__stream_joints)
+                joints_velocities = twist_to_joint_velocities(jacobian, velocities)
+            else:
+                joints_velocities = velocities
+            joints_velocities = scale_to_limits(joints_velocities, self.__stream_joints_max_velocities)
+            joints = np.clip(self.__stream_joints + joints_velocities * self.__stream_period,
+                             self.__joints_lower_limits, self.__joints_upper_limits)
+            # Joints stopped by their limits don't keep their velocity
+            joints_velocities = (joints - self.__stream_joints) / self.__stream_period
+            self.__stream_joints = joints
+
+            msg = JointTrajectory()
+            msg.header.stamp = rospy.Time.now()
+            msg.joint_names = ['joint_1', 'joint_2', 'joint_3', 'joint_4', 'joint_5', 'joint_6']
+            point = JointTrajectoryPoint()
+            point.positions = joints.tolist()
+            point.velocities = joints_velocities.tolist()
+            point.time_from_start = rospy.Duration(self.__stream_period)
+            msg.points = [point]
+            self._joint_trajectory_publisher.publish(msg)
+
+            if ramp.is_stopped():
+                self.__stop_stream()
+
     def _publish_joint_trajectory(self, *_):
         if not self._enabled:
             return
@@ -212,21 +312,20 @@ class JogController:
         self._last_robot_state_published = self._new_robot_state
 
     # - Setters & Getters
-    @staticmethod
-    def can_be_enable():
+    def can_be_enable(self):
         """
         Check if Jog Controller can be enabled
-        Basically, it checks if commander is running
+        Basically, it checks if commander is running, from the last state published by the commander
 
         :return: Bool indicating if Controller can be enabled
         :rtype: bool
         """
+        if self.__commander_active is not None:
+            return not self.__commander_active
+        # Nothing published yet
         try:
-            rospy.wait_for_service('/niryo_robot_commander/is_active')
-            is_active_service = rospy.ServiceProxy('/niryo_robot_commander/is_active', GetBool)
-            response = is_active_service()
-            return not response.value
-        except rospy.ServiceException:
+            return not call_service('/niryo_robot_commander/is_active', GetBool, timeout=1).value
+        except (rospy.ServiceException, rospy.ROSException):
             return False
 
     def enable(self):
@@ -237,8 +336,11 @@ class JogController:
         :rtype: (GoalStatus, str)
         """
         if self.can_be_enable():
-            rospy.wait_for_message('/niryo_robot/robot_state', RobotState, timeout=2)
-            rospy.wait_for_message('/joint_states', JointState, timeout=2)
+            # Only blocks before the first messages
+            if self._robot_state is None:
+                self._robot_state = rospy.wait_for_message('/niryo_robot/robot_state', RobotState, timeout=2)
+            if self._joint_states is None:
+                self._joint_states = rospy.wait_for_message('/joint_states', JointState, timeout=2).position[:6]
             self._enabled = True
             self._reset_last_pub()
             self._last_command_timer = rospy.get_time()
@@ -260,14 +362,18 @@ class JogController:
         :return: status, message
         :rtype: (GoalStatus, str)
         """
+        with self.__stream_lock:
+            self.__stop_stream()
         self._enabled = False
         self._shift_mode = None
         self._target_values = None
         # Shutdown timer (Only launched when jog enabled)
-        self._publisher_joint_trajectory_timer.shutdown()
-        self._publisher_joint_trajectory_timer = None
-        self._check_disable_jog_timer.shutdown()
-        self._check_disable_jog_timer = None
+        if self._publisher_joint_trajectory_timer is not None:
+            self._publisher_joint_trajectory_timer.shutdown()
+            self._publisher_joint_trajectory_timer = None
+        if self._check_disable_jog_timer is not None:
+            self._check_disable_jog_timer.shutdown()
+            self._check_disable_jog_timer = None
 
         msg_str = "Jog Controller - Disabled"
         rospy.loginfo(msg_str)
@@ -283,6 +389,60 @@ class JogController:
         return self._enabled
 
     # - Useful Functions
+    def __prepare_jog(self):
+        """
+        Check that the robot can be jogged, turn off the learning mode and enable the jog controller if needed
+        Checks are done on the states received from topics, services are only called to change the state
+
+        :return: status, message
+        :rtype: (int, str)
+        """
+        if not self.__is_calibrated():
+            return CommandStatus.ABORTED, "Cannot send command cause Jog because calibration is not done"
+        if self.__learning_mode_on:
+            try:
+                result = call_service('/niryo_robot/learning_mode/activate', SetBool, True, timeout=2)
+                if result.status != CommandStatus.SUCCESS:
+                    return CommandStatus.ABORTED, "Cannot send command cause Jog because learning mode is on and" \
+                                                  " cannot be disabled"
+                # Do not wait for the topic to know the learning mode is off
+                self.__learning_mode_on = False
+                rospy.sleep(0.1)
+            except (rospy.ROSException, rospy.ServiceException):
+                return CommandStatus.ABORTED, "Error while trying to turn Off learning mode"
+
+        if not self._enabled:
+            ret, str_msg = self.enable()
+            if ret == CommandStatus.ABORTED:
+                return CommandStatus.ABORTED, "Cannot send command cause Jog is not activated and cannot be"
+        return CommandStatus.SUCCESS, "Jog ready"
+
+    def __is_calibrated(self):
+        if self.__hardware_status is None:
+            return False
+        return not (self.__hardware_status.calibration_needed or self.__hardware_status.calibration_in_progress)
+
+    def __start_stream(self):
+        with self.__stream_lock:
+            # Pending shift command is dropped, the stream starts from the measured joints
+            self._target_values = None
+            self._shift_mode = None
+            self.__stream_joints = np.array(self._joint_states, dtype=float)
+            self.__stream_mode = None
+            for ramp in self.__stream_ramps.values():
+                ramp.reset()
+            self.__stream_timer = rospy.Timer(rospy.Duration(self.__stream_period), self.__publish_stream_step)
+
+    def __stop_stream(self):
+        # Must be called with the stream lock
+        if self.__stream_timer is None:
+            return
+        self.__stream_timer.shutdown()
+        self.__stream_timer = None
+        # Next shift commands start from where the stream stopped
+        self._last_target_values = self.__stream_joints.tolist()
+        self._last_robot_state_published = self._robot_state
+
     def _check_for_disable(self, *_):
         if not self.is_enabled():
             return
@@ -306,9 +466,32 @@ class JogController:
 
         self.__validate_params_pose(self._new_robot_state)
 
+        if self.__kinematics is not None:
+            success, joints = self.__get_new_joints_w_differential_ik(self._new_robot_state)
+            if success:
+                return True, joints
+            rospy.logdebug("Jog Controller - Differential IK didn't converge, fallback on IK service")
+
         response = self._service_ik(self._new_robot_state)
         return response.success, response.joints
 
+    def __get_new_joints_w_differential_ik(self, robot_state):
+        """
+        Solve the pose from the last joints sent : the shift is small so a few Jacobian steps are enough
+        :type robot_state: RobotState
+        :return: success, joints
+        :rtype: (bool, list[float])
+        """
+        rpy = robot_state.rpy
+        target = homogeneous_matrix(matrix_from_rpy(rpy.roll, rpy.pitch, rpy.yaw),
+                                    [robot_state.position.x, robot_state.position.y, robot_state.position.z])
+        try:
+            return self.__kinematics.differential_inverse_kinematics(target, self._last_target_values,
+                                                                     self.__differential_ik_max_iterations)
+        except KinematicsException as e:
+            rospy.logwarn("Jog Controller - Differential IK failed : " + str(e))
+            return False, []
+
     def __validate_params_pose(self, new_robot_state):
         self.__parameters_validator.validate_position(new_robot_state.position)
         self.__parameters_validator.validate_orientation(new_robot_state.rpy)
@@ -6,6 +6,8 @@ import actionlib
 import threading
 
 import sys
+import time
+from collections import deque
 
 # Commanders
 from arm_commander import ArmCommander
@@ -17,32 +19,40 @@ from motor_debug import MotorDebug
 
 from jog_controller import JogController
 from niryo_robot_commander.command_enums import *
+from niryo_robot_commander.tool_triggers import ToolTriggerScheduler
 
 # Command Status
 from niryo_robot_msgs.msg import CommandStatus
+from niryo_robot_msgs.service_proxy_pool import call_service
 
 # For State Publisher
 import tf
 from tf import LookupException, ConnectivityException, ExtrapolationException
 from tf.transformations import quaternion_from_euler
 from math import pi
+from niryo_robot_commander.kinematics import NedKinematics, KinematicsException
+from niryo_robot_commander.kinematics import rpy_from_matrix, quaternion_from_matrix
 
 # Messages
 from actionlib_msgs.msg import GoalStatus
 from std_msgs.msg import Bool
 from geometry_msgs.msg import Quaternion
-from niryo_robot_commander.msg import RobotCommand
+from sensor_msgs.msg import JointState
+from niryo_robot_commander.msg import RobotCommand, ToolTrigger
 from niryo_robot_msgs.msg import RobotState, HardwareStatus
 
 # Services
 from niryo_robot_msgs.srv import Trigger
 from niryo_robot_msgs.srv import SetBool
 from niryo_robot_msgs.srv import GetBool
+from niryo_robot_poses_handlers.srv import GetWorkspaceRatio, GetTargetPoses, GetTargetPosesRequest
+from niryo_robot_vision.srv import ObjDetection
 
 # Action msgs
 from niryo_robot_commander.msg import PausePlanExecution
 from niryo_robot_commander.msg import RobotMoveAction
 from niryo_robot_commander.msg import RobotMoveResult
+from niryo_robot_commander.msg import RobotMoveFeedback
 
 
 class RobotCommanderNode:
@@ -125,7 +135,39 @@ class RobotCommanderNode:
                                                       auto_start=False)
         self.__action_server_thread = threading.Thread()
         self.__action_server_lock = threading.Lock()
-        self.__command_still_active_max_tries = rospy.get_param("~command_still_active_max_tries")
+        self.__current_goal_plan = None
+        # Commands of the current goal, VISION_PICK commands are replaced by their moves once the object is detected
+        self.__current_goal_cmds = []
+        # Index of the command executed in the goal commands sequence
+        self.__current_goal_step = 0
+        # Object found by the VISION_PICK command of the current goal : (found, shape, color)
+        self.__current_goal_object = None
+
+        # Goal admission : a goal is accepted as soon as the worker of the previous one notifies its end
+        self.__goal_admission_state = GoalAdmissionState.IDLE
+        self.__goal_admission_condition = threading.Condition()
+        self.__goal_admission_timeout = rospy.get_param("~goal_admission_timeout")
+        # Learning mode deactivation, done while the goal is planned
+        self.__learning_mode_deactivation = None
+        self.__arm_commander.set_execution_gate(self.__wait_learning_mode_deactivation)
+
+        # Queued mode : goals received while a goal is executed wait in a queue,
+        # the first one is planned from the end of the trajectory being executed
+        self.__queue_goals = rospy.get_param("~queue_goals")
+        self.__goals_queue_size = rospy.get_param("~goals_queue_size")
+        self.__goals_queue = deque()
+        self.__goals_queue_lock = threading.Lock()
+        self.__goals_worker_running = False
+        self.__plan_ahead_lock = threading.Lock()
+        self.__plan_ahead_thread = threading.Thread()
+        self.__plan_ahead_request = None
+        self.__plan_ahead_result = None
+        self.__arm_commander.set_plan_execution_callback(self.__callback_plan_execution)
+
+        # Tool commands of MOVE_AND_TOOL goals, sent while the arm moves
+        self.__tool_trigger_scheduler = None
+        self.__tool_trigger_waypoint_tolerance = rospy.get_param("~tool_triggers/waypoint_tolerance")
+        self.__tool_timeout = rospy.get_param("~tool_timeout")
 
         # Starting Action server
         self.__start_action_server()
@@ -138,10 +180,10 @@ class RobotCommanderNode:
         rospy.Timer(rospy.Duration(rospy.get_param("~active_publish_rate_sec")), self.__publish_is_active)
 
         # Jog
-        self.__jog_controller = JogController(arm_param_validator)
+        self.__jog_controller = JogController(arm_param_validator, self.__arm_commander.get_kinematics())
 
         # Publish robot state (position, orientation, tool)
-        self.__state_publisher = StatePublisher()
+        self.__state_publisher = StatePublisher(arm_param_validator)
 
         # Set a bool to mentioned this node is initialized
         rospy.set_param('~initialized', True)
@@ -202,83 +244,316 @@ class RobotCommanderNode:
         """
         rospy.loginfo("Commander Action Serv - Received goal. Check if can be executed")
 
-        # Check if hw status has been received at least once
-        if self.__hardware_status is None:
-            result = self.create_result(CommandStatus.HARDWARE_NOT_OK,
-                                        "Hardware Status still not received, please restart the robot")
-            goal_handle.set_rejected(result)
-            return
-
-        # Check if motor connection problem
-        if not self.__hardware_status.connection_up:
-            result = self.create_result(CommandStatus.HARDWARE_NOT_OK,
-                                        "Motor connection problem, you can't send a command now")
-            goal_handle.set_rejected(result)
-            return
-
-        # Check if calibration is needed
-        if self.__hardware_status.calibration_needed:
-            result = self.create_result(CommandStatus.CALIBRATION_NOT_DONE,
-                                        "You need to calibrate the robot before sending a command")
+        result = self.__get_robot_not_ready_result()
+        if result is not None:
             goal_handle.set_rejected(result)
             return
 
-        # Check if calibration is in progress
-        if self.__hardware_status.calibration_in_progress:
-            result = self.create_result(CommandStatus.CALIBRATION_NOT_DONE,
-                                        "Calibration in progress, wait until it ends to send a command")
-            goal_handle.set_rejected(result)
+        # In queued mode, goals received while another one is executed wait for their turn
+        if self.__queue_goals and self.__queue_goal_if_busy(goal_handle):
             return
 
-        # Check if jog controller enabled
-        if self.__jog_controller.is_enabled():
-            result = self.create_result(CommandStatus.JOG_CONTROLLER_ENABLED,
-                                        "You need to deactivate jog controller to execute a new command")
-            goal_handle.set_rejected(result)
-            return
-
-        # check if still have a goal
-        if self.__current_goal_is_active():
-            # If still have a goal, wait a bit to be sure it's not goal is still active
-            # due to concurrency issue
-            for i in range(self.__command_still_active_max_tries):
-                rospy.logwarn("Commander Action Serv - Current goal seems to be still active, "
-                              "will retry {} time(s)".format(self.__command_still_active_max_tries - i))
-                rospy.sleep(0.2)
-                if not self.__current_goal_is_active():
+        with self.__goal_admission_condition:
+            # The previous goal may be terminated while its worker is finishing : wait for its notification
+            deadline = time.time() + self.__goal_admission_timeout
+            while self.__goal_admission_state != GoalAdmissionState.IDLE:
+                remaining = deadline - time.time()
+                if remaining <= 0:
                     break
-            else:
+                self.__goal_admission_condition.wait(remaining)
+            if self.__goal_admission_state != GoalAdmissionState.IDLE:
                 result = self.create_result(CommandStatus.GOAL_STILL_ACTIVE,
                                             "Current command is still active")
                 goal_handle.set_rejected(result)
                 return
+            self.__goal_admission_state = GoalAdmissionState.EXECUTING
 
-        # Check if learning mode ON
-        if self.__learning_mode_on and self.goal_to_cmd_type(goal_handle) != RobotCommand.TOOL_ONLY:
-            if not self.__set_learning_mode(False):
-                result = self.create_result(CommandStatus.LEARNING_MODE_ON,
-                                            "Learning mode could not be deactivated")
-                goal_handle.set_rejected(result)
-                return
         # set accepted
-        self.__current_goal_handle = goal_handle
+        self.__set_current_goal(goal_handle)
+        self.__current_goal_plan = None
         self.__current_goal_handle.set_accepted()
         rospy.loginfo("Commander Action Serv - Goal has been accepted")
 
         # Launch compute + execution in a new thread
-        self.__action_server_thread = threading.Thread(target=self.__execute_goal_action,
+        if self.__queue_goals:
+            self.__goals_worker_running = True
+            target = self.__execute_goal_action_and_queue
+        else:
+            target = self.__execute_goal_action
+        self.__action_server_thread = threading.Thread(target=self.__run_goal_worker, args=(target,),
                                                        name="worker_execute_goal_action")
         self.__action_server_thread.start()
         rospy.logdebug("Commander Action Serv - Executing command in a new thread")
 
+    def __get_robot_not_ready_result(self):
+        """
+        Check that the robot can execute a goal now
+        :return: result to reject the goal with, None if the goal can be executed
+        :rtype: RobotMoveResult
+        """
+        # Check if hw status has been received at least once
+        if self.__hardware_status is None:
+            return self.create_result(CommandStatus.HARDWARE_NOT_OK,
+                                      "Hardware Status still not received, please restart the robot")
+
+        # Check if motor connection problem
+        if not self.__hardware_status.connection_up:
+            return self.create_result(CommandStatus.HARDWARE_NOT_OK,
+                                      "Motor connection problem, you can't send a command now")
+
+        # Check if calibration is needed
+        if self.__hardware_status.calibration_needed:
+            return self.create_result(CommandStatus.CALIBRATION_NOT_DONE,
+                                      "You need to calibrate the robot before sending a command")
+
+        # Check if calibration is in progress
+        if self.__hardware_status.calibration_in_progress:
+            return self.create_result(CommandStatus.CALIBRATION_NOT_DONE,
+                                      "Calibration in progress, wait until it ends to send a command")
+
+        # Check if jog controller enabled
+        if self.__jog_controller.is_enabled():
+            return self.create_result(CommandStatus.JOG_CONTROLLER_ENABLED,
+                                      "You need to deactivate jog controller to execute a new command")
+        return None
+
+    def __run_goal_worker(self, target):
+        try:
+            target()
+        finally:
+            with self.__goal_admission_condition:
+                self.__goal_admission_state = GoalAdmissionState.IDLE
+                self.__goal_admission_condition.notify_all()
+
+    # - Learning mode
+    def __start_learning_mode_deactivation(self):
+        done_event = threading.Event()
+        success = [False]
+
+        def deactivate():
+            try:
+                success[0] = self.__set_learning_mode(False)
+            finally:
+                done_event.set()
+
+        self.__learning_mode_deactivation = (done_event, success)
+        threading.Thread(target=deactivate, name="worker_learning_mode_deactivation").start()
+
+    def __wait_learning_mode_deactivation(self):
+        """
+        Called by the arm commander before sending a trajectory
+        :raises ArmCommanderException: if the learning mode could not be deactivated
+        :return: None
+        """
+        deactivation = self.__learning_mode_deactivation
+        if deactivation is None:
+            return
+        done_event, success = deactivation
+        done_event.wait()
+        self.__learning_mode_deactivation = None
+        if not success[0]:
+            raise ArmCommanderException(CommandStatus.LEARNING_MODE_ON, "Learning mode could not be deactivated")
+
     def __callback_cancel(self, goal_handle):
         rospy.loginfo("Commander Action Serv - Received cancel command")
 
         if goal_handle == self.__current_goal_handle:
             self.__cancel_current_command()
+            return
+
+        with self.__goals_queue_lock:
+            queued = goal_handle in self.__goals_queue
+            if queued:
+                self.__goals_queue.remove(goal_handle)
+        if queued:
+            goal_handle.set_canceled(self.create_result(CommandStatus.CANCELLED, "Goal removed from the queue"))
+            rospy.loginfo("Commander Action Serv - Queued goal has been canceled")
         else:
             rospy.logdebug("Commander Action Serv - No current goal, nothing to do")
 
+    # - Queued mode
+    def __queue_goal_if_busy(self, goal_handle):
+        """
+        Put the goal in the queue if goals are being executed
+        :param goal_handle: goal received
+        :return: True if the goal has been queued or rejected, False if it can be executed now
+        :rtype: bool
+        """
+        with self.__goals_queue_lock:
+            if not self.__goals_worker_running:
+                return False
+            if len(self.__goals_queue) >= self.__goals_queue_size:
+                queue_full = True
+            else:
+                queue_full = False
+                self.__goals_queue.append(goal_handle)
+                is_next_goal = len(self.__goals_queue) == 1
+
+        if queue_full:
+            goal_handle.set_rejected(self.create_result(CommandStatus.GOAL_STILL_ACTIVE, "Goals queue is full"))
+            return True
+
+        rospy.loginfo("Commander Action Serv - Goal has been queued")
+        # If the current trajectory is already executed, plan from its end now
+        end_joints = self.__arm_commander.get_executing_plan_end_joints()
+        if is_next_goal and end_joints is not None:
+            self.__plan_ahead_goal_step(goal_handle, 0, end_joints)
+        return True
+
+    def __execute_goal_action_and_queue(self):
+        """
+        Threaded function which executes the accepted goal, then the queued goals back-to-back
+        :return: None
+        """
+        self.__execute_goal_action()
+        while self.__start_next_queued_goal():
+            self.__execute_goal_action()
+
+    def __start_next_queued_goal(self):
+        """
+        Accept the next goal of the queue and set it as current goal, if the robot can still execute goals
+        Queued goals expect to start where the previous one ends, so they are all rejected if it did not succeed
+        :return: True if a goal has to be executed
+        :rtype: bool
+        """
+        with self.__goals_queue_lock:
+            if not self.__goals_queue:
+                self.__goals_worker_running = False
+                return False
+            if self.__current_goal_handle.get_goal_status().status != GoalStatus.SUCCEEDED:
+                result = self.create_result(CommandStatus.ABORTED, "Previous command did not succeed")
+            else:
+                result = self.__get_robot_not_ready_result()
+            if result is not None:
+                rejected_goals = list(self.__goals_queue)
+                self.__goals_queue.clear()
+                self.__goals_worker_running = False
+            else:
+                goal_handle = self.__goals_queue.popleft()
+
+        if result is not None:
+            for rejected_goal in rejected_goals:
+                rejected_goal.set_rejected(result)
+            rospy.logwarn("Commander Action Serv - {} queued goal(s) rejected : {}".format(len(rejected_goals),
+                                                                                         result.message))
+            return False
+
+        self.__current_goal_plan = self.__take_plan_ahead((goal_handle.get_goal_id().id, 0))
+        self.__set_current_goal(goal_handle)
+        self.__current_goal_handle.set_accepted()
+        rospy.loginfo("Commander Action Serv - Queued goal has been accepted")
+        return True
+
+    def __set_current_goal(self, goal_handle):
+        # Learning mode is deactivated while the command is planned, the arm commander waits for it before moving
+        if self.__learning_mode_on and self.goal_moves_arm(goal_handle):
+            self.__start_learning_mode_deactivation()
+        else:
+            self.__learning_mode_deactivation = None
+
+        goal = goal_handle.get_goal()
+        self.__current_goal_handle = goal_handle
+        self.__current_goal_cmds = list(goal.cmds) or [goal.cmd]
+        self.__current_goal_step = 0
+        self.__current_goal_object = None
+
+    def __callback_plan_execution(self, plan, start_time, is_last):
+        """
+        Called by the arm commander when a trajectory starts to be executed
+        Schedule the tool commands of the current goal during this trajectory,
+        and, if it is the last trajectory of the command, plan the next command of the goal,
+        or of the next queued goal, from the end of this trajectory
+        :param plan: trajectory sent
+        :type plan: RobotTrajectory
+        :param start_time: time at which the trajectory is sent
+        :type start_time: float
+        :param is_last: False if the command sends other trajectories after this one
+        :type is_last: bool
+        :return: None
+        """
+        scheduler = self.__tool_trigger_scheduler
+        if scheduler is not None:
+            tip_positions = self.__arm_commander.get_plan_positions(plan) if scheduler.has_pending_waypoints() \
+                else None
+            scheduler.on_trajectory_start(start_time, [point.time_from_start.to_sec() for point in
+                                                       plan.joint_trajectory.points], tip_positions)
+        if not is_last:
+            return
+
+        end_joints = list(plan.joint_trajectory.points[-1].positions)
+        goal_handle = self.__current_goal_handle
+        cmds = self.__current_goal_cmds
+        step = self.__current_goal_step + 1
+        if goal_handle.goal and step < len(cmds):
+            self.__plan_ahead((goal_handle.get_goal_id().id, step), cmds[step], end_joints)
+            return
+        if not self.__queue_goals:
+            return
+        with self.__goals_queue_lock:
+            if not self.__goals_queue:
+                return
+            goal_handle = self.__goals_queue[0]
+        self.__plan_ahead_goal_step(goal_handle, 0, end_joints)
+
+    def __plan_ahead_goal_step(self, goal_handle, step, start_joints):
+        goal = goal_handle.get_goal()
+        cmd = goal.cmds[step] if goal.cmds else goal.cmd
+        self.__plan_ahead((goal_handle.get_goal_id().id, step), cmd, start_joints)
+
+    def __plan_ahead(self, plan_id, cmd, start_joints):
+        """
+        Plan a command from start_joints in a worker
+        :param plan_id: goal id and step of the command, used to take the plan
+        :type plan_id: (str, int)
+        :param cmd: RobotCommand
+        :param start_joints: joints the plan starts from
+        :type start_joints: list[float]
+        :return: None
+        """
+        if cmd.cmd_type not in (RobotCommand.MOVE_ONLY, RobotCommand.MOVE_AND_TOOL) or \
+                not ArmCommander.can_plan_ahead(cmd.arm_cmd):
+            return
+        request = (plan_id, list(start_joints))
+        with self.__plan_ahead_lock:
+            if request == self.__plan_ahead_request:
+                return
+            self.__plan_ahead_request = request
+            self.__plan_ahead_thread = threading.Thread(target=self.__compute_plan_ahead,
+                                                        args=(request, cmd.arm_cmd), name="worker_plan_ahead")
+            self.__plan_ahead_thread.start()
+
+    def __compute_plan_ahead(self, request, arm_cmd):
+        rospy.logdebug("Commander Action Serv - Planning next goal from the end of the current trajectory")
+        try:
+            plan = self.__arm_commander.compute_plan_from_state(arm_cmd, request[1])
+        except ArmCommanderException as e:
+            rospy.logwarn("Commander Action Serv - Cannot plan next goal in advance : {}".format(e.message))
+            plan = None
+        with self.__plan_ahead_lock:
+            # A newer request may have been made meanwhile
+            if request == self.__plan_ahead_request:
+                self.__plan_ahead_result = (request[0], plan)
+
+    def __take_plan_ahead(self, plan_id):
+        """
+        Wait for the planning in advance of a command to finish and get its plan
+        :param plan_id: goal id and step of the command
+        :type plan_id: (str, int)
+        :return: the plan computed in advance, None if there is none
+        :rtype: RobotTrajectory
+        """
+        with self.__plan_ahead_lock:
+            thread = self.__plan_ahead_thread
+        if thread.is_alive():
+            thread.join()
+        with self.__plan_ahead_lock:
+            result = self.__plan_ahead_result
+            self.__plan_ahead_result = None
+            self.__plan_ahead_request = None
+        if result is None or result[0] != plan_id:
+            return None
+        return result[1]
+
     # -- EXECUTORS
     def __reset_pause_play_state(self):
         self.__pause_finished_event.set()
@@ -313,9 +588,14 @@ class RobotCommanderNode:
         if self.__cancel_due_to_pause():
             self.__reset_pause_play_state()
             return
+        telemetry = self.__arm_commander.get_telemetry()
+        telemetry.begin(self.__current_goal_handle.get_goal_id().id, rospy.get_time())
         try:
-            cmd = self.__current_goal_handle.goal.goal.cmd
-            (status, message) = self.__interpret_and_execute_command(cmd)
+            goal = self.__current_goal_handle.get_goal()
+            if goal.cmds or goal.cmd.cmd_type == RobotCommand.VISION_PICK:
+                (status, message) = self.__execute_command_sequence(self.__current_goal_handle)
+            else:
+                (status, message) = self.__interpret_and_execute_command(goal.cmd)
             response = self.create_result(status, message)
             result = response
         except (RobotCommanderException, ArmCommanderException, ToolCommanderException) as e:
@@ -323,6 +603,8 @@ class RobotCommanderNode:
             response = None
             rospy.loginfo("Commander Action Serv - An exception was "
                           "thrown during command execution : {}".format(e.message))
+        if self.__current_goal_object is not None:
+            result.obj_found, result.obj_shape, result.obj_color = self.__current_goal_object
 
         # Check if plan is paused and should be restarted
         if self.__pause_state == PausePlanExecution.PAUSE:
@@ -354,8 +636,123 @@ class RobotCommanderNode:
             self.__current_goal_handle.set_aborted(result)
             rospy.logwarn("Commander Action Serv - Unknown result, goal has been set as aborted")
 
+        telemetry.end(result.status, rospy.get_time())
         self.__pause_finished_event.set()
 
+    def __execute_command_sequence(self, goal_handle):
+        """
+        Execute the commands of a goal one after the other, the result of each one is published as feedback
+        The next move is planned while the current one is executed. A paused goal resumes at its current command
+        A VISION_PICK command is replaced by the commands picking the detected object, or ends the sequence
+        if no object is found
+        :param goal_handle: goal with cmds
+        :return: status, message
+        """
+        goal_id = goal_handle.get_goal_id().id
+        cmds = self.__current_goal_cmds
+        step = self.__current_goal_step
+        while step < len(cmds):
+            if goal_handle.get_goal_status().status == GoalStatus.PREEMPTING:
+                return CommandStatus.STOPPED, "Command has been successfully stopped"
+            if step != self.__current_goal_step:
+                self.__current_goal_step = step
+                self.__current_goal_plan = self.__take_plan_ahead((goal_id, step))
+            try:
+                if cmds[step].cmd_type == RobotCommand.VISION_PICK and \
+                        not self.__expand_vision_pick_command(cmds, step):
+                    message = "No object found, {} next command(s) skipped".format(len(cmds) - step - 1)
+                    self.__publish_step_feedback(goal_handle, step, CommandStatus.SUCCESS, message)
+                    return CommandStatus.SUCCESS, "Command {} : {}".format(step + 1, message)
+                status, message = self.__interpret_and_execute_command(cmds[step])
+            except (RobotCommanderException, ArmCommanderException, ToolCommanderException) as e:
+                self.__publish_step_feedback(goal_handle, step, e.status, e.message)
+                raise RobotCommanderException(e.status, "Command {} : {}".format(step + 1, e.message))
+            self.__publish_step_feedback(goal_handle, step, status, message)
+            if status != CommandStatus.SUCCESS:
+                return status, "Command {} : {}".format(step + 1, message)
+            step += 1
+        return CommandStatus.SUCCESS, "{} commands have been successfully processed".format(len(cmds))
+
+    def __expand_vision_pick_command(self, cmds, step):
+        """
+        Detect the object of the VISION_PICK command cmds[step] and replace this command by the moves picking it :
+        approach while the tool releases, go down, grasp once the arm is down and go back to the approach pose
+        The target poses are computed in a single call
+        :param cmds: commands of the goal, modified in place
+        :type cmds: list[RobotCommand]
+        :param step: index of the VISION_PICK command
+        :type step: int
+        :return: False if no object was found
+        :rtype: bool
+        """
+        vision_pick_cmd = cmds[step].vision_pick_cmd
+        try:
+            ratio_response = call_service('/niryo_robot_poses_handlers/get_workspace_ratio', GetWorkspaceRatio,
+                                          vision_pick_cmd.workspace, timeout=1)
+            if ratio_response.status != CommandStatus.SUCCESS:
+                raise RobotCommanderException(ratio_response.status, ratio_response.message)
+            detection = call_service('/niryo_robot_vision/obj_detection_rel', ObjDetection,
+                                     vision_pick_cmd.shape, vision_pick_cmd.color, ratio_response.ratio, False,
+                                     timeout=1)
+            self.__arm_commander.get_telemetry().mark("object_detected", rospy.get_time())
+            if detection.status in (CommandStatus.OBJECT_NOT_FOUND, CommandStatus.MARKERS_NOT_FOUND,
+                                    CommandStatus.VIDEO_STREAM_NOT_RUNNING):
+                rospy.loginfo("Commander Action Serv - Vision pick : no object found (status {})".format(
+                    detection.status))
+                self.__current_goal_object = (False, "", "")
+                return False
+            if detection.status != CommandStatus.SUCCESS:
+                raise RobotCommanderException(detection.status, "Object detection failed")
+
+            obj_pose = detection.obj_pose
+            poses_response = call_service('/niryo_robot_poses_handlers/get_target_poses', GetTargetPoses,
+                                          vision_pick_cmd.workspace, GetTargetPosesRequest.GRIP_AUTO,
+                                          vision_pick_cmd.tool_id,
+                                          [vision_pick_cmd.height_offset + vision_pick_cmd.approach_height,
+                                           vision_pick_cmd.height_offset],
+                                          obj_pose.x, obj_pose.y, obj_pose.yaw, timeout=1)
+        except (rospy.ServiceException, rospy.ROSException) as e:
+            raise RobotCommanderException(CommandStatus.FAILURE, "Vision pick service call failed : {}".format(e))
+        if poses_response.status != CommandStatus.SUCCESS:
+            raise RobotCommanderException(poses_response.status, poses_response.message)
+        self.__current_goal_object = (True, detection.obj_type, detection.obj_color)
+
+        approach_pose, pick_pose = poses_response.target_poses
+        approach_cmd = self.__get_move_pose_command(approach_pose)
+        if vision_pick_cmd.release_cmd.cmd_type != 0:
+            approach_cmd = self.__add_tool_trigger(approach_cmd, ToolTrigger.AT_TIME, vision_pick_cmd.release_cmd)
+        pick_cmd = self.__get_move_pose_command(pick_pose)
+        if vision_pick_cmd.grasp_cmd.cmd_type != 0:
+            pick_cmd = self.__add_tool_trigger(pick_cmd, ToolTrigger.AFTER_MOTION, vision_pick_cmd.grasp_cmd)
+        cmds[step:step + 1] = [approach_cmd, pick_cmd, self.__get_move_pose_command(approach_pose)]
+        return True
+
+    @staticmethod
+    def __get_move_pose_command(robot_state):
+        cmd = RobotCommand()
+        cmd.cmd_type = RobotCommand.MOVE_ONLY
+        cmd.arm_cmd.cmd_type = MoveCommandType.POSE
+        cmd.arm_cmd.position = robot_state.position
+        cmd.arm_cmd.rpy = robot_state.rpy
+        return cmd
+
+    @staticmethod
+    def __add_tool_trigger(cmd, trigger_type, tool_cmd):
+        trigger = ToolTrigger()
+        trigger.trigger_type = trigger_type
+        trigger.tool_cmd = tool_cmd
+        cmd.cmd_type = RobotCommand.MOVE_AND_TOOL
+        cmd.tool_triggers.append(trigger)
+        return cmd
+
+    @staticmethod
+    def __publish_step_feedback(goal_handle, step, status, message):
+        feedback = RobotMoveFeedback()
+        feedback.step = step
+        feedback.status = status
+        feedback.message = message
+        goal_handle.publish_feedback(feedback)
+
     def __interpret_and_execute_command(self, cmd):
         """
         Take a Robot command, give it to Arm or Tools commander, and return the result
@@ -365,27 +762,132 @@ class RobotCommanderNode:
         cmd_type = cmd.cmd_type
 
         if cmd_type == RobotCommand.MOVE_ONLY:
-            arm_cmd = cmd.arm_cmd
-            arm_cmd_type = arm_cmd.cmd_type
-            # noinspection PyArgumentList
-            return self.dict_interpreter_move_cmd[arm_cmd_type](arm_cmd)
+            return self.__execute_arm_command(cmd.arm_cmd)
 
         elif cmd_type == RobotCommand.TOOL_ONLY:
             return self.__tool_commander.send_tool_command(cmd.tool_cmd)
 
+        elif cmd_type == RobotCommand.MOVE_AND_TOOL:
+            return self.__execute_arm_and_tool_command(cmd)
+
         else:
             return CommandStatus.UNKNOWN_COMMAND, "Commander Action Serv - Unknown command"
 
+    def __execute_arm_command(self, arm_cmd):
+        # Plan computed while the previous goal was executed
+        plan, self.__current_goal_plan = self.__current_goal_plan, None
+        if plan is not None:
+            return self.__arm_commander.execute_planned_command(arm_cmd, plan)
+        # noinspection PyArgumentList
+        return self.dict_interpreter_move_cmd[arm_cmd.cmd_type](arm_cmd)
+
+    def __execute_arm_and_tool_command(self, cmd):
+        """
+        Execute the arm command while a worker sends the tool commands at their trigger
+        The tool commands triggered after the motion are sent only if the arm succeeded
+        :param cmd: RobotCommand with MOVE_AND_TOOL type
+        :return: status, message of the first failure, else of the arm command
+        """
+        scheduler = self.__create_tool_trigger_scheduler(cmd)
+        self.__tool_trigger_scheduler = scheduler
+        scheduler.start()
+        status, message = CommandStatus.ARM_COMMANDER_FAILURE, ""
+        # Each tool command is sent at most once, a hung tool command must not block the goal worker
+        join_timeout = self.__tool_timeout * max(1, len(cmd.tool_triggers))
+        try:
+            status, message = self.__execute_arm_command(cmd.arm_cmd)
+        finally:
+            self.__tool_trigger_scheduler = None
+            if status == CommandStatus.SUCCESS:
+                scheduler.on_motion_end()
+            else:
+                scheduler.stop()
+            tools_finished = scheduler.join(join_timeout)
+            if not tools_finished:
+                scheduler.stop()
+                self.__tool_commander.stop_tool_command()
+
+        if not tools_finished:
+            rospy.logwarn("Commander Action Serv - Tool commands not finished after {}s".format(join_timeout))
+            return CommandStatus.TOOL_FAILURE, "Tool commands not finished after {}s".format(join_timeout)
+        for tool_status, tool_message in scheduler.get_results():
+            if tool_status != CommandStatus.SUCCESS:
+                return tool_status, tool_message
+        return status, message
+
+    def __create_tool_trigger_scheduler(self, cmd):
+        scheduler = ToolTriggerScheduler(self.__send_triggered_tool_command, CommandStatus.SUCCESS,
+                                         self.__tool_trigger_waypoint_tolerance, rospy.get_time)
+        waypoints = self.__get_arm_command_waypoints(cmd.arm_cmd)
+        # Waypoints are searched on the trajectories in the order they are reached
+        waypoint_triggers = sorted([trigger for trigger in cmd.tool_triggers
+                                    if trigger.trigger_type == ToolTrigger.AT_WAYPOINT],
+                                   key=lambda trigger: trigger.waypoint_index)
+        for trigger in waypoint_triggers:
+            if not 0 <= trigger.waypoint_index < len(waypoints):
+                raise RobotCommanderException(CommandStatus.INVALID_PARAMETERS,
+                                              "Tool trigger waypoint index {} out of range".format(
+                                                  trigger.waypoint_index))
+            if waypoints[trigger.waypoint_index] is None:
+                scheduler.add_after_motion(trigger.tool_cmd)
+            else:
+                scheduler.add_at_waypoint(waypoints[trigger.waypoint_index], trigger.tool_cmd)
+
+        for trigger in cmd.tool_triggers:
+            if trigger.trigger_type == ToolTrigger.AT_TIME:
+                scheduler.add_at_time(trigger.time_from_start, trigger.tool_cmd)
+            elif trigger.trigger_type == ToolTrigger.AFTER_MOTION:
+                scheduler.add_after_motion(trigger.tool_cmd)
+            elif trigger.trigger_type != ToolTrigger.AT_WAYPOINT:
+                raise RobotCommanderException(CommandStatus.UNKNOWN_COMMAND,
+                                              "Unknown tool trigger type : {}".format(trigger.trigger_type))
+        return scheduler
+
+    def __get_arm_command_waypoints(self, arm_cmd):
+        """
+        :return: positions of the waypoints of an arm command. None for a waypoint only known once planned,
+                 which is reached at the end of the motion
+        :rtype: list[list[float]]
+        """
+        if arm_cmd.cmd_type == MoveCommandType.EXECUTE_TRAJ:
+            return [[pose.position.x, pose.position.y, pose.position.z] for pose in arm_cmd.list_poses]
+        elif arm_cmd.cmd_type in (MoveCommandType.POSE, MoveCommandType.POSITION, MoveCommandType.POSE_QUAT,
+                                  MoveCommandType.LINEAR_POSE):
+            return [[arm_cmd.position.x, arm_cmd.position.y, arm_cmd.position.z]]
+        elif arm_cmd.cmd_type == MoveCommandType.JOINTS:
+            position = self.__arm_commander.get_forward_kinematics(list(arm_cmd.joints)).position
+            return [[position.x, position.y, position.z]]
+        return [None]
+
+    def __send_triggered_tool_command(self, tool_cmd):
+        """
+        Send a tool command of a MOVE_AND_TOOL goal. The arm is stopped if the tool fails
+        :return: status, message
+        """
+        telemetry = self.__arm_commander.get_telemetry()
+        telemetry.mark("tool_sent", rospy.get_time())
+        try:
+            status, message = self.__tool_commander.send_tool_command(tool_cmd)
+        except ToolCommanderException as e:
+            status, message = e.status, e.message
+        telemetry.mark("tool_done", rospy.get_time())
+        if status != CommandStatus.SUCCESS:
+            rospy.logwarn("Commander Action Serv - Tool command failed during the motion, "
+                          "stopping the arm : {}".format(message))
+            self.__arm_commander.stop_current_plan()
+        return status, message
+
     def __cancel_command(self):
+        scheduler = self.__tool_trigger_scheduler
+        if scheduler is not None:
+            scheduler.stop()
         self.__arm_commander.stop_current_plan()  # Send a cancel signal to Moveit interface
         self.__tool_commander.stop_tool_command()
 
     @staticmethod
     def __set_learning_mode(set_bool):
         try:
-            rospy.wait_for_service('/niryo_robot/learning_mode/activate', timeout=1)
-            srv = rospy.ServiceProxy('/niryo_robot/learning_mode/activate', SetBool)
-            resp = srv(set_bool)
+            resp = call_service('/niryo_robot/learning_mode/activate', SetBool, set_bool, timeout=1)
             return resp.status == CommandStatus.SUCCESS
         except (rospy.ServiceException, rospy.ROSException):
             return False
@@ -413,31 +915,95 @@ class RobotCommanderNode:
     def goal_to_cmd_type(goal_handle):
         return goal_handle.goal.goal.cmd.cmd_type
 
+    @staticmethod
+    def goal_moves_arm(goal_handle):
+        goal = goal_handle.get_goal()
+        return any(cmd.cmd_type != RobotCommand.TOOL_ONLY for cmd in (goal.cmds or [goal.cmd]))
+
 
 # -- STATE PUBLISHER
 
 class StatePublisher:
     """
-    This object read Transformation Publisher and Publish the RobotState
-     in the Topic '/niryo_robot/robot_state' at a certain rate
+    This object publishes the RobotState in the Topic '/niryo_robot/robot_state' at a certain rate
+    Either computed with forward kinematics from the last joint states received,
+    or read from Transformation Publisher
     """
 
-    def __init__(self):
+    def __init__(self, parameters_validator):
 
         # Tf listener (position + rpy) of end effector tool
         self.__position = [0, 0, 0]
         self.__quaternion = [0, 0, 0, 0]
         self.__rpy = [0, 0, 0]
-        self.__tf_listener = tf.TransformListener()
+        self.__tf_listener = None
 
         # State publisher
         self.__robot_state_publisher = rospy.Publisher(
             '/niryo_robot/robot_state', RobotState, queue_size=5)
 
+        self.__kinematics = None
+        if rospy.get_param("~state_publisher/use_joint_states"):
+            try:
+                self.__kinematics = NedKinematics.from_urdf(parameters_validator.get_robot_urdf(),
+                                                            'base_link', 'tool_link')
+            except (KinematicsException, AttributeError) as e:
+                rospy.logwarn("State Publisher - Cannot load kinematics, TF will be used : " + str(e))
+
         # Get params from rosparams
         rate_publish_state = rospy.get_param("/niryo_robot/robot_state/rate_publish_state")
 
-        rospy.Timer(rospy.Duration(1.0 / rate_publish_state), self.__publish_state)
+        if self.__kinematics is not None:
+            # Same message is filled at each publication
+            self.__state_msg = RobotState()
+            self.__publish_period = 1.0 / rate_publish_state
+            self.__last_publish_time = None
+            # Index in the joint states of each joint of the kinematics, updated when the joint names change
+            self.__joint_states_names = None
+            self.__joint_states_indexes = None
+            rospy.Subscriber('/joint_states', JointState, self.__callback_joint_states, queue_size=1)
+        else:
+            self.__tf_listener = tf.TransformListener()
+
+            rospy.Timer(rospy.Duration(1.0 / rate_publish_state), self.__publish_state)
+
+    def __callback_joint_states(self, joint_states):
+        now = rospy.get_time()
+        if self.__last_publish_time is not None and now - self.__last_publish_time < self.__publish_period:
+            return
+        joints = self.__get_arm_joints(joint_states)
+        if joints is None:
+            return
+        try:
+            tip = self.__kinematics.forward_kinematics(joints)
+        except KinematicsException as e:
+            rospy.logwarn_throttle(1, "State Publisher - Failed to compute the end effector pose : " + str(e))
+            return
+        msg = self.__state_msg
+        msg.position.x, msg.position.y, msg.position.z = tip[:3, 3]
+        msg.rpy.roll, msg.rpy.pitch, msg.rpy.yaw = rpy_from_matrix(tip)
+        msg.orientation.x, msg.orientation.y, msg.orientation.z, msg.orientation.w = quaternion_from_matrix(tip)
+        self.__last_publish_time = now
+        try:
+            self.__robot_state_publisher.publish(msg)
+        except rospy.ROSException:
+            return
+
+    def __get_arm_joints(self, joint_states):
+        """
+        :return: positions of the kinematics joints in the joint states, None if some of them are missing
+        :rtype: list[float]
+        """
+        if joint_states.name != self.__joint_states_names:
+            self.__joint_states_names = list(joint_states.name)
+            try:
+                self.__joint_states_indexes = [self.__joint_states_names.index(name)
+                                               for name in self.__kinematics.get_joints_name()]
+            except ValueError:
+                self.__joint_states_indexes = None
+        if self.__joint_states_indexes is None or len(joint_states.position) < len(joint_states.name):
+            return None
+        return [joint_states.position[index] for index in self.__joint_states_indexes]
 
     def __update_ee_link_pose(self):
         try:
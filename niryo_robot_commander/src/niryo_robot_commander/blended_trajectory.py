@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from niryo_robot_commander.time_parameterization import time_optimal_parameterization
+
+
+def find_first_invalid_position(positions, is_valid):
+    """
+    Check every position of a sampled path : samples are at most one sampling step apart,
+    so thin obstacles cannot be crossed between two checked positions
+    :param positions: Nx(dof) joints positions
+    :type positions: numpy.array
+    :param is_valid: function telling if joints positions are valid, for instance not in collision
+    :return: index of the first invalid position, None if all the positions are valid
+    :rtype: int
+    """
+    for index, joints in enumerate(positions):
+        if not is_valid(joints):
+            return index
+    return None
+
+
+class BlendedJointPath(object):
+    """
+    Joint space path going through waypoints with straight segments
+    Corners are replaced by quadratic Bezier blends, so the robot goes through them without stopping
+    """
+
+    def __init__(self, waypoints, blend_distances):
+        """
+        :param waypoints: Nx(dof) joints waypoints, the first one is the start of the path
+        :type waypoints: numpy.array | list[list[float]]
+        :param blend_distances: for each waypoint, joint space distance from the waypoint where the blend begins.
+                                Values of the first and last waypoints are ignored
+        :type blend_distances: list[float]
+        """
+        waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+        if len(blend_distances) != len(waypoints):
+            raise ValueError("One blend distance is needed per waypoint")
+
+        # Consecutive duplicated waypoints do not create a corner
+        keep = np.concatenate(([True], np.linalg.norm(np.diff(waypoints, axis=0), axis=1) > 1e-9))
+        self.__waypoints = waypoints[keep]
+        blend_distances = np.asarray(blend_distances, dtype=float)[keep]
+
+        segments_length = np.linalg.norm(np.diff(self.__waypoints, axis=0), axis=1)
+        self.__blend_distances = np.zeros(len(self.__waypoints))
+        for i in range(1, len(self.__waypoints) - 1):
+            # A blend cannot use more than half of its adjacent segments
+            self.__blend_distances[i] = max(0.0, min(blend_distances[i], segments_length[i - 1] / 2.0,
+                                                     segments_length[i] / 2.0))
+
+    def get_waypoints(self):
+        return self.__waypoints
+
+    def sample(self, step):
+        """
+        Sample the path with points spaced by step at most
+        :param step: max joint space distance between two consecutive points
+        :type step: float
+        :return: Mx(dof) positions along the path
+        :rtype: numpy.array
+        """
+        sections = self.sample_sections(step)
+        return np.concatenate([sections[0]] + [section[1:] for section in sections[1:]])
+
+    def sample_sections(self, step):
+        """
+        Sample the path, split at the waypoints where the robot has to stop (waypoints without blend)
+        :param step: max joint space distance between two consecutive points
+        :type step: float
+        :return: list of Mx(dof) positions, each section starts with the last point of the previous one
+        :rtype: list[numpy.array]
+        """
+        waypoints = self.__waypoints
+        if len(waypoints) == 1:
+            return [waypoints.copy()]
+
+        sections = []
+        pieces = []
+        start = waypoints[0]
+        for i in range(1, len(waypoints)):
+            corner = waypoints[i]
+            blend = self.__blend_distances[i]
+            if blend > 0.0:
+                incoming = (corner - waypoints[i - 1]) / np.linalg.norm(corner - waypoints[i - 1])
+                outgoing = (waypoints[i + 1] - corner) / np.linalg.norm(waypoints[i + 1] - corner)
+                blend_start = corner - blend * incoming
+                blend_end = corner + blend * outgoing
+                pieces.append(self.__sample_line(start, blend_start, step))
+                pieces.append(self.__sample_bezier(blend_start, corner, blend_end, step))
+                start = blend_end
+            else:
+                pieces.append(self.__sample_line(start, corner, step))
+                pieces.append(corner[np.newaxis])
+                sections.append(np.concatenate(pieces))
+                pieces = []
+                start = corner
+        return sections
+
+    def compute_trajectory(self, step, max_velocities, max_accelerations):
+        """
+        Sample the path and time it with the joints limits
+        The robot only stops at the waypoints without blend
+        :return: positions, times, velocities, accelerations
+        :rtype: (numpy.array, numpy.array, numpy.array, numpy.array)
+        """
+        positions, times, velocities, accelerations = [], [], [], []
+        time_offset = 0.0
+        for index, section in enumerate(self.sample_sections(step)):
+            section_timing = time_optimal_parameterization(section, max_velocities, max_accelerations)
+            # Sections after the first one start with the end of the previous one
+            first = 0 if index == 0 else 1
+            for values, timing in zip((positions, times, velocities, accelerations), section_timing):
+                values.append(timing[first:])
+            times[-1] = times[-1] + time_offset
+            time_offset = times[-1][-1]
+        return tuple(np.concatenate(values) for values in (positions, times, velocities, accelerations))
+
+    @staticmethod
+    def __sample_line(p0, p1, step):
+        # End point excluded, it starts the next piece
+        nb_steps = max(1, int(np.ceil(np.linalg.norm(p1 - p0) / step)))
+        ratios = np.arange(nb_steps, dtype=float) / nb_steps
+        return p0 + ratios[:, np.newaxis] * (p1 - p0)
+
+    @staticmethod
+    def __sample_bezier(p0, p1, p2, step):
+        # Control polygon length bounds the curve length
+        length = np.linalg.norm(p1 - p0) + np.linalg.norm(p2 - p1)
+        nb_steps = max(2, int(np.ceil(length / step)))
+        t = (np.arange(nb_steps, dtype=float) / nb_steps)[:, np.newaxis]
+        return ((1 - t) ** 2) * p0 + 2 * (1 - t) * t * p1 + (t ** 2) * p2
@@ -32,6 +32,13 @@ class MovingStyle(object):
     LINEAR = 2
 
 
+class GoalAdmissionState(object):
+    # No goal executed, a new goal can be accepted
+    IDLE = 0
+    # A goal (or a queue of goals) is executed by the worker thread
+    EXECUTING = 1
+
+
 # - Exceptions
 
 class RobotCommanderException(Exception):
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+
+import os
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class JointStatesRingBuffer(object):
+    """
+    Preallocated buffer keeping the last joint states received
+    Recording a sample only writes in existing arrays, nothing is allocated in the joint states callback
+    """
+
+    def __init__(self, capacity, dof):
+        self.__times = np.zeros(capacity)
+        self.__positions = np.zeros((capacity, dof))
+        self.__capacity = capacity
+        self.__index = 0
+        self.__size = 0
+
+    def append(self, time, positions):
+        self.__times[self.__index] = time
+        self.__positions[self.__index] = positions
+        self.__index = (self.__index + 1) % self.__capacity
+        self.__size = min(self.__size + 1, self.__capacity)
+
+    def get_between(self, start_time, end_time):
+        """
+        :return: times and positions of the samples received between start_time and end_time, oldest first
+        :rtype: (numpy.array, numpy.array)
+        """
+        order = (np.arange(self.__size) + self.__index - self.__size) % self.__capacity
+        times = self.__times[order]
+        mask = (times >= start_time) & (times <= end_time)
+        return times[mask], self.__positions[order][mask]
+
+    def __len__(self):
+        return self.__size
+
+
+class CommandTelemetry(object):
+    """
+    Record where the time goes during each command
+    A command record contains the timestamps of its stages (validation, planning, sending, controller result...),
+    the trajectories sent to the controller and the joint states measured during the command
+    The last records can be dumped in npz files
+    """
+
+    def __init__(self, joints_name, buffer_size, history_size, enabled=True):
+        """
+        :param joints_name: name of the recorded joints
+        :type joints_name: list[str]
+        :param buffer_size: number of joint states kept in the ring buffer
+        :type buffer_size: int
+        :param history_size: number of finished commands kept
+        :type history_size: int
+        :param enabled: if False, nothing is recorded
+        :type enabled: bool
+        """
+        self.__joints_name = list(joints_name)
+        self.__enabled = enabled
+        self.__lock = threading.Lock()
+        self.__joint_states = JointStatesRingBuffer(buffer_size, len(joints_name)) if enabled else None
+        self.__history = deque(maxlen=history_size)
+        self.__current = None
+
+    def is_enabled(self):
+        return self.__enabled
+
+    def record_joint_states(self, time, positions):
+        if not self.__enabled:
+            return
+        with self.__lock:
+            self.__joint_states.append(time, positions)
+
+    def begin(self, command_id, time):
+        """
+        Start the record of a command. A command still recorded is finished without status
+        :param command_id: unique id of the command
+        :type command_id: str
+        :param time: start time of the command
+        :type time: float
+        :return: None
+        """
+        if not self.__enabled:
+            return
+        with self.__lock:
+            if self.__current is not None:
+                self.__finish(None, time)
+            self.__current = {'id': command_id, 'start': time, 'stages': [], 'planned': []}
+
+    def mark(self, stage, time):
+        """
+        Timestamp a stage of the current command. A stage can happen several times in a command
+        :param stage: name of the stage
+        :type stage: str
+        :param time: time at which the stage happened
+        :type time: float
+        :return: None
+        """
+        if not self.__enabled:
+            return
+        with self.__lock:
+            if self.__current is not None:
+                self.__current['stages'].append((stage, time))
+
+    def add_planned_trajectory(self, send_time, times, positions):
+        """
+        Record a trajectory sent to the controller during the current command
+        :param send_time: time at which the trajectory is sent
+        :type send_time: float
+        :param times: times from start of the trajectory points
+        :type times: list[float]
+        :param positions: positions of the trajectory points
+        :type positions: list[list[float]]
+        :return: None
+        """
+        if not self.__enabled:
+            return
+        with self.__lock:
+            if self.__current is not None:
+                self.__current['planned'].append((send_time + np.array(times, dtype=float),
+                                                  np.array(positions, dtype=float)))
+
+    def end(self, status, time):
+        """
+        Finish the record of the current command, the joint states measured during the command are copied
+        :param status: status of the command
+        :type status: int
+        :param time: end time of the command
+        :type time: float
+        :return: None
+        """
+        if not self.__enabled:
+            return
+        with self.__lock:
+            if self.__current is not None:
+                self.__finish(status, time)
+
+    def __finish(self, status, time):
+        record = self.__current
+        self.__current = None
+        record['status'] = status
+        record['end'] = time
+        record['actual'] = self.__joint_states.get_between(record['start'], time)
+        self.__history.append(record)
+
+    def get_commands_id(self):
+        with self.__lock:
+            return [record['id'] for record in self.__history]
+
+    def get_record(self, command_id=None):
+        """
+        :param command_id: id of a finished command. None for the last one
+        :type command_id: str
+        :return: the record as a dict of numpy arrays, times are relative to the start of the command.
+                 None if the command is not in the history
+        :rtype: dict
+        """
+        with self.__lock:
+            records = [record for record in self.__history if command_id is None or record['id'] == command_id]
+            if not records:
+                return None
+            record = records[-1]
+
+        start = record['start']
+        dof = len(self.__joints_name)
+        if record['planned']:
+            planned_times = np.concatenate([times for times, _ in record['planned']]) - start
+            planned_positions = np.concatenate([positions for _, positions in record['planned']])
+        else:
+            planned_times, planned_positions = np.zeros(0), np.zeros((0, dof))
+        actual_times, actual_positions = record['actual']
+        return {
+            'command_id': np.array(record['id']),
+            'status': np.array(-1 if record['status'] is None else record['status']),
+            'duration': np.array(record['end'] - start),
+            'joint_names': np.array(self.__joints_name),
+            'stage_names': np.array([stage for stage, _ in record['stages']]),
+            'stage_times': np.array([time - start for _, time in record['stages']]),
+            'planned_times': planned_times,
+            'planned_positions': planned_positions,
+            'actual_times': actual_times - start,
+            'actual_positions': actual_positions,
+        }
+
+    def dump(self, directory, command_id=None):
+        """
+        Write the record of a finished command in a compressed npz file
+        :param directory: directory of the file, created if it does not exist
+        :type directory: str
+        :param command_id: id of a finished command. None for the last one
+        :type command_id: str
+        :return: path of the file written, None if the command is not in the history
+        :rtype: str
+        """
+        record = self.get_record(command_id)
+        if record is None:
+            return None
+        directory = os.path.expanduser(directory)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        file_name = re.sub(r'[^0-9A-Za-z.]+', '_', str(record['command_id'])).strip('_') or 'command'
+        path = os.path.join(directory, file_name + '.npz')
+        np.savez_compressed(path, **record)
+        return path
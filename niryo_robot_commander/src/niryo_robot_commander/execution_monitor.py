@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import threading
+import numpy as np
+
+
+class ExecutionMonitor(object):
+    """
+    Follow the execution of a trajectory from the controller feedbacks
+    Each feedback is compared to the planned trajectory at the same time, which allows to detect
+    divergences and stalls within a few control cycles, and to compute tracking error statistics
+    """
+
+    def __init__(self, start_timeout, feedback_timeout, max_tracking_error, max_consecutive_errors):
+        """
+        :param start_timeout: max time (s) between the trajectory sending and the first feedback
+        :type start_timeout: float
+        :param feedback_timeout: max time (s) between two feedbacks
+        :type feedback_timeout: float
+        :param max_tracking_error: max distance (rad) between a joint and its planned position
+        :type max_tracking_error: float
+        :param max_consecutive_errors: number of consecutive feedbacks above max_tracking_error before failure
+        :type max_consecutive_errors: int
+        """
+        self.__start_timeout = start_timeout
+        self.__feedback_timeout = feedback_timeout
+        self.__max_tracking_error = max_tracking_error
+        self.__max_consecutive_errors = max_consecutive_errors
+
+        self.__lock = threading.Lock()
+        self.__times = None
+        self.__positions = None
+        self.__start_time = None
+        self.__last_feedback_time = None
+        self.__consecutive_errors = 0
+        self.__failure = None
+        self.__nb_samples = 0
+        self.__max_errors = None
+        self.__squared_errors_sum = None
+
+    def start(self, times, positions, now):
+        """
+        Begin to monitor a trajectory
+        :param times: N times from start of the trajectory points
+        :type times: list[float]
+        :param positions: Nx(dof) positions of the trajectory points
+        :type positions: list[list[float]]
+        :param now: time at which the trajectory is sent
+        :type now: float
+        :return: None
+        """
+        with self.__lock:
+            self.__times = np.array(times, dtype=float)
+            self.__positions = np.array(positions, dtype=float)
+            self.__start_time = now
+            self.__last_feedback_time = None
+            self.__consecutive_errors = 0
+            self.__failure = None
+            self.__nb_samples = 0
+            self.__max_errors = np.zeros(self.__positions.shape[1])
+            self.__squared_errors_sum = np.zeros(self.__positions.shape[1])
+
+    def replace_trajectory(self, times, positions):
+        """
+        The trajectory monitored is replaced by a trajectory with the same start, the monitoring goes on
+        :param times: N times from start of the trajectory points
+        :type times: list[float]
+        :param positions: Nx(dof) positions of the trajectory points
+        :type positions: list[list[float]]
+        :return: None
+        """
+        with self.__lock:
+            if self.__start_time is None:
+                return
+            self.__times = np.array(times, dtype=float)
+            self.__positions = np.array(positions, dtype=float)
+
+    def update(self, time_from_start, actual_positions, now):
+        """
+        Compare a feedback to the planned trajectory
+        :param time_from_start: time of the feedback in the trajectory
+        :type time_from_start: float
+        :param actual_positions: joints positions measured
+        :type actual_positions: list[float]
+        :param now: time at which the feedback is received
+        :type now: float
+        :return: failure message if the robot diverged from the trajectory, else None
+        :rtype: str
+        """
+        with self.__lock:
+            if self.__times is None or self.__failure is not None:
+                return self.__failure
+            planned = np.array([np.interp(time_from_start, self.__times, joint_positions)
+                                for joint_positions in self.__positions.T])
+            errors = np.abs(np.array(actual_positions, dtype=float) - planned)
+
+            self.__last_feedback_time = now
+            self.__nb_samples += 1
+            self.__max_errors = np.maximum(self.__max_errors, errors)
+            self.__squared_errors_sum += errors ** 2
+
+            if np.max(errors) > self.__max_tracking_error:
+                self.__consecutive_errors += 1
+            else:
+                self.__consecutive_errors = 0
+            if self.__consecutive_errors >= self.__max_consecutive_errors:
+                joint_index = int(np.argmax(errors))
+                self.__failure = "Joint {} diverged from the planned trajectory " \
+                                 "({:.3f} rad at {:.2f}s)".format(joint_index + 1, errors[joint_index],
+                                                                  time_from_start)
+            return self.__failure
+
+    def check_stall(self, now):
+        """
+        :param now: current time
+        :type now: float
+        :return: failure message if feedbacks stopped, else None
+        :rtype: str
+        """
+        with self.__lock:
+            if self.__start_time is None:
+                return None
+            if self.__last_feedback_time is None:
+                if now - self.__start_time > self.__start_timeout:
+                    return "Controller did not start the trajectory"
+            elif now - self.__last_feedback_time > self.__feedback_timeout:
+                return "Controller stopped sending feedback"
+            return None
+
+    def get_failure(self):
+        with self.__lock:
+            return self.__failure
+
+    def stop(self):
+        with self.__lock:
+            self.__times = None
+            self.__start_time = None
+
+    def get_statistics(self):
+        """
+        :return: number of feedbacks, max error and RMS error of each joint
+        :rtype: (int, numpy.array, numpy.array)
+        """
+        with self.__lock:
+            if not self.__nb_samples:
+                return 0, np.zeros(0), np.zeros(0)
+            return self.__nb_samples, self.__max_errors.copy(), np.sqrt(self.__squared_errors_sum /
+                                                                        self.__nb_samples)
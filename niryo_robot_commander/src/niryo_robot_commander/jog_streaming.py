@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+
+class VelocityRamp(object):
+    """
+    Velocity command followed with limited accelerations
+    Without new target during deadman_timeout, the target goes back to zero, so the robot stops by itself
+    when the client stops streaming
+    """
+
+    def __init__(self, max_velocities, max_accelerations, deadman_timeout):
+        """
+        :param max_velocities: max absolute value of each velocity component
+        :type max_velocities: list[float]
+        :param max_accelerations: max acceleration of each velocity component
+        :type max_accelerations: list[float]
+        :param deadman_timeout: time (s) after the last target when the target is reset to zero
+        :type deadman_timeout: float
+        """
+        self.__max_velocities = np.array(max_velocities, dtype=float)
+        self.__max_accelerations = np.array(max_accelerations, dtype=float)
+        self.__deadman_timeout = deadman_timeout
+
+        self.__velocities = np.zeros(len(self.__max_velocities))
+        self.__target = np.zeros(len(self.__max_velocities))
+        self.__last_target_time = None
+
+    def set_target(self, velocities, now):
+        """
+        :param velocities: velocity wanted, clipped to the max velocities
+        :type velocities: list[float]
+        :param now: time at which the target is received
+        :type now: float
+        :return: None
+        """
+        self.__target = np.clip(np.array(velocities, dtype=float), -self.__max_velocities, self.__max_velocities)
+        self.__last_target_time = now
+
+    def step(self, dt, now):
+        """
+        Move the velocity toward the target, within the acceleration limits
+        :param dt: time since the last step
+        :type dt: float
+        :param now: current time, used to detect the deadman timeout
+        :type now: float
+        :return: new velocity
+        :rtype: numpy.array
+        """
+        if self.__last_target_time is None or now - self.__last_target_time > self.__deadman_timeout:
+            self.__target[:] = 0.0
+        max_change = self.__max_accelerations * dt
+        self.__velocities += np.clip(self.__target - self.__velocities, -max_change, max_change)
+        return self.__velocities.copy()
+
+    def is_stopped(self):
+        return not np.any(self.__velocities) and not np.any(self.__target)
+
+    def reset(self):
+        self.__velocities[:] = 0.0
+        self.__target[:] = 0.0
+        self.__last_target_time = None
+
+
+def twist_to_joint_velocities(jacobian, twist, damping=0.01):
+    """
+    Joint velocities giving a tip twist, with damped least squares to stay bounded near singularities
+    :param jacobian: 6xN geometric Jacobian of the tip
+    :type jacobian: numpy.array
+    :param twist: linear then angular velocity of the tip, in the Jacobian frame
+    :type twist: list[float]
+    :param damping: damping of the least squares
+    :type damping: float
+    :return: N joint velocities
+    :rtype: numpy.array
+    """
+    jjt = np.dot(jacobian, jacobian.T) + (damping ** 2) * np.identity(jacobian.shape[0])
+    return np.dot(jacobian.T, np.linalg.solve(jjt, np.array(twist, dtype=float)))
+
+
+def scale_to_limits(joint_velocities, max_velocities):
+    """
+    Scale all joint velocities by the same ratio so none exceeds its limit, which keeps the direction of motion
+    :rtype: numpy.array
+    """
+    joint_velocities = np.array(joint_velocities, dtype=float)
+    ratio = np.max(np.abs(joint_velocities) / np.array(max_velocities, dtype=float))
+    if ratio > 1.0:
+        joint_velocities /= ratio
+    return joint_velocities
@@ -0,0 +1,460 @@
+#!/usr/bin/env python
+"""
+In-process kinematics for the Ned arm
+
+The kinematic chain is read once from the URDF (the same one used by MoveIt!) and every computation
+is then pure NumPy arithmetic : no service call, no ROS master lookup.
+- Forward kinematics is exact
+- Inverse kinematics is numeric (damped least squares on the geometric Jacobian), seeded with
+  the current joints, and restarted from a few deterministic seeds if it does not converge
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Description of one joint of the chain
+# origin : 4x4 transform from the parent link to the joint frame
+# axis : unit rotation axis expressed in the joint frame (None for fixed joints)
+# lower / upper : joint limits (None for fixed joints)
+KinematicJoint = namedtuple('KinematicJoint', ['name', 'origin', 'axis', 'lower', 'upper'])
+
+
+class KinematicsException(Exception):
+    pass
+
+
+# - Transforms helpers
+
+def matrix_from_rpy(roll, pitch, yaw):
+    """
+    Rotation matrix from fixed axis roll, pitch, yaw (URDF & tf 'sxyz' convention)
+    :return: 3x3 rotation matrix
+    :rtype: numpy.array
+    """
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+
+def rpy_from_matrix(rot):
+    """
+    Fixed axis roll, pitch, yaw from a rotation matrix (same result as tf euler_from_matrix)
+    :param rot: 3x3 (or 4x4) rotation matrix
+    :return: roll, pitch, yaw
+    :rtype: (float, float, float)
+    """
+    cy = math.sqrt(rot[0, 0] ** 2 + rot[1, 0] ** 2)
+    if cy > 1e-9:
+        roll = math.atan2(rot[2, 1], rot[2, 2])
+        pitch = math.atan2(-rot[2, 0], cy)
+        yaw = math.atan2(rot[1, 0], rot[0, 0])
+    else:
+        roll = math.atan2(-rot[1, 2], rot[1, 1])
+        pitch = math.atan2(-rot[2, 0], cy)
+        yaw = 0.0
+    return roll, pitch, yaw
+
+
+def quaternion_from_matrix(rot):
+    """
+    Quaternion from a rotation matrix
+    :param rot: 3x3 (or 4x4) rotation matrix
+    :return: x, y, z, w
+    :rtype: (float, float, float, float)
+    """
+    trace = rot[0, 0] + rot[1, 1] + rot[2, 2]
+    if trace > 0.0:
+        s = 0.5 / math.sqrt(trace + 1.0)
+        w = 0.25 / s
+        x = (rot[2, 1] - rot[1, 2]) * s
+        y = (rot[0, 2] - rot[2, 0]) * s
+        z = (rot[1, 0] - rot[0, 1]) * s
+    elif rot[0, 0] > rot[1, 1] and rot[0, 0] > rot[2, 2]:
+        s = 2.0 * math.sqrt(1.0 + rot[0, 0] - rot[1, 1] - rot[2, 2])
+        w = (rot[2, 1] - rot[1, 2]) / s
+        x = 0.25 * s
+        y = (rot[0, 1] + rot[1, 0]) / s
+        z = (rot[0, 2] + rot[2, 0]) / s
+    elif rot[1, 1] > rot[2, 2]:
+        s = 2.0 * math.sqrt(1.0 + rot[1, 1] - rot[0, 0] - rot[2, 2])
+        w = (rot[0, 2] - rot[2, 0]) / s
+        x = (rot[0, 1] + rot[1, 0]) / s
+        y = 0.25 * s
+        z = (rot[1, 2] + rot[2, 1]) / s
+    else:
+        s = 2.0 * math.sqrt(1.0 + rot[2, 2] - rot[0, 0] - rot[1, 1])
+        w = (rot[1, 0] - rot[0, 1]) / s
+        x = (rot[0, 2] + rot[2, 0]) / s
+        y = (rot[1, 2] + rot[2, 1]) / s
+        z = 0.25 * s
+    return x, y, z, w
+
+
+def matrix_from_quaternion(x, y, z, w):
+    """
+    Rotation matrix from a quaternion (normalized here)
+    :return: 3x3 rotation matrix
+    :rtype: numpy.array
+    """
+    norm = math.sqrt(x * x + y * y + z * z + w * w)
+    if norm < 1e-12:
+        raise KinematicsException("Null quaternion")
+    x, y, z, w = x / norm, y / norm, z / norm, w / norm
+    return np.array([[1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                     [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                     [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]])
+
+
+def homogeneous_matrix(rot, xyz):
+    """
+    Build a 4x4 homogeneous transform
+    :param rot: 3x3 rotation matrix
+    :param xyz: translation
+    :return: 4x4 transform
+    :rtype: numpy.array
+    """
+    mat = np.identity(4)
+    mat[:3, :3] = rot
+    mat[:3, 3] = xyz
+    return mat
+
+
+def rotation_error(rot_current, rot_target):
+    """
+    Rotation vector (axis * angle) which brings rot_current to rot_target, expressed in the base frame
+    """
+    rot_err = np.dot(rot_target, rot_current.T)
+    cos_angle = max(-1.0, min(1.0, (np.trace(rot_err) - 1.0) / 2.0))
+    angle = math.acos(cos_angle)
+    vect = np.array([rot_err[2, 1] - rot_err[1, 2],
+                     rot_err[0, 2] - rot_err[2, 0],
+                     rot_err[1, 0] - rot_err[0, 1]])
+    if angle < 1e-9:
+        return 0.5 * vect
+    if math.pi - angle < 1e-6:
+        # sin(angle) vanishes : axis is given by the biggest column of (R + I)
+        sym = rot_err + np.identity(3)
+        axis = sym[:, np.argmax(np.linalg.norm(sym, axis=0))]
+        return angle * axis / np.linalg.norm(axis)
+    return angle / (2.0 * math.sin(angle)) * vect
+
+
+def _axis_rotation(axis, angle):
+    """
+    Rotation matrix around a unit axis (Rodrigues formula)
+    """
+    x, y, z = axis
+    c, s = math.cos(angle), math.sin(angle)
+    t = 1.0 - c
+    return np.array([[t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+                     [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+                     [t * x * z - s * y, t * y * z + s * x, t * z * z + c]])
+
+
+def _axis_rotation_batch(axis, angles):
+    """
+    Rotation matrices around a unit axis for an array of N angles
+    :return: Nx3x3 rotation matrices
+    """
+    x, y, z = axis
+    c, s = np.cos(angles), np.sin(angles)
+    t = 1.0 - c
+    rotations = np.empty((len(angles), 3, 3))
+    rotations[:, 0, 0] = t * x * x + c
+    rotations[:, 0, 1] = t * x * y - s * z
+    rotations[:, 0, 2] = t * x * z + s * y
+    rotations[:, 1, 0] = t * x * y + s * z
+    rotations[:, 1, 1] = t * y * y + c
+    rotations[:, 1, 2] = t * y * z - s * x
+    rotations[:, 2, 0] = t * x * z - s * y
+    rotations[:, 2, 1] = t * y * z + s * x
+    rotations[:, 2, 2] = t * z * z + c
+    return rotations
+
+
+class NedKinematics(object):
+    """
+    Kinematic model of a serial chain made of revolute and fixed joints
+    """
+
+    def __init__(self, joints, ik_max_iterations=100, ik_position_tolerance=1e-4,
+                 ik_orientation_tolerance=1e-3, ik_max_restarts=8):
+        """
+        :param joints: ordered chain from the root link to the tip link
+        :type joints: list[KinematicJoint]
+        """
+        # Fixed joints are merged with the next revolute joint origin to keep one transform per axis
+        self.__joints_name = []
+        self.__origins = []
+        self.__axes = []
+        lower, upper = [], []
+        pending_fixed = np.identity(4)
+        for joint in joints:
+            if joint.axis is None:
+                pending_fixed = np.dot(pending_fixed, joint.origin)
+                continue
+            self.__joints_name.append(joint.name)
+            self.__origins.append(np.dot(pending_fixed, joint.origin))
+            axis = np.array(joint.axis, dtype=float)
+            self.__axes.append(axis / np.linalg.norm(axis))
+            lower.append(-np.inf if joint.lower is None else joint.lower)
+            upper.append(np.inf if joint.upper is None else joint.upper)
+            pending_fixed = np.identity(4)
+        self.__tip_transform = pending_fixed
+
+        self.__lower_limits = np.array(lower)
+        self.__upper_limits = np.array(upper)
+
+        self.__ik_max_iterations = ik_max_iterations
+        self.__ik_position_tolerance = ik_position_tolerance
+        self.__ik_orientation_tolerance = ik_orientation_tolerance
+        self.__ik_max_restarts = ik_max_restarts
+
+    @classmethod
+    def from_urdf(cls, robot_urdf, root_link, tip_link, **kwargs):
+        """
+        Build the chain between root_link and tip_link from a parsed URDF
+        :param robot_urdf: URDF object (see urdf_parser_py)
+        :param root_link: name of the chain first link
+        :type root_link: str
+        :param tip_link: name of the chain last link
+        :type tip_link: str
+        :rtype: NedKinematics
+        """
+        joint_by_child = {joint.child: joint for joint in robot_urdf.joints}
+
+        chain = []
+        link = tip_link
+        while link != root_link:
+            if link not in joint_by_child:
+                raise KinematicsException("No chain between {} and {} in the URDF".format(root_link, tip_link))
+            joint = joint_by_child[link]
+            chain.append(joint)
+            link = joint.parent
+        chain.reverse()
+
+        kinematic_joints = []
+        for joint in chain:
+            if joint.origin is not None:
+                xyz = joint.origin.xyz or [0.0, 0.0, 0.0]
+                rpy = joint.origin.rpy or [0.0, 0.0, 0.0]
+            else:
+                xyz, rpy = [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+            origin = homogeneous_matrix(matrix_from_rpy(*rpy), xyz)
+
+            if joint.type == 'fixed':
+                kinematic_joints.append(KinematicJoint(joint.name, origin, None, None, None))
+            elif joint.type in ('revolute', 'continuous'):
+                axis = joint.axis if joint.axis is not None else [1.0, 0.0, 0.0]
+                lower = upper = None
+                if joint.type == 'revolute' and joint.limit is not None:
+                    lower, upper = joint.limit.lower, joint.limit.upper
+                kinematic_joints.append(KinematicJoint(joint.name, origin, axis, lower, upper))
+            else:
+                raise KinematicsException("Joint type '{}' is not handled ({})".format(joint.type, joint.name))
+
+        return cls(kinematic_joints, **kwargs)
+
+    # - Getters
+
+    def get_joints_name(self):
+        return list(self.__joints_name)
+
+    def get_joints_limits(self):
+        return self.__lower_limits.copy(), self.__upper_limits.copy()
+
+    def get_dof(self):
+        return len(self.__joints_name)
+
+    # - Forward kinematics
+
+    def __joint_frames(self, joints):
+        """
+        Compute each joint frame (before its rotation) and the tip frame
+        :return: list of 4x4 joint frames, 4x4 tip frame
+        """
+        frame = np.identity(4)
+        joint_frames = []
+        for origin, axis, value in zip(self.__origins, self.__axes, joints):
+            frame = np.dot(frame, origin)
+            joint_frames.append(frame)
+            rotation = np.identity(4)
+            rotation[:3, :3] = _axis_rotation(axis, value)
+            frame = np.dot(frame, rotation)
+        return joint_frames, np.dot(frame, self.__tip_transform)
+
+    def forward_kinematics(self, joints):
+        """
+        Compute the tip transform for one joints configuration
+        :param joints: joints values
+        :type joints: list[float]
+        :return: 4x4 homogeneous transform
+        :rtype: numpy.array
+        """
+        self.__check_joints_len(joints)
+        return self.__joint_frames(joints)[1]
+
+    def forward_kinematics_batch(self, joints_array):
+        """
+        Compute the tip transforms for N joints configurations at once
+        :param joints_array: Nx(dof) joints values, one configuration per row
+        :type joints_array: numpy.array | list[list[float]]
+        :return: Nx4x4 homogeneous transforms
+        :rtype: numpy.array
+        """
+        joints_array = np.atleast_2d(np.asarray(joints_array, dtype=float))
+        if joints_array.shape[1] != len(self.__joints_name):
+            raise KinematicsException("Joint array must have {} joints".format(len(self.__joints_name)))
+
+        nb_configurations = joints_array.shape[0]
+        frames = np.tile(np.identity(4), (nb_configurations, 1, 1))
+        rotations = np.tile(np.identity(4), (nb_configurations, 1, 1))
+        for origin, axis, values in zip(self.__origins, self.__axes, joints_array.T):
+            frames = np.matmul(frames, origin)
+            rotations[:, :3, :3] = _axis_rotation_batch(axis, values)
+            frames = np.matmul(frames, rotations)
+        return np.matmul(frames, self.__tip_transform)
+
+    def positions_batch(self, joints_array):
+        """
+        Tip positions for N joints configurations
+        :param joints_array: Nx(dof) joints values
+        :return: Nx3 positions
+        :rtype: numpy.array
+        """
+        return self.forward_kinematics_batch(joints_array)[:, :3, 3]
+
+    def jacobian(self, joints):
+        """
+        Geometric Jacobian of the tip, expressed in the root frame
+        First three rows are linear velocity, last three angular velocity
+        :param joints: joints values
+        :type joints: list[float]
+        :return: 6xN Jacobian, 4x4 tip transform
+        :rtype: (numpy.array, numpy.array)
+        """
+        self.__check_joints_len(joints)
+        joint_frames, tip_frame = self.__joint_frames(joints)
+        tip_position = tip_frame[:3, 3]
+        jac = np.zeros((6, len(joint_frames)))
+        for i, (frame, axis) in enumerate(zip(joint_frames, self.__axes)):
+            z_axis = np.dot(frame[:3, :3], axis)
+            jac[:3, i] = np.cross(z_axis, tip_position - frame[:3, 3])
+            jac[3:, i] = z_axis
+        return jac, tip_frame
+
+    # - Inverse kinematics
+
+    def inverse_kinematics(self, target, seed):
+        """
+        Find joints which bring the tip to the target transform
+        The search starts from seed, then from deterministic seeds spread over the joints range
+        :param target: 4x4 homogeneous target transform
+        :type target: numpy.array
+        :param seed: joints values used as starting point, usually the current joints
+        :type seed: list[float]
+        :return: success, joints
+        :rtype: (bool, list[float])
+        """
+        self.__check_joints_len(seed)
+        target = np.asarray(target, dtype=float)
+        for q_init in self.__ik_seeds(seed):
+            success, joints = self.__solve_ik_from(target, q_init)
+            if success:
+                return True, joints.tolist()
+        return False, []
+
+    def inverse_kinematics_batch(self, targets, seed):
+        """
+        Solve the IK of consecutive targets, each solution seeds the next target
+        so that the solutions stay on the same branch along a path
+        :param targets: list of 4x4 homogeneous target transforms
+        :type targets: list[numpy.array]
+        :param seed: joints values used as starting point for the first target
+        :type seed: list[float]
+        :return: success, solutions. On failure, solutions found before the first unreachable target
+        :rtype: (bool, list[list[float]])
+        """
+        solutions = []
+        for target in targets:
+            success, joints = self.inverse_kinematics(target, seed)
+            if not success:
+                return False, solutions
+            solutions.append(joints)
+            seed = joints
+        return True, solutions
+
+    def differential_inverse_kinematics(self, target, seed, max_iterations=5, damping=0.01):
+        """
+        Local IK for small displacements : a few damped least squares steps from seed, without restart
+        The solution stays on the branch of seed and the computation time is bounded by max_iterations
+        :param target: 4x4 homogeneous target transform, close to the transform of seed
+        :type target: numpy.array
+        :param seed: joints values the displacement starts from
+        :type seed: list[float]
+        :param max_iterations: number of steps allowed to reach the target tolerances
+        :type max_iterations: int
+        :param damping: damping of the least squares, limits the steps near singularities
+        :type damping: float
+        :return: success, joints
+        :rtype: (bool, list[float])
+        """
+        self.__check_joints_len(seed)
+        target = np.asarray(target, dtype=float)
+        q = np.clip(np.array(seed, dtype=float), self.__lower_limits, self.__upper_limits)
+        for iteration in range(max_iterations + 1):
+            jac, tip_frame = self.jacobian(q)
+            error = np.concatenate((target[:3, 3] - tip_frame[:3, 3],
+                                    rotation_error(tip_frame[:3, :3], target[:3, :3])))
+            if np.linalg.norm(error[:3]) < self.__ik_position_tolerance and \
+                    np.linalg.norm(error[3:]) < self.__ik_orientation_tolerance:
+                return True, q.tolist()
+            if iteration < max_iterations:
+                q = np.clip(q + self.__damped_least_squares(jac, error, damping),
+                            self.__lower_limits, self.__upper_limits)
+        return False, q.tolist()
+
+    def __solve_ik_from(self, target, q_init):
+        q = np.clip(np.array(q_init, dtype=float), self.__lower_limits, self.__upper_limits)
+        damping = 0.05
+        last_error_norm = np.inf
+        for _ in range(self.__ik_max_iterations):
+            jac, tip_frame = self.jacobian(q)
+            error = np.concatenate((target[:3, 3] - tip_frame[:3, 3],
+                                    rotation_error(tip_frame[:3, :3], target[:3, :3])))
+            if np.linalg.norm(error[:3]) < self.__ik_position_tolerance and \
+                    np.linalg.norm(error[3:]) < self.__ik_orientation_tolerance:
+                return True, q
+
+            # Levenberg-Marquardt like damping adaptation
+            error_norm = np.linalg.norm(error)
+            damping = max(damping * 0.5, 1e-4) if error_norm < last_error_norm else min(damping * 2.0, 1.0)
+            last_error_norm = error_norm
+
+            q = np.clip(q + self.__damped_least_squares(jac, error, damping),
+                        self.__lower_limits, self.__upper_limits)
+        return False, q
+
+    @staticmethod
+    def __damped_least_squares(jac, error, damping):
+        jjt = np.dot(jac, jac.T) + (damping ** 2) * np.identity(jac.shape[0])
+        return np.dot(jac.T, np.linalg.solve(jjt, error))
+
+    def __ik_seeds(self, seed):
+        yield np.array(seed, dtype=float)
+        lower = np.where(np.isfinite(self.__lower_limits), self.__lower_limits, -math.pi)
+        upper = np.where(np.isfinite(self.__upper_limits), self.__upper_limits, math.pi)
+        yield (lower + upper) / 2.0
+        # Same sequence at each call to keep results reproducible
+        random_state = np.random.RandomState(0)
+        for _ in range(self.__ik_max_restarts):
+            yield lower + random_state.random_sample(len(lower)) * (upper - lower)
+
+    def __check_joints_len(self, joints):
+        if len(joints) != len(self.__joints_name):
+            raise KinematicsException("Joint array must have {} joints".format(len(self.__joints_name)))
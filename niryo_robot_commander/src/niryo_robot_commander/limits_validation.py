@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from niryo_robot_commander.command_enums import ArmCommanderException
+
+
+def get_first_violation(values, lower, upper):
+    """
+    Find the first value out of its bounds. NaN values are out of any bounds
+    :param values: NxM values, one row per point
+    :type values: numpy.array
+    :param lower: M lower bounds
+    :type lower: numpy.array
+    :param upper: M upper bounds
+    :type upper: numpy.array
+    :return: index of the first invalid point and of its first invalid value, None if all are valid
+    :rtype: (int, int)
+    """
+    invalid = ~((values >= lower) & (values <= upper))
+    invalid_points = invalid.any(axis=1)
+    if not invalid_points.any():
+        return None
+    point_index = int(np.argmax(invalid_points))
+    return point_index, int(np.argmax(invalid[point_index]))
+
+
+class LimitsValidator(object):
+    """
+    Bounds of the M values of a point, checked on N points at once
+    """
+
+    def __init__(self, names, lower, upper, message_format, error_status):
+        """
+        :param names: name of each value, used in the error messages
+        :type names: list[str]
+        :param lower: lower bound of each value, None for no bound
+        :type lower: list[float]
+        :param upper: upper bound of each value, None for no bound
+        :type upper: list[float]
+        :param message_format: error message, formatted with the name and the bounds of the invalid value
+        :type message_format: str
+        :param error_status: status of the ArmCommanderException raised
+        :type error_status: int
+        """
+        self.__names = list(names)
+        # Bounds are displayed as given, not as numpy floats
+        self.__lower_values = list(lower)
+        self.__upper_values = list(upper)
+        self.__lower = np.array([-np.inf if value is None else value for value in lower], dtype=float)
+        self.__upper = np.array([np.inf if value is None else value for value in upper], dtype=float)
+        self.__message_format = message_format
+        self.__error_status = error_status
+
+    def get_size(self):
+        return len(self.__names)
+
+    def get_first_violation(self, values):
+        """
+        :param values: NxM values
+        :return: index of the first invalid point and of its first invalid value, None if all are valid
+        :rtype: (int, int)
+        """
+        return get_first_violation(self.as_array(values), self.__lower, self.__upper)
+
+    def validate(self, values, point_kind=None):
+        """
+        :param values: NxM values
+        :param point_kind: name of the points. If given, the index of the invalid point is added to the message
+        :type point_kind: str
+        :raise ArmCommanderException: if a value is out of its bounds
+        :return: None
+        """
+        violation = self.get_first_violation(values)
+        if violation is None:
+            return
+        point_index, value_index = violation
+        message = self.__message_format.format(self.__names[value_index], self.__lower_values[value_index],
+                                               self.__upper_values[value_index])
+        if point_kind is not None:
+            message += " at {} {}".format(point_kind, point_index)
+        raise ArmCommanderException(self.__error_status, message)
+
+    def as_array(self, values):
+        """
+        :return: values as a NxM array
+        :rtype: numpy.array
+        :raise ArmCommanderException: if the points do not have M values
+        """
+        width = len(self.__names)
+        values = np.array(values, dtype=float)
+        if values.size == 0:
+            return values.reshape(0, width)
+        if values.ndim != 2 or values.shape[1] != width:
+            raise ArmCommanderException(self.__error_status,
+                                        "Array must have {} values per point".format(width))
+        return values
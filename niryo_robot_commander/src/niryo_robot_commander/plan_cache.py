@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+import threading
+from collections import OrderedDict
+
+
+class PlanCache(object):
+    """
+    Least Recently Used cache of computed plans
+    A plan is identified by the robot start joints and the target.
+    Values are quantized, so that small noise on joint states or targets still gives the same key
+    The geometric path is stored, with the last timings computed for it : a timing is identified
+    by the velocity and acceleration scaling factors
+    """
+
+    def __init__(self, capacity, joints_precision, target_precision, timings_per_plan=4):
+        """
+        :param capacity: maximum number of plans kept. 0 disables the cache
+        :type capacity: int
+        :param joints_precision: quantization step of the start joints (rad)
+        :type joints_precision: float
+        :param target_precision: quantization step of the target values (m or rad)
+        :type target_precision: float
+        :param timings_per_plan: maximum number of timings kept for each plan
+        :type timings_per_plan: int
+        """
+        self.__capacity = capacity
+        self.__joints_precision = joints_precision
+        self.__target_precision = target_precision
+        self.__timings_per_plan = timings_per_plan
+
+        self.__lock = threading.Lock()
+        self.__plans = OrderedDict()
+        self.__timings = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    def is_enabled(self):
+        return self.__capacity > 0
+
+    def make_key(self, start_joints, target_type, target_values):
+        """
+        Build the key of a plan
+
+        :param start_joints: joints of the robot at the beginning of the plan
+        :type start_joints: list[float]
+        :param target_type: kind of target, from MoveCommandType
+        :type target_type: int
+        :param target_values: values of the target (joints, pose, shift...)
+        :type target_values: list[float]
+        :return: hashable key
+        :rtype: tuple
+        """
+        return (tuple(self.__quantize(start_joints, self.__joints_precision)),
+                target_type,
+                tuple(self.__quantize(target_values, self.__target_precision)))
+
+    def get(self, key):
+        """
+        :return: the plan stored for key, None if there is none. Hits and misses are counted
+        :rtype: RobotTrajectory
+        """
+        with self.__lock:
+            plan = self.__plans.pop(key, None)
+            if plan is None:
+                self.__misses += 1
+                return None
+            # Reinsert to mark it as the most recently used
+            self.__plans[key] = plan
+            self.__hits += 1
+            return plan
+
+    def add(self, key, plan):
+        if not self.is_enabled():
+            return
+        with self.__lock:
+            self.__plans.pop(key, None)
+            self.__plans[key] = plan
+            self.__timings[key] = OrderedDict()
+            while len(self.__plans) > self.__capacity:
+                evicted_key, _ = self.__plans.popitem(last=False)
+                del self.__timings[evicted_key]
+
+    def get_timing(self, key, scaling_factors):
+        """
+        :param key: key of the plan
+        :param scaling_factors: velocity and acceleration scaling factors of the timing
+        :type scaling_factors: (float, float)
+        :return: the plan timed with these factors, None if it has not been stored
+        :rtype: RobotTrajectory
+        """
+        with self.__lock:
+            timings = self.__timings.get(key)
+            if timings is None:
+                return None
+            return timings.get(scaling_factors)
+
+    def add_timing(self, key, scaling_factors, timed_plan):
+        """
+        Store a timing of a plan already in the cache. Ignored if the plan is not in the cache anymore
+        """
+        with self.__lock:
+            timings = self.__timings.get(key)
+            if timings is None:
+                return
+            timings.pop(scaling_factors, None)
+            timings[scaling_factors] = timed_plan
+            while len(timings) > self.__timings_per_plan:
+                timings.popitem(last=False)
+
+    def remove(self, key):
+        with self.__lock:
+            self.__plans.pop(key, None)
+            self.__timings.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__plans.clear()
+            self.__timings.clear()
+
+    def reset_stats(self):
+        with self.__lock:
+            self.__hits = 0
+            self.__misses = 0
+
+    def get_stats(self):
+        """
+        :return: hits, misses, number of plans stored, capacity
+        :rtype: (int, int, int, int)
+        """
+        with self.__lock:
+            return self.__hits, self.__misses, len(self.__plans), self.__capacity
+
+    @staticmethod
+    def __quantize(values, precision):
+        return [int(round(value / precision)) for value in values]
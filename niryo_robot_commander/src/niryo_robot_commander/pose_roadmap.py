@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+
+import json
+import threading
+
+import numpy as np
+
+from niryo_robot_commander.kinematics import rotation_error
+
+
+class PoseRoadmap(object):
+    """
+    Joint paths planned in advance between every pair of saved poses of the cell
+    A node is a saved pose : its name, its joints and its tip pose. Moves starting at a node and going to another
+    node are served from the roadmap without planning
+    Paths are only valid with the planning scene they were planned in, which is identified by a signature
+    """
+
+    def __init__(self, joints_tolerance, position_tolerance, orientation_tolerance):
+        """
+        :param joints_tolerance: max joint distance (rad) between the robot and a node to start from it
+        :type joints_tolerance: float
+        :param position_tolerance: max distance (m) between a pose target and a node
+        :type position_tolerance: float
+        :param orientation_tolerance: max angle (rad) between a pose target and a node
+        :type orientation_tolerance: float
+        """
+        self.__joints_tolerance = joints_tolerance
+        self.__position_tolerance = position_tolerance
+        self.__orientation_tolerance = orientation_tolerance
+
+        self.__lock = threading.Lock()
+        self.__names = []
+        self.__joints = np.zeros((0, 0))
+        self.__tips = np.zeros((0, 4, 4))
+        self.__scene_signature = None
+        # (start node, end node) -> (times, positions)
+        self.__paths = {}
+
+    def build(self, nodes, scene_signature, plan_function):
+        """
+        Plan the paths between every pair of nodes. The previous paths are discarded
+        :param nodes: name, joints and 4x4 tip pose of each node
+        :type nodes: list[(str, list[float], numpy.array)]
+        :param scene_signature: signature of the planning scene the paths are planned in
+        :type scene_signature: str
+        :param plan_function: function planning from start joints to end joints. It returns
+                              the times from start and positions of the path, None if the planning failed
+        :return: names of the pairs of nodes without path
+        :rtype: list[(str, str)]
+        """
+        paths = {}
+        failures = []
+        for start in range(len(nodes)):
+            for end in range(len(nodes)):
+                if start == end:
+                    continue
+                path = plan_function(list(nodes[start][1]), list(nodes[end][1]))
+                if path is None:
+                    failures.append((nodes[start][0], nodes[end][0]))
+                else:
+                    paths[(start, end)] = (np.array(path[0], dtype=float), np.array(path[1], dtype=float))
+        with self.__lock:
+            self.__set_nodes(nodes)
+            self.__scene_signature = scene_signature
+            self.__paths = paths
+        return failures
+
+    def __set_nodes(self, nodes):
+        self.__names = [name for name, _, _ in nodes]
+        self.__joints = np.array([joints for _, joints, _ in nodes], dtype=float)
+        self.__tips = np.array([tip for _, _, tip in nodes], dtype=float).reshape((len(nodes), 4, 4))
+
+    def clear(self):
+        with self.__lock:
+            self.__set_nodes([])
+            self.__scene_signature = None
+            self.__paths = {}
+
+    def is_empty(self):
+        with self.__lock:
+            return not self.__paths
+
+    def get_scene_signature(self):
+        return self.__scene_signature
+
+    def get_size(self):
+        """
+        :return: number of nodes, number of paths
+        :rtype: (int, int)
+        """
+        with self.__lock:
+            return len(self.__names), len(self.__paths)
+
+    def find_path_to_joints(self, start_joints, target_joints):
+        """
+        :return: times from start and positions of the path from start_joints to target_joints,
+                 None if they are not both nodes of the roadmap
+        :rtype: (numpy.array, numpy.array)
+        """
+        with self.__lock:
+            if not self.__paths:
+                return None
+            return self.__find_path(start_joints, self.__find_node_by_joints(target_joints))
+
+    def find_path_to_pose(self, start_joints, target_tip):
+        """
+        :param target_tip: 4x4 pose of the tip
+        :type target_tip: numpy.array
+        :return: times from start and positions of the path from start_joints to target_tip,
+                 None if they are not both nodes of the roadmap
+        :rtype: (numpy.array, numpy.array)
+        """
+        with self.__lock:
+            if not self.__paths:
+                return None
+            distances = np.linalg.norm(self.__tips[:, :3, 3] - np.array(target_tip)[:3, 3], axis=1)
+            end = None
+            for index in np.flatnonzero(distances <= self.__position_tolerance):
+                angle = np.linalg.norm(rotation_error(self.__tips[index, :3, :3], np.array(target_tip)[:3, :3]))
+                if angle <= self.__orientation_tolerance:
+                    end = int(index)
+                    break
+            return self.__find_path(start_joints, end)
+
+    def __find_path(self, start_joints, end):
+        if end is None:
+            return None
+        start = self.__find_node_by_joints(start_joints)
+        if start is None:
+            return None
+        return self.__paths.get((start, end))
+
+    def __find_node_by_joints(self, joints):
+        if not len(self.__joints) or len(joints) != self.__joints.shape[1]:
+            return None
+        distances = np.max(np.abs(self.__joints - np.array(joints, dtype=float)), axis=1)
+        index = int(np.argmin(distances))
+        if distances[index] > self.__joints_tolerance:
+            return None
+        return index
+
+    def save(self, file_path):
+        with self.__lock:
+            data = {
+                'scene_signature': self.__scene_signature,
+                'nodes': [{'name': name, 'joints': joints.tolist(), 'tip': tip.tolist()}
+                          for name, joints, tip in zip(self.__names, self.__joints, self.__tips)],
+                'paths': [{'start': start, 'end': end, 'times': times.tolist(), 'positions': positions.tolist()}
+                          for (start, end), (times, positions) in self.__paths.items()],
+            }
+        with open(file_path, 'w') as f:
+            json.dump(data, f)
+
+    def load(self, file_path):
+        """
+        :raises IOError: if the file cannot be read
+        :raises ValueError: if the file is not a roadmap
+        """
+        with open(file_path) as f:
+            data = json.load(f)
+        try:
+            nodes = [(node['name'], node['joints'], node['tip']) for node in data['nodes']]
+            paths = {(path['start'], path['end']): (np.array(path['times'], dtype=float),
+                                                    np.array(path['positions'], dtype=float))
+                     for path in data['paths']}
+            scene_signature = data['scene_signature']
+        except (KeyError, TypeError) as e:
+            raise ValueError("Invalid roadmap file : {}".format(e))
+        with self.__lock:
+            self.__set_nodes(nodes)
+            self.__scene_signature = scene_signature
+            self.__paths = paths
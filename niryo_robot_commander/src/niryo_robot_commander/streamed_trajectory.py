@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+
+def join_chunks(chunks):
+    """
+    Join the chunks of a joint path computed one after the other
+    :param chunks: Nx(dof) joints positions of each chunk, each one starting with the last position of the previous one
+    :type chunks: list[numpy.array]
+    :return: positions of the path without duplicated points, index of the last position of each chunk but the last
+    :rtype: (numpy.array, list[int])
+    """
+    positions, joins = [], []
+    for chunk in chunks:
+        chunk = np.atleast_2d(np.asarray(chunk, dtype=float))
+        if positions:
+            joins.append(len(positions) - 1)
+            chunk = chunk[1:]
+        for point in chunk:
+            # Duplicated points do not belong to the path, the parameterization would remove them
+            if not positions or np.linalg.norm(point - positions[-1]) > 1e-9:
+                positions.append(point)
+    return np.array(positions), joins
+
+
+def get_divergence_time(previous_times, times, tolerance=1e-6):
+    """
+    A time optimal timing of a longer path is the same as the timing of the beginning of the path,
+    until the point where the shorter one begins to brake to stop at its end
+    :param previous_times: times from start of the points of the beginning of the path
+    :type previous_times: numpy.array
+    :param times: times from start of the points of the longer path
+    :type times: numpy.array
+    :return: time from start until which both timings are the same
+    :rtype: float
+    """
+    nb_points = min(len(previous_times), len(times))
+    different = np.abs(np.asarray(times[:nb_points]) - np.asarray(previous_times[:nb_points])) > tolerance
+    if not different.any():
+        return float(previous_times[nb_points - 1])
+    return float(previous_times[max(0, int(np.argmax(different)) - 1)])
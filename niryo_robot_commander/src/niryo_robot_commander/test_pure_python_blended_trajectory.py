@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from niryo_robot_commander.blended_trajectory import BlendedJointPath, find_first_invalid_position
+from niryo_robot_commander.time_parameterization import time_optimal_parameterization
+
+WAYPOINTS = [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0], [1.0, 1.0, 1.0]]
+MAX_VELOCITIES = [1.0, 0.5, 1.0]
+MAX_ACCELERATIONS = [2.0, 2.0, 1.0]
+
+
+class TestTimeParameterization(unittest.TestCase):
+
+    def test_straight_line(self):
+        positions = np.linspace([0.0, 0.0, 0.0], [2.0, 0.0, 0.0], 201)
+        positions, times, velocities, accelerations = time_optimal_parameterization(positions, MAX_VELOCITIES,
+                                                                                    MAX_ACCELERATIONS)
+        # Trapezoidal profile : 0.5s to accelerate, 1.5s at max velocity, 0.5s to decelerate
+        self.assertAlmostEqual(times[-1], 2.5, places=1)
+        self.assertAlmostEqual(np.max(velocities[:, 0]), 1.0, places=3)
+        np.testing.assert_almost_equal(velocities[[0, -1]], 0.0)
+
+    def test_limits(self):
+        positions = BlendedJointPath(WAYPOINTS, [0.0, 0.3, 0.3, 0.0]).sample(0.01)
+        positions, times, velocities, _ = time_optimal_parameterization(positions, MAX_VELOCITIES,
+                                                                        MAX_ACCELERATIONS)
+        self.assertTrue(np.all(np.diff(times) > 0))
+        # Chords between samples of the blends differ slightly from the path tangent
+        finite_velocities = np.diff(positions, axis=0) / np.diff(times)[:, np.newaxis]
+        self.assertTrue(np.all(np.abs(finite_velocities) <= np.array(MAX_VELOCITIES) * 1.01))
+        self.assertTrue(np.all(np.abs(velocities) <= np.array(MAX_VELOCITIES) + 1e-6))
+
+
+class TestBlendedJointPath(unittest.TestCase):
+
+    def test_path_ends(self):
+        positions = BlendedJointPath(WAYPOINTS, [0.0, 0.3, 0.3, 0.0]).sample(0.01)
+        np.testing.assert_almost_equal(positions[0], WAYPOINTS[0])
+        np.testing.assert_almost_equal(positions[-1], WAYPOINTS[-1])
+        self.assertTrue(np.max(np.linalg.norm(np.diff(positions, axis=0), axis=1)) <= 0.01 + 1e-9)
+
+    def test_stop_without_blend(self):
+        path = BlendedJointPath(WAYPOINTS, [0.0, 0.0, 0.3, 0.0])
+        self.assertEqual(len(path.sample_sections(0.01)), 2)
+        positions, _, velocities, _ = path.compute_trajectory(0.01, MAX_VELOCITIES, MAX_ACCELERATIONS)
+        corner_index = np.flatnonzero(np.all(np.isclose(positions, WAYPOINTS[1]), axis=1))
+        self.assertEqual(len(corner_index), 1)
+        np.testing.assert_almost_equal(velocities[corner_index[0]], 0.0)
+
+    def test_blend_is_faster(self):
+        stop_times = BlendedJointPath(WAYPOINTS, [0.0] * 4).compute_trajectory(0.01, MAX_VELOCITIES,
+                                                                                MAX_ACCELERATIONS)[1]
+        blend_times = BlendedJointPath(WAYPOINTS, [0.0, 0.3, 0.3, 0.0]).compute_trajectory(0.01, MAX_VELOCITIES,
+                                                                                            MAX_ACCELERATIONS)[1]
+        self.assertLess(blend_times[-1], stop_times[-1])
+
+    def test_invalid_position(self):
+        positions = BlendedJointPath(WAYPOINTS, [0.0, 0.3, 0.3, 0.0]).sample(0.01)
+        checked = []
+
+        def is_valid(joints):
+            checked.append(joints)
+            return True
+
+        self.assertIsNone(find_first_invalid_position(positions, is_valid))
+        self.assertEqual(len(checked), len(positions))
+        np.testing.assert_almost_equal(checked[-1], WAYPOINTS[-1])
+
+        # Obstacle around the second blend
+        def is_out_of_obstacle(joints):
+            return np.linalg.norm(joints - np.array([1.0, 0.9, 0.1])) > 0.15
+
+        index = find_first_invalid_position(positions, is_out_of_obstacle)
+        self.assertIsNotNone(index)
+        self.assertFalse(is_out_of_obstacle(positions[index]))
+        self.assertTrue(all(is_out_of_obstacle(joints) for joints in positions[:index]))
+
+        # An obstacle crossed between two samples of a coarser check is found
+        self.assertEqual(find_first_invalid_position(positions, lambda joints: np.abs(joints[1] - 0.503) > 0.004),
+                         int(np.argmin(np.abs(positions[:, 1] - 0.503))))
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
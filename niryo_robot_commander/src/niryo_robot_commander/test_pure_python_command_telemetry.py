@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from niryo_robot_commander.command_telemetry import CommandTelemetry, JointStatesRingBuffer
+
+JOINTS_NAME = ['joint_1', 'joint_2']
+
+
+class TestJointStatesRingBuffer(unittest.TestCase):
+
+    def test_wrap_around(self):
+        ring_buffer = JointStatesRingBuffer(4, 2)
+        for i in range(6):
+            ring_buffer.append(float(i), [i, -i])
+        self.assertEqual(len(ring_buffer), 4)
+        times, positions = ring_buffer.get_between(0.0, 10.0)
+        np.testing.assert_almost_equal(times, [2.0, 3.0, 4.0, 5.0])
+        np.testing.assert_almost_equal(positions[:, 1], [-2.0, -3.0, -4.0, -5.0])
+        times, _ = ring_buffer.get_between(2.5, 4.0)
+        np.testing.assert_almost_equal(times, [3.0, 4.0])
+
+
+class TestCommandTelemetry(unittest.TestCase):
+
+    def setUp(self):
+        self.telemetry = CommandTelemetry(JOINTS_NAME, buffer_size=100, history_size=2)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record_command(self, command_id, start):
+        self.telemetry.begin(command_id, start)
+        self.telemetry.mark("planned", start + 0.1)
+        self.telemetry.add_planned_trajectory(start + 0.2, [0.0, 1.0], [[0.0, 0.0], [1.0, 1.0]])
+        for i in range(5):
+            self.telemetry.record_joint_states(start + 0.25 * i, [0.25 * i, 0.25 * i])
+        self.telemetry.end(1, start + 1.0)
+
+    def test_record(self):
+        self.record_command("goal_1", 10.0)
+        record = self.telemetry.get_record()
+        self.assertEqual(str(record['command_id']), "goal_1")
+        self.assertEqual(list(record['stage_names']), ["planned"])
+        np.testing.assert_almost_equal(record['stage_times'], [0.1])
+        np.testing.assert_almost_equal(record['planned_times'], [0.2, 1.2])
+        np.testing.assert_almost_equal(record['actual_times'], [0.0, 0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(record['actual_positions'].shape, (5, 2))
+
+    def test_history_and_dump(self):
+        for i in range(3):
+            self.record_command("/commander-{}".format(i), 10.0 * i)
+        self.assertEqual(self.telemetry.get_commands_id(), ["/commander-1", "/commander-2"])
+        self.assertIsNone(self.telemetry.dump(self.directory, "/commander-0"))
+
+        path = self.telemetry.dump(self.directory, "/commander-1")
+        self.assertEqual(os.path.basename(path), "commander_1.npz")
+        data = np.load(path)
+        np.testing.assert_almost_equal(data['planned_positions'], [[0.0, 0.0], [1.0, 1.0]])
+        self.assertEqual(int(data['status']), 1)
+
+    def test_disabled(self):
+        telemetry = CommandTelemetry(JOINTS_NAME, buffer_size=100, history_size=2, enabled=False)
+        telemetry.begin("goal", 0.0)
+        telemetry.record_joint_states(0.0, [0.0, 0.0])
+        telemetry.end(1, 1.0)
+        self.assertIsNone(telemetry.get_record())
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from niryo_robot_commander.execution_monitor import ExecutionMonitor
+
+TIMES = [0.0, 1.0, 2.0]
+POSITIONS = [[0.0, 0.0], [1.0, 0.5], [2.0, 1.0]]
+
+
+class TestExecutionMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.monitor = ExecutionMonitor(start_timeout=1.0, feedback_timeout=0.3, max_tracking_error=0.1,
+                                        max_consecutive_errors=3)
+        self.monitor.start(TIMES, POSITIONS, now=10.0)
+
+    def test_tracking_statistics(self):
+        self.assertIsNone(self.monitor.update(0.5, [0.5, 0.25], 10.5))
+        self.assertIsNone(self.monitor.update(1.5, [1.45, 0.75], 11.5))
+        nb_samples, max_errors, rms_errors = self.monitor.get_statistics()
+        self.assertEqual(nb_samples, 2)
+        np.testing.assert_almost_equal(max_errors, [0.05, 0.0])
+        np.testing.assert_almost_equal(rms_errors, [0.05 / np.sqrt(2), 0.0])
+
+    def test_divergence(self):
+        for i in range(2):
+            self.assertIsNone(self.monitor.update(0.1 * i, [0.5, 0.0], 10.1 + 0.1 * i))
+        # An error back in tolerance resets the count
+        self.assertIsNone(self.monitor.update(0.2, [0.2, 0.1], 10.3))
+        for i in range(2):
+            self.assertIsNone(self.monitor.update(0.3 + 0.1 * i, [0.3, 0.5], 10.4 + 0.1 * i))
+        self.assertIsNotNone(self.monitor.update(0.5, [0.5, 0.6], 10.6))
+        self.assertIsNotNone(self.monitor.get_failure())
+
+    def test_replace_trajectory(self):
+        self.assertIsNone(self.monitor.update(1.5, [1.5, 0.75], 11.5))
+        self.monitor.replace_trajectory(TIMES + [3.0], POSITIONS + [[2.0, 2.0]])
+        self.assertIsNone(self.monitor.check_stall(11.6))
+        for i in range(3):
+            self.assertIsNone(self.monitor.update(2.5, [2.0, 1.5], 12.0 + 0.1 * i))
+        self.assertEqual(self.monitor.get_statistics()[0], 4)
+
+    def test_stall(self):
+        self.assertIsNone(self.monitor.check_stall(10.5))
+        self.assertIsNotNone(self.monitor.check_stall(11.5))
+        self.monitor.update(0.0, [0.0, 0.0], 11.5)
+        self.assertIsNone(self.monitor.check_stall(11.7))
+        self.assertIsNotNone(self.monitor.check_stall(11.9))
+        self.monitor.stop()
+        self.assertIsNone(self.monitor.check_stall(20.0))
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
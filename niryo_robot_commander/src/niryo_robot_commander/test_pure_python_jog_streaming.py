@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from niryo_robot_commander.jog_streaming import VelocityRamp, twist_to_joint_velocities, scale_to_limits
+
+
+class TestVelocityRamp(unittest.TestCase):
+
+    def setUp(self):
+        self.ramp = VelocityRamp([1.0, 1.0], [2.0, 2.0], deadman_timeout=0.2)
+
+    def test_acceleration_limit(self):
+        self.ramp.set_target([5.0, -0.5], now=0.0)
+        np.testing.assert_almost_equal(self.ramp.step(0.1, now=0.1), [0.2, -0.2])
+        for i in range(10):
+            velocities = self.ramp.step(0.01, now=0.1)
+        # Target clipped to the max velocity
+        np.testing.assert_almost_equal(velocities, [0.4, -0.4])
+        for i in range(50):
+            velocities = self.ramp.step(0.01, now=0.1)
+        np.testing.assert_almost_equal(velocities, [1.0, -0.5])
+
+    def test_deadman(self):
+        self.ramp.set_target([1.0, 0.0], now=0.0)
+        for i in range(10):
+            self.ramp.step(0.05, now=0.05 * i)
+        self.assertFalse(self.ramp.is_stopped())
+        # No target since more than the deadman timeout : the ramp goes back to zero
+        velocities = self.ramp.step(0.05, now=0.5)
+        self.assertLess(velocities[0], 1.0)
+        for i in range(20):
+            self.ramp.step(0.05, now=0.5)
+        self.assertTrue(self.ramp.is_stopped())
+
+
+class TestJointVelocities(unittest.TestCase):
+
+    def test_twist_to_joint_velocities(self):
+        jacobian = np.zeros((6, 6))
+        jacobian[:, :] = np.identity(6) * 2.0
+        np.testing.assert_almost_equal(twist_to_joint_velocities(jacobian, [0.2, 0, 0, 0, 0, 0.4]),
+                                       [0.1, 0, 0, 0, 0, 0.2], decimal=4)
+
+    def test_scale_to_limits(self):
+        np.testing.assert_almost_equal(scale_to_limits([2.0, 0.5], [1.0, 1.0]), [1.0, 0.25])
+        np.testing.assert_almost_equal(scale_to_limits([0.5, -0.5], [1.0, 1.0]), [0.5, -0.5])
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+import unittest
+import math
+import numpy as np
+
+from niryo_robot_commander.kinematics import KinematicJoint, KinematicsException, NedKinematics
+from niryo_robot_commander.kinematics import homogeneous_matrix, matrix_from_rpy, rpy_from_matrix
+from niryo_robot_commander.kinematics import matrix_from_quaternion, quaternion_from_matrix
+
+PI = math.pi
+DEG_TO_RAD = PI / 180
+
+# Same values as niryo_ned.urdf.xacro : name, xyz, rpy, limits in degrees
+ned_chain_description = [
+    ["joint_world", [0, 0, 0], [0, 0, 0], None],
+    ["joint_1", [0, 0, 0.1065], [0, 0, 0], [-170.0, 170.0]],
+    ["joint_2", [0, 0, 0.065], [PI / 2, -PI / 2, 0], [-120.0, 35.0]],
+    ["joint_3", [0.221, -0.012, 0], [0, 0, -PI / 2], [-77.0, 90.0]],
+    ["joint_4", [0.047, 0.0325, 0], [0, PI / 2, 0], [-120.0, 120.0]],
+    ["joint_5", [0, 0, 0.188], [PI, -PI / 2, PI], [-100.0, 55.0]],
+    ["joint_6", [0.0197, 0.00925, 0], [0, PI / 2, 0], [-145.0, 145.0]],
+    ["hand_tool_joint", [0, 0, 0.0215], [-PI / 2, -PI / 2, 0], None],
+]
+
+
+def create_ned_kinematics():
+    joints = []
+    for name, xyz, rpy, limits in ned_chain_description:
+        origin = homogeneous_matrix(matrix_from_rpy(*rpy), xyz)
+        if limits is None:
+            joints.append(KinematicJoint(name, origin, None, None, None))
+        else:
+            joints.append(KinematicJoint(name, origin, [0, 0, 1], limits[0] * DEG_TO_RAD, limits[1] * DEG_TO_RAD))
+    return NedKinematics(joints)
+
+
+class TestTransformsMethods(unittest.TestCase):
+
+    def test_rpy_round_trip(self):
+        for rpy in [(0.0, 0.0, 0.0), (0.3, -1.2, 2.5), (-2.9, 0.7, -0.1)]:
+            np.testing.assert_almost_equal(rpy_from_matrix(matrix_from_rpy(*rpy)), rpy)
+
+    def test_quaternion_round_trip(self):
+        for rpy in [(0.0, 0.0, 0.0), (0.3, -1.2, 2.5), (3.1, 0.1, -3.1)]:
+            rot = matrix_from_rpy(*rpy)
+            np.testing.assert_almost_equal(matrix_from_quaternion(*quaternion_from_matrix(rot)), rot)
+
+
+class TestKinematicsMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.kinematics = create_ned_kinematics()
+
+    def test_chain(self):
+        self.assertEqual(self.kinematics.get_dof(), 6)
+        self.assertEqual(self.kinematics.get_joints_name(), ["joint_{}".format(i) for i in range(1, 7)])
+        with self.assertRaises(KinematicsException):
+            self.kinematics.forward_kinematics([0.0] * 5)
+
+    def test_forward_kinematics_home(self):
+        tip = self.kinematics.forward_kinematics([0.0] * 6)
+        np.testing.assert_almost_equal(tip[:3, 3], [0.2882, 0.0, 0.43425])
+        np.testing.assert_almost_equal(tip[:3, :3], np.identity(3))
+
+    def test_forward_kinematics_batch(self):
+        random_state = np.random.RandomState(0)
+        joints_array = random_state.uniform(-1.0, 1.0, (20, 6))
+        tips = self.kinematics.forward_kinematics_batch(joints_array)
+        self.assertEqual(tips.shape, (20, 4, 4))
+        for joints, tip in zip(joints_array, tips):
+            np.testing.assert_almost_equal(tip, self.kinematics.forward_kinematics(joints))
+        np.testing.assert_almost_equal(self.kinematics.positions_batch(joints_array), tips[:, :3, 3])
+
+    def test_jacobian(self):
+        joints = np.array([0.2, -0.3, 0.4, 0.1, -0.5, 0.6])
+        jac, tip = self.kinematics.jacobian(joints)
+        epsilon = 1e-6
+        for i in range(6):
+            shifted = joints.copy()
+            shifted[i] += epsilon
+            tip_shifted = self.kinematics.forward_kinematics(shifted)
+            np.testing.assert_almost_equal((tip_shifted[:3, 3] - tip[:3, 3]) / epsilon, jac[:3, i], decimal=4)
+
+    def test_inverse_kinematics(self):
+        random_state = np.random.RandomState(42)
+        lower, upper = self.kinematics.get_joints_limits()
+        for _ in range(10):
+            joints = lower + random_state.random_sample(6) * (upper - lower)
+            target = self.kinematics.forward_kinematics(joints)
+            seed = np.clip(joints + random_state.normal(0.0, 0.2, 6), lower, upper)
+            success, solution = self.kinematics.inverse_kinematics(target, seed)
+            self.assertTrue(success)
+            reached = self.kinematics.forward_kinematics(solution)
+            np.testing.assert_almost_equal(reached[:3, 3], target[:3, 3], decimal=3)
+            np.testing.assert_almost_equal(reached[:3, :3], target[:3, :3], decimal=2)
+
+    def test_inverse_kinematics_batch(self):
+        path = [[0.1 * i, -0.2, 0.3, 0.0, -0.4 + 0.05 * i, 0.2] for i in range(5)]
+        targets = list(self.kinematics.forward_kinematics_batch(path))
+        success, solutions = self.kinematics.inverse_kinematics_batch(targets, path[0])
+        self.assertTrue(success)
+        self.assertEqual(len(solutions), 5)
+        for target, solution in zip(targets, solutions):
+            np.testing.assert_almost_equal(self.kinematics.forward_kinematics(solution)[:3, 3], target[:3, 3],
+                                           decimal=3)
+
+        targets.insert(2, homogeneous_matrix(np.identity(3), [2.0, 0.0, 0.0]))
+        success, solutions = self.kinematics.inverse_kinematics_batch(targets, path[0])
+        self.assertFalse(success)
+        self.assertEqual(len(solutions), 2)
+
+    def test_differential_inverse_kinematics(self):
+        seed = [0.2, -0.3, 0.4, 0.1, -0.5, 0.6]
+        target = self.kinematics.forward_kinematics(seed)
+        target[:3, 3] += [0.01, -0.005, 0.01]
+        target[:3, :3] = np.dot(matrix_from_rpy(0.02, 0.0, -0.02), target[:3, :3])
+        success, solution = self.kinematics.differential_inverse_kinematics(target, seed)
+        self.assertTrue(success)
+        np.testing.assert_almost_equal(self.kinematics.forward_kinematics(solution)[:3, 3], target[:3, 3], decimal=3)
+        self.assertLess(np.max(np.abs(np.array(solution) - seed)), 0.2)
+
+        far_target = homogeneous_matrix(np.identity(3), [2.0, 0.0, 0.0])
+        success, _ = self.kinematics.differential_inverse_kinematics(far_target, seed)
+        self.assertFalse(success)
+
+    def test_inverse_kinematics_unreachable(self):
+        target = homogeneous_matrix(np.identity(3), [2.0, 0.0, 0.0])
+        success, solution = self.kinematics.inverse_kinematics(target, [0.0] * 6)
+        self.assertFalse(success)
+        self.assertEqual(solution, [])
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from niryo_robot_commander.command_enums import ArmCommanderException
+from niryo_robot_commander.limits_validation import LimitsValidator, get_first_violation
+
+INVALID_PARAMETERS = -30
+
+
+class TestLimitsValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.joints = LimitsValidator(["joint_1", "joint_2", "joint_3"], [-1.0, -0.5, None], [1.0, 0.5, None],
+                                      "{} not in range ({}, {})", INVALID_PARAMETERS)
+        self.positions = LimitsValidator(['x', 'y', 'z'], [0.1, -0.5, 0], [0.5, 0.5, 0.6],
+                                         "{} not in range ( {} , {} )", INVALID_PARAMETERS)
+
+    def test_get_first_violation(self):
+        lower, upper = np.array([-1.0, -1.0]), np.array([1.0, 1.0])
+        self.assertIsNone(get_first_violation(np.array([[0.0, 0.0], [1.0, -1.0]]), lower, upper))
+        self.assertEqual(get_first_violation(np.array([[0.0, 0.0], [0.5, 1.5], [2.0, 2.0]]), lower, upper), (1, 1))
+        self.assertIsNone(get_first_violation(np.zeros((0, 2)), lower, upper))
+        self.assertEqual(get_first_violation(np.array([[0.0, 0.0], [np.nan, 0.0]]), lower, upper), (1, 0))
+
+    def test_validate_joints_trajectory(self):
+        trajectory = np.linspace([0.0, 0.0, 10.0], [0.9, 0.7, -10.0], 10)
+        self.joints.validate(trajectory[:7], "joint")
+        self.assertEqual(self.joints.get_first_violation(trajectory), (7, 1))
+        with self.assertRaises(ArmCommanderException) as context:
+            self.joints.validate(trajectory, "joint")
+        self.assertEqual(context.exception.status, INVALID_PARAMETERS)
+        self.assertEqual(context.exception.message, "joint_2 not in range (-0.5, 0.5) at joint 7")
+
+    def test_validate_positions(self):
+        self.positions.validate([[0.3, 0.0, 0.2], [0.5, 0.5, 0.0]], "position")
+        self.positions.validate([], "position")
+        with self.assertRaises(ArmCommanderException) as context:
+            self.positions.validate([[0.3, 0.0, 0.2], [0.3, 0.0, -0.1]], "position")
+        self.assertEqual(context.exception.message, "z not in range ( 0 , 0.6 ) at position 1")
+
+    def test_single_point_message(self):
+        with self.assertRaises(ArmCommanderException) as context:
+            self.joints.validate([[1.5, 0.0, 0.0]])
+        self.assertEqual(context.exception.message, "joint_1 not in range (-1.0, 1.0)")
+
+    def test_nan(self):
+        # Joints without limits still reject NaN
+        self.assertEqual(self.joints.get_first_violation([[0.0, 0.0, 0.0], [0.0, 0.0, np.nan]]), (1, 2))
+        self.assertRaises(ArmCommanderException, self.positions.validate, [[0.3, np.nan, 0.2]])
+
+    def test_invalid_shape(self):
+        self.assertRaises(ArmCommanderException, self.positions.validate, [[0.3, 0.0]])
+        self.assertRaises(ArmCommanderException, self.positions.validate, [0.3, 0.0, 0.2])
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
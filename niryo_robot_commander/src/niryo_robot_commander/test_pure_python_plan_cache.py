@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+import unittest
+
+from niryo_robot_commander.plan_cache import PlanCache
+
+
+class TestPlanCacheMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PlanCache(2, 0.002, 0.0005)
+
+    def test_quantized_key(self):
+        key = self.cache.make_key([0.0, 0.5, -1.25], 11, [0.1, 0.2])
+        self.assertEqual(key, self.cache.make_key([0.0004, 0.5006, -1.2502], 11, [0.1001, 0.2]))
+        self.assertNotEqual(key, self.cache.make_key([0.01, 0.5, -1.25], 11, [0.1, 0.2]))
+        self.assertNotEqual(key, self.cache.make_key([0.0, 0.5, -1.25], 12, [0.1, 0.2]))
+
+    def test_hits_and_misses(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.add("a", "plan_a")
+        self.assertEqual(self.cache.get("a"), "plan_a")
+        self.assertEqual(self.cache.get_stats(), (1, 1, 1, 2))
+
+    def test_least_recently_used_eviction(self):
+        self.cache.add("a", "plan_a")
+        self.cache.add("b", "plan_b")
+        self.cache.get("a")
+        self.cache.add("c", "plan_c")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), "plan_a")
+        self.assertEqual(self.cache.get("c"), "plan_c")
+
+    def test_timings(self):
+        self.cache.add_timing("a", (1.0, 1.0), "timed_a")
+        self.assertIsNone(self.cache.get_timing("a", (1.0, 1.0)))
+        self.cache.add("a", "plan_a")
+        self.cache.add_timing("a", (1.0, 1.0), "timed_a")
+        self.cache.add_timing("a", (0.5, 1.0), "timed_a_slow")
+        self.assertEqual(self.cache.get_timing("a", (1.0, 1.0)), "timed_a")
+        self.assertEqual(self.cache.get_timing("a", (0.5, 1.0)), "timed_a_slow")
+        # A new path replaces its timings
+        self.cache.add("a", "plan_a_bis")
+        self.assertIsNone(self.cache.get_timing("a", (1.0, 1.0)))
+        self.cache.add("b", "plan_b")
+        self.cache.add_timing("b", (1.0, 1.0), "timed_b")
+        self.cache.add("c", "plan_c")
+        self.cache.add("d", "plan_d")
+        self.assertIsNone(self.cache.get_timing("b", (1.0, 1.0)))
+
+    def test_disabled(self):
+        cache = PlanCache(0, 0.002, 0.0005)
+        cache.add("a", "plan_a")
+        self.assertFalse(cache.is_enabled())
+        self.assertIsNone(cache.get("a"))
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import unittest
+import os
+import tempfile
+import numpy as np
+
+from niryo_robot_commander.pose_roadmap import PoseRoadmap
+from niryo_robot_commander.kinematics import homogeneous_matrix, matrix_from_rpy
+
+
+def create_node(name, joints, xyz, rpy):
+    return name, joints, homogeneous_matrix(matrix_from_rpy(*rpy), xyz)
+
+
+NODES = [
+    create_node("home", [0.0] * 6, [0.3, 0.0, 0.4], [0.0, 1.57, 0.0]),
+    create_node("pick", [0.5, -0.3, 0.1, 0.0, -1.0, 0.0], [0.25, 0.1, 0.1], [0.0, 1.57, 0.5]),
+    create_node("place", [-0.5, -0.3, 0.1, 0.0, -1.0, 0.0], [0.25, -0.1, 0.1], [0.0, 1.57, -0.5]),
+]
+
+
+def straight_path(start_joints, end_joints):
+    if end_joints == NODES[2][1] and start_joints == NODES[1][1]:
+        return None
+    return np.linspace(0.0, 1.0, 5), np.linspace(start_joints, end_joints, 5)
+
+
+class TestPoseRoadmap(unittest.TestCase):
+
+    def setUp(self):
+        self.roadmap = PoseRoadmap(0.01, 0.001, 0.01)
+        self.failures = self.roadmap.build(NODES, "scene", straight_path)
+
+    def test_build(self):
+        self.assertEqual(self.failures, [("pick", "place")])
+        self.assertEqual(self.roadmap.get_size(), (3, 5))
+        self.assertEqual(self.roadmap.get_scene_signature(), "scene")
+
+    def test_find_path_to_joints(self):
+        start = np.array(NODES[0][1]) + 0.005
+        times, positions = self.roadmap.find_path_to_joints(start, NODES[1][1])
+        self.assertEqual(len(times), 5)
+        np.testing.assert_almost_equal(positions[-1], NODES[1][1])
+
+        self.assertIsNone(self.roadmap.find_path_to_joints(np.array(NODES[0][1]) + 0.05, NODES[1][1]))
+        self.assertIsNone(self.roadmap.find_path_to_joints(NODES[1][1], NODES[2][1]))
+
+    def test_find_path_to_pose(self):
+        target = homogeneous_matrix(matrix_from_rpy(0.0, 1.57, 0.5), [0.2515, 0.1, 0.1])
+        self.assertIsNone(self.roadmap.find_path_to_pose(NODES[0][1], target))
+        target[0, 3] = 0.2501
+        _, positions = self.roadmap.find_path_to_pose(NODES[0][1], target)
+        np.testing.assert_almost_equal(positions[-1], NODES[1][1])
+
+        target = homogeneous_matrix(matrix_from_rpy(0.0, 1.57, 0.6), [0.25, 0.1, 0.1])
+        self.assertIsNone(self.roadmap.find_path_to_pose(NODES[0][1], target))
+
+    def test_save_load(self):
+        file_path = os.path.join(tempfile.mkdtemp(), "roadmap.json")
+        self.roadmap.save(file_path)
+        loaded = PoseRoadmap(0.01, 0.001, 0.01)
+        loaded.load(file_path)
+        self.assertEqual(loaded.get_size(), (3, 5))
+        self.assertEqual(loaded.get_scene_signature(), "scene")
+        _, positions = loaded.find_path_to_joints(NODES[2][1], NODES[0][1])
+        np.testing.assert_almost_equal(positions[-1], NODES[0][1])
+
+        loaded.clear()
+        self.assertTrue(loaded.is_empty())
+        self.assertIsNone(loaded.find_path_to_joints(NODES[2][1], NODES[0][1]))
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import unittest
+import numpy as np
+
+from niryo_robot_commander.streamed_trajectory import join_chunks, get_divergence_time
+from niryo_robot_commander.time_parameterization import time_optimal_parameterization
+
+MAX_VELOCITIES = [1.0, 0.5, 1.0]
+MAX_ACCELERATIONS = [2.0, 2.0, 1.0]
+
+
+def get_chunks():
+    angles = np.linspace(0.0, np.pi, 301)
+    path = np.column_stack((np.cos(angles), np.sin(angles), angles / 2.0))
+    # Each chunk starts with the last point of the previous one
+    return [path[:51], path[50:151], path[150:]], path
+
+
+class TestStreamedTrajectory(unittest.TestCase):
+
+    def test_join_chunks(self):
+        chunks, path = get_chunks()
+        positions, joins = join_chunks(chunks)
+        np.testing.assert_almost_equal(positions, path)
+        self.assertEqual(joins, [50, 150])
+
+        positions, joins = join_chunks([chunks[0], np.vstack((chunks[1][:1], chunks[1]))])
+        np.testing.assert_almost_equal(positions, path[:151])
+        self.assertEqual(joins, [50])
+
+    def test_no_stop_at_joins(self):
+        chunks, _ = get_chunks()
+        positions, joins = join_chunks(chunks)
+        _, times, velocities, _ = time_optimal_parameterization(positions, MAX_VELOCITIES, MAX_ACCELERATIONS)
+        self.assertEqual(len(times), len(positions))
+        for index in joins:
+            self.assertGreater(np.linalg.norm(velocities[index]), 0.1)
+        np.testing.assert_almost_equal(velocities[[0, -1]], 0.0)
+
+    def test_divergence_time(self):
+        chunks, _ = get_chunks()
+        first_times = time_optimal_parameterization(join_chunks(chunks[:1])[0], MAX_VELOCITIES,
+                                                    MAX_ACCELERATIONS)[1]
+        times = time_optimal_parameterization(join_chunks(chunks)[0], MAX_VELOCITIES, MAX_ACCELERATIONS)[1]
+        divergence_time = get_divergence_time(first_times, times)
+        # Both timings only differ where the first chunk alone brakes
+        self.assertGreater(divergence_time, first_times[-1] / 2.0)
+        self.assertLess(divergence_time, first_times[-1])
+        nb_same = int(np.searchsorted(first_times, divergence_time)) + 1
+        np.testing.assert_almost_equal(times[:nb_same], first_times[:nb_same])
+        self.assertEqual(get_divergence_time(first_times, first_times), first_times[-1])
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+import unittest
+import time
+import numpy as np
+
+from niryo_robot_commander.tool_triggers import ToolTriggerScheduler
+
+SUCCESS = 1
+FAILURE = -1
+
+
+class TestToolTriggerScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+
+    def send(self, command):
+        self.sent.append((command, time.time()))
+        return (FAILURE, "failed") if command == "fail" else (SUCCESS, "ok")
+
+    def create_scheduler(self):
+        scheduler = ToolTriggerScheduler(self.send, SUCCESS, 0.01)
+        scheduler.start()
+        return scheduler
+
+    def test_timed_commands(self):
+        scheduler = self.create_scheduler()
+        scheduler.add_at_time(0.1, "close")
+        scheduler.add_at_time(0.0, "open")
+        scheduler.add_after_motion("release")
+        start = time.time()
+        scheduler.on_trajectory_start(start, [0.0, 1.0])
+        time.sleep(0.2)
+        self.assertEqual([command for command, _ in self.sent], ["open", "close"])
+        self.assertGreaterEqual(self.sent[1][1] - start, 0.1)
+
+        scheduler.on_motion_end()
+        self.assertTrue(scheduler.join(1.0))
+        self.assertEqual([command for command, _ in self.sent], ["open", "close", "release"])
+        self.assertEqual(scheduler.get_results(), [(SUCCESS, "ok")] * 3)
+
+    def test_waypoints(self):
+        scheduler = self.create_scheduler()
+        scheduler.add_at_waypoint([1.0, 0.0, 0.0], "first")
+        scheduler.add_at_waypoint([1.0, 0.0, 0.0], "same")
+        scheduler.add_at_waypoint([5.0, 0.0, 0.0], "not found")
+        self.assertTrue(scheduler.has_pending_waypoints())
+
+        times = np.linspace(0.0, 0.2, 21)
+        tip_positions = np.zeros((21, 3))
+        tip_positions[:, 0] = np.linspace(0.0, 2.0, 21)
+        start = time.time()
+        scheduler.on_trajectory_start(start, times, tip_positions)
+        self.assertTrue(scheduler.has_pending_waypoints())
+        time.sleep(0.15)
+        self.assertEqual([command for command, _ in self.sent], ["first", "same"])
+        self.assertGreaterEqual(self.sent[0][1] - start, 0.1)
+
+        scheduler.on_motion_end()
+        self.assertTrue(scheduler.join(1.0))
+        self.assertEqual(self.sent[-1][0], "not found")
+
+    def test_timed_commands_without_trajectory(self):
+        scheduler = self.create_scheduler()
+        scheduler.add_at_time(0.5, "close")
+        scheduler.add_at_time(0.0, "open")
+        scheduler.add_after_motion("release")
+        scheduler.on_motion_end()
+        self.assertTrue(scheduler.join(1.0))
+        self.assertEqual([command for command, _ in self.sent], ["open", "close", "release"])
+
+    def test_failure_cancels_next_commands(self):
+        scheduler = self.create_scheduler()
+        scheduler.add_at_time(0.0, "fail")
+        scheduler.add_after_motion("release")
+        scheduler.on_trajectory_start(time.time(), [0.0])
+        self.assertTrue(scheduler.join(1.0))
+        scheduler.on_motion_end()
+        self.assertEqual(scheduler.get_results(), [(FAILURE, "failed")])
+
+    def test_stop(self):
+        scheduler = self.create_scheduler()
+        scheduler.add_at_time(10.0, "close")
+        scheduler.on_trajectory_start(time.time(), [0.0])
+        scheduler.stop()
+        self.assertTrue(scheduler.join(1.0))
+        self.assertEqual(self.sent, [])
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
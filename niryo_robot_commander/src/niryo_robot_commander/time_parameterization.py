@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+
+class TimeParameterizationException(Exception):
+    pass
+
+
+def time_optimal_parameterization(positions, max_velocities, max_accelerations):
+    """
+    Time the geometric path given by positions as fast as joints velocity and acceleration limits allow
+    The path speed profile is bounded by the velocity limits and by the curvature of the path,
+    then integrated forward with the maximum acceleration and backward with the maximum deceleration
+    The path starts and ends at rest
+
+    :param positions: Nx(dof) joints positions along the path, close enough to be linearly interpolated
+    :type positions: numpy.array
+    :param max_velocities: velocity limit of each joint (rad/s)
+    :type max_velocities: list[float]
+    :param max_accelerations: acceleration limit of each joint (rad/s^2)
+    :type max_accelerations: list[float]
+    :return: positions kept (duplicated points are removed), their times, velocities and accelerations
+    :rtype: (numpy.array, numpy.array, numpy.array, numpy.array)
+    """
+    positions = np.atleast_2d(np.asarray(positions, dtype=float))
+    max_velocities = np.asarray(max_velocities, dtype=float)
+    max_accelerations = np.asarray(max_accelerations, dtype=float)
+    if positions.shape[1] != len(max_velocities) or positions.shape[1] != len(max_accelerations):
+        raise TimeParameterizationException("Limits must be given for the {} joints".format(positions.shape[1]))
+    if np.any(max_velocities <= 0) or np.any(max_accelerations <= 0):
+        raise TimeParameterizationException("Velocity and acceleration limits must be positive")
+
+    # Duplicated points do not belong to the path
+    steps = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+    positions = positions[np.concatenate(([True], steps > 1e-9))]
+    if len(positions) < 2:
+        return positions, np.zeros(1), np.zeros_like(positions), np.zeros_like(positions)
+
+    # Path derivatives according to the curvilinear abscissa s
+    ds = np.linalg.norm(np.diff(positions, axis=0), axis=1)
+    s = np.concatenate(([0.0], np.cumsum(ds)))
+    first_derivative = np.gradient(positions, s, axis=0)
+    second_derivative = np.gradient(first_derivative, s, axis=0)
+    abs_first = np.maximum(np.abs(first_derivative), 1e-9)
+    abs_second = np.abs(second_derivative)
+
+    # Max path speed from joints velocities, and from centripetal accelerations keeping half of the
+    # acceleration budget for the tangential acceleration
+    speed_limit = np.min(max_velocities / abs_first, axis=1)
+    with np.errstate(divide='ignore'):
+        curvature_limit = np.min(np.sqrt(max_accelerations / (2.0 * np.maximum(abs_second, 1e-12))), axis=1)
+    speed_limit = np.minimum(speed_limit, curvature_limit)
+
+    def max_path_acceleration(index, speed):
+        budget = np.maximum(max_accelerations - abs_second[index] * speed ** 2, 0.0)
+        return np.min(budget / abs_first[index])
+
+    nb_points = len(positions)
+    speeds = speed_limit.copy()
+    speeds[0] = speeds[-1] = 0.0
+    # Forward pass : accelerate as much as possible
+    for i in range(nb_points - 1):
+        reachable = np.sqrt(speeds[i] ** 2 + 2.0 * ds[i] * max_path_acceleration(i, speeds[i]))
+        speeds[i + 1] = min(speeds[i + 1], reachable)
+    # Backward pass : be able to brake before each limit
+    for i in range(nb_points - 1, 0, -1):
+        reachable = np.sqrt(speeds[i] ** 2 + 2.0 * ds[i - 1] * max_path_acceleration(i, speeds[i]))
+        speeds[i - 1] = min(speeds[i - 1], reachable)
+
+    mean_speeds = (speeds[:-1] + speeds[1:]) / 2.0
+    if np.any(mean_speeds <= 0):
+        raise TimeParameterizationException("Path cannot be followed within the limits")
+    times = np.concatenate(([0.0], np.cumsum(ds / mean_speeds)))
+
+    path_accelerations = np.zeros(nb_points)
+    path_accelerations[:-1] = (speeds[1:] ** 2 - speeds[:-1] ** 2) / (2.0 * ds)
+    velocities = first_derivative * speeds[:, np.newaxis]
+    accelerations = first_derivative * path_accelerations[:, np.newaxis] + \
+        second_derivative * (speeds ** 2)[:, np.newaxis]
+    velocities[0] = velocities[-1] = 0.0
+    accelerations[-1] = 0.0
+    return positions, times, velocities, accelerations
+
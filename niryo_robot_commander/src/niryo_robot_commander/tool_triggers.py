@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import threading
+import time
+
+import numpy as np
+
+
+class ToolTriggerScheduler(object):
+    """
+    Send tool commands at given moments of an arm motion, while the arm moves
+    A tool command can be triggered at a time from the start of the motion, when the trajectory reaches a waypoint,
+    or after the end of the motion. Commands are sent one after the other by a worker thread, in time order
+    Times are relative to the start of the first trajectory of the motion, waypoints are found on each trajectory
+    sent. A waypoint not found on any trajectory is triggered after the end of the motion
+    """
+
+    def __init__(self, send_tool_command, success_status, waypoint_tolerance, clock=time.time):
+        """
+        :param send_tool_command: function sending a tool command and waiting for its end.
+                                  It returns status, message
+        :param success_status: status of a command which succeeded. The next commands are canceled after a failure
+        :type success_status: int
+        :param waypoint_tolerance: max distance (m) between a waypoint and the closest trajectory point
+        :type waypoint_tolerance: float
+        :param clock: function giving the current time, in the same time base as the trajectories start
+        """
+        self.__send_tool_command = send_tool_command
+        self.__success_status = success_status
+        self.__waypoint_tolerance = waypoint_tolerance
+        self.__clock = clock
+
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(target=self.__run, name="worker_tool_triggers")
+        self.__thread.daemon = True
+        # Timed commands : [time from start, order, command]
+        self.__timed = []
+        # Waypoint commands waiting to be found on a trajectory : [position, order, command]
+        self.__waypoints = []
+        # Commands sent after the motion : [order, command]
+        self.__after_motion = []
+        self.__scheduled = []  # [absolute time, order, command]
+        self.__nb_commands = 0
+        self.__motion_start = None
+        self.__motion_ended = False
+        self.__stopped = False
+        self.__results = []
+
+    def add_at_time(self, time_from_start, command):
+        self.__add(self.__timed, [max(time_from_start, 0.0), self.__nb_commands, command])
+
+    def add_at_waypoint(self, position, command):
+        """
+        Waypoints have to be added in the order the trajectory goes through them
+        :param position: x, y, z of the waypoint
+        :type position: list[float]
+        """
+        self.__add(self.__waypoints, [np.array(position, dtype=float), self.__nb_commands, command])
+
+    def add_after_motion(self, command):
+        self.__add(self.__after_motion, [self.__nb_commands, command])
+
+    def __add(self, commands, item):
+        with self.__condition:
+            commands.append(item)
+            self.__nb_commands += 1
+
+    def start(self):
+        self.__thread.start()
+
+    def has_pending_waypoints(self):
+        with self.__condition:
+            return bool(self.__waypoints)
+
+    def on_trajectory_start(self, start_time, times, tip_positions=None):
+        """
+        Schedule the commands triggered during a trajectory
+        :param start_time: time at which the trajectory is sent
+        :type start_time: float
+        :param times: times from start of the trajectory points
+        :type times: list[float]
+        :param tip_positions: Nx3 end effector positions of the trajectory points. Only needed
+                              if has_pending_waypoints
+        :type tip_positions: numpy.array
+        :return: None
+        """
+        with self.__condition:
+            if self.__motion_start is None:
+                self.__motion_start = start_time
+                self.__scheduled.extend([self.__motion_start + time_from_start, order, command]
+                                        for time_from_start, order, command in self.__timed)
+                self.__timed = []
+            if self.__waypoints and tip_positions is not None and len(tip_positions):
+                tip_positions = np.array(tip_positions, dtype=float)
+                first_index = 0
+                while self.__waypoints:
+                    position, order, command = self.__waypoints[0]
+                    distances = np.linalg.norm(tip_positions[first_index:] - position, axis=1)
+                    index = int(np.argmin(distances))
+                    if distances[index] > self.__waypoint_tolerance:
+                        break
+                    first_index += index
+                    self.__scheduled.append([start_time + times[first_index], order, command])
+                    self.__waypoints.pop(0)
+            self.__condition.notify_all()
+
+    def on_motion_end(self):
+        """
+        The motion succeeded : the commands after the motion can be sent, after the ones which were not triggered
+        during the motion (timed commands if no trajectory started, then waypoints not found)
+        """
+        with self.__condition:
+            self.__after_motion = [[order, command] for _, order, command in sorted(self.__timed)] + \
+                sorted([order, command] for _, order, command in self.__waypoints) + self.__after_motion
+            self.__timed = []
+            self.__waypoints = []
+            self.__motion_ended = True
+            self.__condition.notify_all()
+
+    def stop(self):
+        """
+        Cancel the commands not sent yet. The command being sent is not interrupted
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+
+    def join(self, timeout=None):
+        """
+        Wait for the worker to finish
+        :return: False if the timeout happened
+        :rtype: bool
+        """
+        if self.__thread.is_alive():
+            self.__thread.join(timeout)
+        return not self.__thread.is_alive()
+
+    def get_results(self):
+        """
+        :return: status and message of each command sent, in the order they were sent
+        :rtype: list[(int, str)]
+        """
+        with self.__condition:
+            return list(self.__results)
+
+    def __next_command(self):
+        """
+        Wait until a command has to be sent
+        :return: the command, None if there is nothing more to send
+        """
+        with self.__condition:
+            while not self.__stopped:
+                if self.__scheduled:
+                    index = min(range(len(self.__scheduled)), key=lambda i: self.__scheduled[i][:2])
+                    delay = self.__scheduled[index][0] - self.__clock()
+                    if delay <= 0.0:
+                        return self.__scheduled.pop(index)[2]
+                    self.__condition.wait(delay)
+                elif self.__motion_ended:
+                    if not self.__after_motion:
+                        return None
+                    return self.__after_motion.pop(0)[1]
+                else:
+                    self.__condition.wait()
+            return None
+
+    def __run(self):
+        while True:
+            command = self.__next_command()
+            if command is None:
+                return
+            status, message = self.__send_tool_command(command)
+            with self.__condition:
+                self.__results.append((status, message))
+            if status != self.__success_status:
+                self.stop()
+                return
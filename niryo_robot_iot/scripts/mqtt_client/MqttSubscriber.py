@@ -9,6 +9,7 @@ from niryo_robot_programs_manager.msg import ProgramLanguage
 
 # Services
 from niryo_robot_msgs.srv import SetBool, Trigger
+from niryo_robot_msgs.service_proxy_pool import call_service
 from niryo_robot_programs_manager.srv import ExecuteProgram, ExecuteProgramRequest
 
 
@@ -47,9 +48,7 @@ class MqttSubscriber:
 
     @staticmethod
     def __call_ros_service(topic_name, service_type, success_message, req=None):
-        rospy.wait_for_service(topic_name)
-        service_function = rospy.ServiceProxy(topic_name, service_type)
-        res = service_function(req) if req is not None else service_function()
+        res = call_service(topic_name, service_type, req) if req is not None else call_service(topic_name, service_type)
         if res.status < 0:
             rospy.logwarn(res.message)
         else:
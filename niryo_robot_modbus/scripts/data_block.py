@@ -2,6 +2,7 @@
 
 import rospy
 
+from niryo_robot_msgs.service_proxy_pool import call_service
 from pymodbus.datastore import ModbusSparseDataBlock
 
 
@@ -21,16 +22,8 @@ class DataBlock(ModbusSparseDataBlock):
 
     @staticmethod
     def call_ros_service(service_name, service_msg_type, *args):
-        # Connect to service
+        # Connect to service (first call only) and call it through a persistent connection
         try:
-            rospy.wait_for_service(service_name, 0.1)
-        except rospy.ROSException, e:
-            return
-
-            # Call service
-        try:
-            service = rospy.ServiceProxy(service_name, service_msg_type)
-            response = service(*args)
-            return response
-        except rospy.ServiceException, e:
+            return call_service(service_name, service_msg_type, *args, timeout=0.1)
+        except (rospy.ROSException, rospy.ServiceException), e:
             return
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Shared pool of persistent ROS service proxies
+
+Creating a rospy.ServiceProxy costs a master lookup and a new TCP connection at each call.
+This pool keeps one persistent proxy per (service name, service type) for the whole process :
+- proxies are created lazily, the first call waits for the service like rospy.wait_for_service
+- calls on the same proxy are serialized (a persistent connection handles one request at a time)
+- if the connection is broken (provider restarted), the proxy is rebuilt. The call is sent again once if it failed
+  to connect, or on any transport error if the caller marks the service as idempotent with retry=True
+"""
+
+import threading
+
+import rospy
+from rospy.exceptions import TransportException
+
+
+class ServiceProxyPool(object):
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # (service name, service type) -> [proxy, lock of the proxy]
+        self.__proxies = {}
+
+    def get_proxy(self, service_name, service_type, timeout=None):
+        """
+        Get the persistent proxy of a service, create it if needed
+
+        :param service_name: name of the service
+        :type service_name: str
+        :param service_type: service class
+        :param timeout: timeout (in seconds) to wait for the service on creation. None waits forever
+        :type timeout: float
+        :raises rospy.ROSException: if the service is not available before the timeout
+        :return: proxy, lock to hold during a call
+        :rtype: (rospy.ServiceProxy, threading.Lock)
+        """
+        key = (service_name, service_type)
+        with self.__lock:
+            entry = self.__proxies.get(key)
+        if entry is not None:
+            return entry
+
+        rospy.wait_for_service(service_name, timeout)
+        with self.__lock:
+            if key not in self.__proxies:
+                self.__proxies[key] = [rospy.ServiceProxy(service_name, service_type, persistent=True),
+                                       threading.Lock()]
+            return self.__proxies[key]
+
+    def call(self, service_name, service_type, *args, **kwargs):
+        """
+        Call a service through its persistent proxy
+
+        :param service_name: name of the service
+        :type service_name: str
+        :param service_type: service class
+        :param args: request arguments, as given to a rospy.ServiceProxy
+        :param kwargs: 'timeout' (in seconds) to wait for the service if the proxy has to be created.
+                       'retry' (False by default) : True if the service is idempotent, so that the call can be sent
+                       again after any transport error
+        :raises rospy.ROSException: if the service is not available before the timeout
+        :raises rospy.ServiceException: if the call failed
+        :return: service response
+        """
+        timeout = kwargs.pop('timeout', None)
+        retry = kwargs.pop('retry', False)
+        proxy, proxy_lock = self.get_proxy(service_name, service_type, timeout)
+        try:
+            with proxy_lock:
+                return proxy(*args, **kwargs)
+        except (TransportException, rospy.ServiceException) as e:
+            self.invalidate(service_name, service_type)
+            if not (self.__is_connection_error(e) if retry else self.__is_unsent_request_error(e)):
+                raise
+            rospy.logdebug("Service Proxy Pool - Connection to {} lost, reconnecting : {}".format(service_name, e))
+
+        proxy, proxy_lock = self.get_proxy(service_name, service_type, timeout)
+        try:
+            with proxy_lock:
+                return proxy(*args, **kwargs)
+        except TransportException as e:
+            self.invalidate(service_name, service_type)
+            raise rospy.ServiceException("transport error completing service call: {}".format(e))
+        except rospy.ServiceException:
+            self.invalidate(service_name, service_type)
+            raise
+
+    def invalidate(self, service_name, service_type):
+        """
+        Close and forget the proxy of a service. The next call will reconnect
+        """
+        with self.__lock:
+            entry = self.__proxies.pop((service_name, service_type), None)
+        if entry is not None:
+            entry[0].close()
+
+    def clear(self):
+        """
+        Close all the proxies
+        """
+        with self.__lock:
+            entries = self.__proxies.values()
+            self.__proxies = {}
+        for proxy, _ in entries:
+            proxy.close()
+
+    @staticmethod
+    def __is_unsent_request_error(exception):
+        """
+        The connection to the provider failed, so the request has not been sent and can be resent safely
+        """
+        return str(exception).startswith("unable to connect")
+
+    @classmethod
+    def __is_connection_error(cls, exception):
+        """
+        A transport error can happen after the provider processed the request (connection closed before the response
+        is read), so the request can only be resent to idempotent services.
+        Errors raised by the service handler are never retried
+        """
+        if isinstance(exception, TransportException):
+            return True
+        return str(exception).startswith("transport error") or cls.__is_unsent_request_error(exception)
+
+
+__service_proxy_pool = ServiceProxyPool()
+
+
+def get_service_proxy_pool():
+    """
+    :return: the pool shared by the whole process
+    :rtype: ServiceProxyPool
+    """
+    return __service_proxy_pool
+
+
+def call_service(service_name, service_type, *args, **kwargs):
+    """
+    Call a service with the shared pool. See ServiceProxyPool.call
+    """
+    return __service_proxy_pool.call(service_name, service_type, *args, **kwargs)
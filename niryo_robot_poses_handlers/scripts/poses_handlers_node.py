@@ -4,7 +4,7 @@
 import rospy
 
 from transform_handler import TransformHandler
-from niryo_robot_poses_handlers.transform_functions import euler_from_quaternion
+from niryo_robot_poses_handlers.transform_functions import euler_from_quaternion, quaternion_matrix
 from niryo_robot_poses_handlers.file_manager import NiryoRobotFileException
 from niryo_robot_poses_handlers.grip_manager import GripManager
 from niryo_robot_poses_handlers.pose_manager import PoseManager
@@ -23,7 +23,7 @@ from niryo_robot_poses_handlers.msg import NiryoPose
 # Services
 from niryo_robot_msgs.srv import GetNameDescriptionList
 
-from niryo_robot_poses_handlers.srv import GetTargetPose
+from niryo_robot_poses_handlers.srv import GetTargetPose, GetTargetPoses
 from niryo_robot_poses_handlers.srv import GetWorkspaceRatio
 from niryo_robot_poses_handlers.srv import GetWorkspaceRobotPoses
 from niryo_robot_poses_handlers.srv import ManageWorkspace
@@ -64,6 +64,8 @@ class PoseHandlerNode:
         self.__grip_manager = GripManager(grip_dir, self.__tool_id_gripname_dict.values())
         rospy.Service('~get_target_pose', GetTargetPose,
                       self.__callback_target_pose)
+        rospy.Service('~get_target_poses', GetTargetPoses,
+                      self.__callback_target_poses)
 
         # Transform Handlers
         self.__transform_handler = TransformHandler(self.__grip_manager)
@@ -169,6 +171,15 @@ class PoseHandlerNode:
         except Exception as e:
             return CommandStatus.POSES_HANDLER_COMPUTE_FAILURE, str(e), RobotState()
 
+    def __callback_target_poses(self, req):
+        try:
+            grip = self.__tool_id_gripname_dict[req.tool_id] if req.grip == req.GRIP_AUTO else req.grip
+            poses = self.get_target_poses(req.workspace, grip, req.height_offsets,
+                                          req.x_rel, req.y_rel, req.yaw_rel)
+            return CommandStatus.SUCCESS, "Success", poses
+        except Exception as e:
+            return CommandStatus.POSES_HANDLER_COMPUTE_FAILURE, str(e), []
+
     # Position
     def __callback_get_position_list(self, _):
         try:
@@ -325,9 +336,20 @@ class PoseHandlerNode:
         :param y_rel: y relative position of the object inside working zone
         :param yaw_rel: angle of the object inside working zone
         """
+        return self.get_target_poses(workspace, grip, [height_offset], x_rel, y_rel, yaw_rel)[0]
+
+    def get_target_poses(self, workspace, grip, height_offsets, x_rel, y_rel, yaw_rel):
+        """
+        Computes the robot poses above an object at several heights, e.g. its approach and pick poses.
+        The workspace and the grip are read once, and the gripping transform is computed once :
+        height offsets are translations along the z axis of the object.
+
+        See arguments of 'get_target_pose'
+        :param height_offsets: z-offsets that are added to the grip
+        :return: one robot pose per height offset
+        """
         current_ws = self.__ws_manager.read(workspace)
         current_grip = self.__grip_manager.read(grip)
-        current_grip.transform.transform.translation.z += height_offset
 
         self.__transform_handler.set_grip(current_grip)
         self.__transform_handler.set_relative_pose_object(current_ws, x_rel, y_rel, yaw_rel,
@@ -335,18 +357,23 @@ class PoseHandlerNode:
 
         base_link_to_tool_target = self.__transform_handler.get_gripping_transform()
         q = base_link_to_tool_target.transform.rotation
-
         roll, pitch, yaw = euler_from_quaternion([q.x, q.y, q.z, q.w])
 
-        pose = RobotState()
-        pose.position.x = base_link_to_tool_target.transform.translation.x
-        pose.position.y = base_link_to_tool_target.transform.translation.y
-        pose.position.z = base_link_to_tool_target.transform.translation.z
-        pose.rpy.roll = roll
-        pose.rpy.pitch = pitch
-        pose.rpy.yaw = yaw
+        q_object = self.__transform_handler.get_object_base_transform().transform.rotation
+        object_z_axis = quaternion_matrix([q_object.x, q_object.y, q_object.z, q_object.w])[:3, 2]
 
-        return pose
+        poses = []
+        for height_offset in height_offsets:
+            pose = RobotState()
+            pose.position.x = base_link_to_tool_target.transform.translation.x + height_offset * object_z_axis[0]
+            pose.position.y = base_link_to_tool_target.transform.translation.y + height_offset * object_z_axis[1]
+            pose.position.z = base_link_to_tool_target.transform.translation.z + height_offset * object_z_axis[2]
+            pose.rpy.roll = roll
+            pose.rpy.pitch = pitch
+            pose.rpy.yaw = yaw
+            poses.append(pose)
+
+        return poses
 
     # -- Pose
     def create_pose(self, name, description, joints, point, rpy, quaternion):
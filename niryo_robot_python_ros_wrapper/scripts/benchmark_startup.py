@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+# Measure the start time of a Python program using the wrapper : module import (in a new interpreter),
+# NiryoRosWrapper construction and first reads of the joints and the pose
+# Usage : rosrun niryo_robot_python_ros_wrapper benchmark_startup.py [--runs N]
+
+import argparse
+import subprocess
+import sys
+import time
+
+import rospy
+
+IMPORT_COMMAND = "import time; start = time.time(); " \
+                 "import niryo_robot_python_ros_wrapper.ros_wrapper; " \
+                 "print(time.time() - start)"
+
+
+def measure_import_time():
+    start = time.time()
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_COMMAND])
+    return float(output.strip()), time.time() - start
+
+
+def format_durations(name, durations):
+    return "{:<28} mean {:>8.1f}ms   min {:>8.1f}ms   max {:>8.1f}ms".format(
+        name, 1000 * sum(durations) / len(durations), 1000 * min(durations), 1000 * max(durations))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the start of a NiryoRosWrapper program")
+    parser.add_argument('--runs', type=int, default=10, help="number of measures")
+    args = parser.parse_args(rospy.myargv()[1:])
+
+    import_times, interpreter_times = zip(*[measure_import_time() for _ in range(args.runs)])
+
+    rospy.init_node('niryo_robot_benchmark_startup')
+    from niryo_robot_python_ros_wrapper.ros_wrapper import NiryoRosWrapper
+
+    NiryoRosWrapper.wait_for_nodes_initialization()
+    init_times, first_joints_times, first_pose_times = [], [], []
+    for _ in range(args.runs):
+        start = time.time()
+        robot = NiryoRosWrapper()
+        init_times.append(time.time() - start)
+
+        start = time.time()
+        robot.get_joints()
+        first_joints_times.append(time.time() - start)
+
+        start = time.time()
+        robot.get_pose()
+        first_pose_times.append(time.time() - start)
+
+    print(format_durations("Interpreter + import", interpreter_times))
+    print(format_durations("Module import", import_times))
+    print(format_durations("NiryoRosWrapper()", init_times))
+    print(format_durations("First get_joints()", first_joints_times))
+    print(format_durations("First get_pose()", first_pose_times))
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+
+# Replay a log recorded with NiryoRosWrapper.start_recording against the simulation
+# and print the latency of each function
+# Usage : rosrun niryo_robot_python_ros_wrapper replay_call_log.py <log file> [--repeat N]
+
+import argparse
+import rospy
+
+from niryo_robot_python_ros_wrapper.ros_wrapper import NiryoRosWrapper
+from niryo_robot_python_ros_wrapper.call_log import read_call_log, replay_calls, format_latency_report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a NiryoRosWrapper calls log")
+    parser.add_argument('log_file', help="log recorded with NiryoRosWrapper.start_recording")
+    parser.add_argument('--repeat', type=int, default=1, help="number of replays of the log")
+    args = parser.parse_args(rospy.myargv()[1:])
+
+    rospy.init_node('niryo_robot_replay_call_log')
+    NiryoRosWrapper.wait_for_nodes_initialization(simulation_mode=True)
+    robot = NiryoRosWrapper()
+
+    calls = read_call_log(args.log_file)
+    replayed = []
+    start = rospy.get_time()
+    for _ in range(args.repeat):
+        replayed += replay_calls(robot, calls)
+    duration = rospy.get_time() - start
+
+    print(format_latency_report(replayed))
+    print("")
+    if calls:
+        print("Recorded program : {:.2f}s".format(calls[-1].end - calls[0].start))
+    print("Replayed program : {:.2f}s ({} calls, {} replays)".format(duration / max(args.repeat, 1),
+                                                                      len(calls), args.repeat))
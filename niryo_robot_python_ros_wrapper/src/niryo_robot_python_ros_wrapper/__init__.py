@@ -1,2 +1,3 @@
 from .ros_wrapper_enums import *
 from .ros_wrapper import NiryoRosWrapper, NiryoRosWrapperException
+from .move_future import MoveFuture, MoveFutureTimeout
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+import collections
+import logging
+import pickle
+import threading
+import time
+
+# One call of the log. end is the time its result was available : the end of the command for futures
+CallRecord = collections.namedtuple('CallRecord',
+                                    ['index', 'name', 'args', 'kwargs', 'result', 'error', 'start', 'end'])
+
+# Latencies histogram bins upper bounds (s)
+LATENCY_BINS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, float('inf')]
+
+
+def is_future(value):
+    return callable(getattr(value, 'add_done_callback', None))
+
+
+class CallRecorder(object):
+    """
+    Write the calls of functions to a binary log : name, arguments, result or error and timing
+    Calls made by a recorded function are not recorded, so that a replay executes them once
+    Arguments and results which cannot be serialized are logged as text. A call which cannot be logged is
+    only reported, the recorded function is not affected
+    """
+
+    def __init__(self, file_path):
+        self.__file = open(file_path, 'wb')
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__next_index = 0
+
+    def wrap(self, name, function):
+        """
+        :return: function recording its calls
+        """
+        def recorded_function(*args, **kwargs):
+            if getattr(self.__local, 'recording', False):
+                return function(*args, **kwargs)
+            self.__local.recording = True
+            start = time.time()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                self.__write(('call', self.__get_index(), name, args, kwargs, None, repr(e), start, time.time()))
+                raise
+            finally:
+                self.__local.recording = False
+            index = self.__get_index()
+            self.__write(('call', index, name, args, kwargs, result, None, start, time.time()))
+            if is_future(result):
+                result.add_done_callback(lambda future: self.__write_future_done(index, future))
+            return result
+
+        return recorded_function
+
+    def __get_index(self):
+        with self.__lock:
+            index = self.__next_index
+            self.__next_index += 1
+            return index
+
+    def __write_future_done(self, index, future):
+        error = future.exception()
+        result = future.result() if error is None else None
+        self.__write(('done', index, None, None, None, result, None if error is None else repr(error), None,
+                      time.time()))
+
+    def __write(self, record):
+        try:
+            data = self.__dumps(record)
+            with self.__lock:
+                if not self.__file.closed:
+                    self.__file.write(data)
+        except Exception:
+            logging.getLogger(__name__).exception("Call of {} could not be recorded".format(record[2]))
+
+    @staticmethod
+    def __dumps(record):
+        try:
+            return pickle.dumps(record, 2)
+        except Exception:
+            pass
+        kind, index, name, args, kwargs, result, error, start, end = record
+        if args is not None:
+            args = tuple(to_picklable(arg) for arg in args)
+        if kwargs is not None:
+            kwargs = dict((key, to_picklable(value)) for key, value in kwargs.items())
+        return pickle.dumps((kind, index, name, args, kwargs, to_picklable(result), error, start, end), 2)
+
+    def close(self):
+        with self.__lock:
+            self.__file.close()
+
+
+def to_picklable(value):
+    """
+    :return: the value, or its text if it cannot be serialized
+    """
+    try:
+        pickle.dumps(value, 2)
+        return value
+    except Exception:
+        return repr(value)
+
+
+def read_call_log(file_path):
+    """
+    :return: calls of the log, ordered by start time
+    :rtype: list[CallRecord]
+    """
+    calls = {}
+    ends = {}
+    with open(file_path, 'rb') as f:
+        while True:
+            try:
+                record = pickle.load(f)
+            except EOFError:
+                break
+            kind, index, name, args, kwargs, result, error, start, end = record
+            if kind == 'done':
+                ends[index] = (result, error, end)
+            else:
+                calls[index] = CallRecord(index, name, args, kwargs, result, error, start, end)
+    for index, (result, error, end) in ends.items():
+        if index in calls:
+            calls[index] = calls[index]._replace(result=result, error=error, end=end)
+    return sorted(calls.values(), key=lambda call: call.start)
+
+
+def replay_calls(target, calls):
+    """
+    Execute the calls of a log on target one after the other. A command returning a future is waited
+    before the first call started after its recorded end, to keep the overlap of the recorded program
+
+    :param target: object the calls are made on
+    :param calls: calls read with read_call_log
+    :type calls: list[CallRecord]
+    :return: name, recorded latency, replayed latency and error of each call
+    :rtype: list[(str, float, float, str)]
+    """
+    replayed = []
+    pending = []
+
+    def wait_futures(before):
+        for call, future, start, ends in list(pending):
+            if before is None or call.end <= before:
+                pending.remove((call, future, start, ends))
+                error = future.exception()
+                end = ends[0] if ends else time.time()
+                replayed.append((call.name, call.end - call.start, end - start,
+                                 None if error is None else repr(error)))
+
+    for call in calls:
+        wait_futures(call.start)
+        start = time.time()
+        try:
+            result = getattr(target, call.name)(*call.args, **call.kwargs)
+        except Exception as e:
+            replayed.append((call.name, call.end - call.start, time.time() - start, repr(e)))
+            continue
+        if is_future(result):
+            ends = []
+            result.add_done_callback(lambda _, ends=ends: ends.append(time.time()))
+            pending.append((call, result, start, ends))
+        else:
+            replayed.append((call.name, call.end - call.start, time.time() - start, None))
+    wait_futures(None)
+    return replayed
+
+
+def format_latency_report(replayed):
+    """
+    :param replayed: result of replay_calls
+    :return: latencies statistics and histogram of each function
+    :rtype: str
+    """
+    latencies = collections.OrderedDict()
+    for name, recorded, latency, error in replayed:
+        latencies.setdefault(name, []).append((recorded, latency, error))
+
+    lines = ["{:<36} {:>6} {:>6} {:>10} {:>10} {:>10} {:>10}".format(
+        "Function", "Calls", "Errors", "Rec. mean", "p50", "p90", "max")]
+    for name, values in latencies.items():
+        replayed_latencies = sorted(latency for _, latency, _ in values)
+        lines.append("{:<36} {:>6} {:>6} {:>9.1f}ms {:>8.1f}ms {:>8.1f}ms {:>8.1f}ms".format(
+            name, len(values), sum(1 for _, _, error in values if error is not None),
+            1000 * sum(recorded for recorded, _, _ in values) / len(values),
+            1000 * percentile(replayed_latencies, 0.5), 1000 * percentile(replayed_latencies, 0.9),
+            1000 * replayed_latencies[-1]))
+
+    lines.append("")
+    lines.append("Replayed latencies histogram (calls per bin)")
+    lines.append("{:<36} ".format("Function") + " ".join("{:>6}".format(format_bin(upper))
+                                                          for upper in LATENCY_BINS))
+    for name, values in latencies.items():
+        counts = [0] * len(LATENCY_BINS)
+        for _, latency, _ in values:
+            counts[next(i for i, upper in enumerate(LATENCY_BINS) if latency <= upper)] += 1
+        lines.append("{:<36} ".format(name) + " ".join("{:>6}".format(count) for count in counts))
+    return "\n".join(lines)
+
+
+def percentile(sorted_values, ratio):
+    return sorted_values[min(len(sorted_values) - 1, int(ratio * len(sorted_values)))]
+
+
+def format_bin(upper):
+    if upper == float('inf'):
+        return "more"
+    if upper < 1.0:
+        return "{:g}ms".format(1000 * upper)
+    return "{:g}s".format(upper)
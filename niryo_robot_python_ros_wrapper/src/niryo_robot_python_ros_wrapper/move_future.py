@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+import logging
+import threading
+
+
+class MoveFutureTimeout(Exception):
+    pass
+
+
+class MoveFuture(object):
+    """
+    Result of a command executed in the background, available once the command is finished
+    With Python 3, it can be awaited in an asyncio coroutine
+    """
+
+    def __init__(self, cancel_function=None):
+        """
+        :param cancel_function: function asking to stop the command
+        """
+        self.__cancel_function = cancel_function
+
+        self.__condition = threading.Condition()
+        self.__done = False
+        self.__result = None
+        self.__exception = None
+        self.__callbacks = []
+
+    def set_result(self, result):
+        """
+        :return: False if the future was already done
+        :rtype: bool
+        """
+        return self.__set(result, None)
+
+    def set_exception(self, exception):
+        """
+        :return: False if the future was already done
+        :rtype: bool
+        """
+        return self.__set(None, exception)
+
+    def __set(self, result, exception):
+        with self.__condition:
+            if self.__done:
+                return False
+            self.__result = result
+            self.__exception = exception
+            self.__done = True
+            self.__condition.notify_all()
+            callbacks, self.__callbacks = self.__callbacks, []
+        for callback in callbacks:
+            self.__run_callback(callback)
+        return True
+
+    def __run_callback(self, callback):
+        try:
+            callback(self)
+        except Exception:
+            logging.getLogger(__name__).exception("Move future callback failed")
+
+    def done(self):
+        return self.__done
+
+    def cancel(self):
+        """
+        Ask to stop the command. The future is done when the command is stopped
+
+        :return: False if the future was already done
+        :rtype: bool
+        """
+        if self.__done or self.__cancel_function is None:
+            return False
+        self.__cancel_function()
+        return True
+
+    def wait(self, timeout=None):
+        """
+        :param timeout: max time to wait (s), no limit if None
+        :type timeout: float
+        :return: True if the future is done
+        :rtype: bool
+        """
+        with self.__condition:
+            if not self.__done:
+                self.__condition.wait(timeout)
+            return self.__done
+
+    def result(self, timeout=None):
+        """
+        Wait for the command to finish
+
+        :param timeout: max time to wait (s), no limit if None
+        :type timeout: float
+        :raises MoveFutureTimeout: if the command is not finished before the timeout
+        :raises Exception: the exception raised by the command
+        :return: the result of the command
+        """
+        if not self.wait(timeout):
+            raise MoveFutureTimeout("Command not finished after {}s".format(timeout))
+        if self.__exception is not None:
+            raise self.__exception
+        return self.__result
+
+    def exception(self, timeout=None):
+        """
+        :raises MoveFutureTimeout: if the command is not finished before the timeout
+        :return: the exception raised by the command, None if it succeeded
+        :rtype: Exception
+        """
+        if not self.wait(timeout):
+            raise MoveFutureTimeout("Command not finished after {}s".format(timeout))
+        return self.__exception
+
+    def add_done_callback(self, callback):
+        """
+        :param callback: function called with the future when it is done, immediately if it is already done
+        """
+        with self.__condition:
+            if not self.__done:
+                self.__callbacks.append(callback)
+                return
+        self.__run_callback(callback)
+
+    # - asyncio
+
+    def to_asyncio(self, loop=None):
+        """
+        :param loop: event loop of the asyncio future, the current one if None
+        :return: asyncio future done with this future (Python 3 only)
+        :rtype: asyncio.Future
+        """
+        import asyncio
+
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        asyncio_future = loop.create_future()
+
+        def copy_to_asyncio_future(_):
+            if asyncio_future.cancelled():
+                return
+            if self.__exception is not None:
+                asyncio_future.set_exception(self.__exception)
+            else:
+                asyncio_future.set_result(self.__result)
+
+        self.add_done_callback(lambda future: loop.call_soon_threadsafe(copy_to_asyncio_future, future))
+        return asyncio_future
+
+    def __await__(self):
+        return self.to_asyncio().__await__()
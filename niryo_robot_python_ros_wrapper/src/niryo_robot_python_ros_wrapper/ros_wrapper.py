@@ -3,44 +3,44 @@
 # Lib
 import rospy
 import actionlib
+import threading
 
 # Command Status
 from niryo_robot_msgs.msg import CommandStatus
+from niryo_robot_msgs.service_proxy_pool import call_service
 
 # Messages
 from actionlib_msgs.msg import GoalStatus
 
 from geometry_msgs.msg import Pose, Point, Quaternion
 
-from std_msgs.msg import Bool
 from std_msgs.msg import Int32
 from std_msgs.msg import String
 
-from sensor_msgs.msg import CameraInfo
-from sensor_msgs.msg import CompressedImage
-from sensor_msgs.msg import JointState
-
-from conveyor_interface.msg import ConveyorFeedbackArray
-from niryo_robot_commander.msg import RobotCommand
+from niryo_robot_commander.msg import RobotCommand, ToolTrigger
 from niryo_robot_msgs.msg import HardwareStatus
 from niryo_robot_msgs.msg import RobotState
 from niryo_robot_msgs.msg import RPY
-from niryo_robot_rpi.msg import DigitalIOState
+from niryo_robot_tools.msg import ToolCommand
+
+# Messages of the topics are imported on subscription,
+# services of the conveyor and the digital IOs are imported in the functions using them
+from roslib.message import get_message_class
 
 # Services
-from conveyor_interface.srv import ControlConveyor, SetConveyor, SetConveyorRequest
 from niryo_robot_commander.srv import GetFK, GetIK
 from niryo_robot_commander.srv import JogShift, JogShiftRequest
 from niryo_robot_msgs.srv import GetNameDescriptionList, SetBool, SetInt, Trigger
 
-from niryo_robot_rpi.srv import GetDigitalIO, SetDigitalIO
-
 # Actions
 from niryo_robot_commander.msg import RobotMoveAction, RobotMoveGoal
 
 # Enums
 from niryo_robot_commander.command_enums import MoveCommandType
 from niryo_robot_python_ros_wrapper.ros_wrapper_enums import *
+from niryo_robot_python_ros_wrapper.topic_value import TopicValue
+from niryo_robot_python_ros_wrapper.move_future import MoveFuture
+from niryo_robot_python_ros_wrapper.call_log import CallRecorder
 
 
 class NiryoRosWrapperException(Exception):
@@ -65,52 +65,62 @@ class NiryoRosWrapper:
         self.__break_point_publisher = rospy.Publisher('/niryo_robot_blockly/break_point', Int32, queue_size=10)
 
         # -- Subscribers
+        # Latest value received on each topic, readers are woken up on reception
+        # Topics are subscribed on first use of their getters, so that programs start fast
+        self.__topic_values = {}
+        self.__topic_descriptions = {}
+        self.__topic_subscriptions = {}
+        self.__subscribers = {}
+        self.__subscribers_lock = threading.Lock()
+
         # - Pose
-        self.__joints = None
-        rospy.Subscriber('/joint_states', JointState,
-                         self.__callback_sub_joint_states)
+        self.__joints = self.__add_topic_value('/joint_states', 'joints',
+                                               'sensor_msgs/JointState', self.__callback_sub_joint_states)
 
-        self.__pose = None
-        rospy.Subscriber('/niryo_robot/robot_state', RobotState,
-                         self.__callback_sub_robot_state)
+        self.__pose = self.__add_topic_value('/niryo_robot/robot_state', 'pose',
+                                             'niryo_robot_msgs/RobotState', self.__callback_sub_robot_state)
 
         # - Hardware
-        self.__learning_mode_on = None
-        rospy.Subscriber('/niryo_robot/learning_mode/state', Bool,
-                         self.__callback_sub_learning_mode)
+        self.__learning_mode_on = self.__add_topic_value('/niryo_robot/learning_mode/state', 'learning mode',
+                                                         'std_msgs/Bool', self.__callback_sub_learning_mode)
 
-        self.__hw_status = None
-        rospy.Subscriber('/niryo_robot_hardware_interface/hardware_status', HardwareStatus,
-                         self.__callback_sub_hardware_status)
+        self.__hw_status = self.__add_topic_value('/niryo_robot_hardware_interface/hardware_status',
+                                                  'hardware status', 'niryo_robot_msgs/HardwareStatus',
+                                                  self.__callback_sub_hardware_status)
 
-        self.__digital_io_state = None
-        rospy.Subscriber('/niryo_robot_rpi/digital_io_state', DigitalIOState,
-                         self.__callback_sub_digital_io_state)
+        self.__digital_io_state = self.__add_topic_value('/niryo_robot_rpi/digital_io_state', 'digital io state',
+                                                         'niryo_robot_rpi/DigitalIOState',
+                                                         self.__callback_sub_digital_io_state)
 
-        self.__current_tool_id = None
-        rospy.Subscriber('/niryo_robot_tools/current_id', Int32,
-                         self.__callback_sub_current_tool_id)
+        self.__current_tool_id = self.__add_topic_value('/niryo_robot_tools/current_id', 'current tool id',
+                                                        'std_msgs/Int32', self.__callback_sub_current_tool_id)
 
         # - Vision
-        self.__compressed_image_message = None
-        rospy.Subscriber('/niryo_robot_vision/compressed_video_stream', CompressedImage,
-                         self.__callback_sub_stream_video, queue_size=1)
+        self.__compressed_image_message = self.__add_topic_value('/niryo_robot_vision/compressed_video_stream',
+                                                                'video stream message',
+                                                                'sensor_msgs/CompressedImage',
+                                                                self.__callback_sub_stream_video, queue_size=1)
 
-        self.__camera_intrinsics_message = None
-        rospy.Subscriber('/niryo_robot_vision/camera_intrinsics', CameraInfo,
-                         self.__callback_camera_intrinsics, queue_size=1)
+        self.__camera_intrinsics_message = self.__add_topic_value('/niryo_robot_vision/camera_intrinsics',
+                                                                 'camera intrinsics', 'sensor_msgs/CameraInfo',
+                                                                 self.__callback_camera_intrinsics, queue_size=1)
 
         # - Conveyor
-
-        self.__conveyors_feedback = None
-        rospy.Subscriber('/niryo_robot/conveyor/feedback', ConveyorFeedbackArray,
-                         self.__callback_sub_conveyors_feedback)
+        self.__conveyors_feedback = self.__add_topic_value('/niryo_robot/conveyor/feedback', 'conveyors feedback',
+                                                           'conveyor_interface/ConveyorFeedbackArray',
+                                                           self.__callback_sub_conveyors_feedback)
 
         # - Action server
-        # Robot action
+        # Robot action, connected on first command
         self.__robot_action_server_name = '/niryo_robot_commander/robot_action'
-        self.__robot_action_server_client = actionlib.SimpleActionClient(self.__robot_action_server_name,
-                                                                         RobotMoveAction)
+        self.__robot_action_server_client = None
+        # Future of the goal tracked by the action client
+        self.__move_future = None
+        self.__move_future_lock = threading.Lock()
+
+        # - Calls recording
+        self.__call_recorder = None
+        self.__recorded_methods = []
 
     def __del__(self):
         del self
@@ -143,34 +153,156 @@ class NiryoRosWrapper:
         # Close program
         sys.exit()
 
+    # -- Calls recording
+
+    def start_recording(self, file_path):
+        """
+        Record every call of the public functions to a binary log : arguments, result and timing.
+        The log can be replayed with the replay_call_log.py script to benchmark the program
+
+        :param file_path: path of the log
+        :type file_path: str
+        """
+        self.stop_recording()
+        self.__call_recorder = CallRecorder(file_path)
+        self.__recorded_methods = [name for name in dir(self.__class__)
+                                   if not name.startswith('_') and callable(getattr(self, name))
+                                   and name not in ('start_recording', 'stop_recording',
+                                                    'wait_for_nodes_initialization')]
+        for name in self.__recorded_methods:
+            setattr(self, name, self.__call_recorder.wrap(name, getattr(self, name)))
+
+    def stop_recording(self):
+        """
+        Stop recording the calls and close the log
+        """
+        if self.__call_recorder is None:
+            return
+        for name in self.__recorded_methods:
+            delattr(self, name)
+        self.__recorded_methods = []
+        self.__call_recorder.close()
+        self.__call_recorder = None
+
+    # -- Topics values
+
+    def subscribe_topics(self, topic_names=None):
+        """
+        Subscribe to topics in advance. Topics are otherwise subscribed on first use of their getters,
+        which then wait for the connection to the publisher
+
+        :param topic_names: names of the topics, e.g. /joint_states or /niryo_robot/robot_state. All if None
+        :type topic_names: list[str]
+        """
+        if topic_names is None:
+            topic_names = list(self.__topic_values)
+        for topic_name in topic_names:
+            self.__get_topic_value_store(topic_name)
+
+    def wait_for_topic_value(self, topic_name, newer_than=None, timeout=2.0):
+        """
+        Get the last value received on a topic subscribed by the wrapper, waiting for it if needed.
+        The value is the one the getters of the topic are based on :
+        the 6 arm joints for /joint_states, the data field for single field topics, the message otherwise
+
+        :param topic_name: name of the topic, e.g. /joint_states or /niryo_robot/robot_state
+        :type topic_name: str
+        :param newer_than: time (from time.time()) the value must have been received after.
+                           Any value is accepted if None
+        :type newer_than: float
+        :param timeout: max time to wait for the value (s)
+        :type timeout: float
+        :return: value and its reception time (from time.time())
+        :rtype: (object, float)
+        """
+        topic_value = self.__get_topic_value_store(topic_name)
+        return self.__check_topic_value(topic_name, *topic_value.get(timeout, newer_than))
+
+    def wait_for_next_topic_value(self, topic_name, timeout=2.0):
+        """
+        Wait for the next value received on a topic subscribed by the wrapper, to synchronize on fresh data
+
+        :param topic_name: name of the topic, e.g. /joint_states or /niryo_robot/robot_state
+        :type topic_name: str
+        :param timeout: max time to wait for the value (s)
+        :type timeout: float
+        :return: value and its reception time (from time.time())
+        :rtype: (object, float)
+        """
+        topic_value = self.__get_topic_value_store(topic_name)
+        return self.__check_topic_value(topic_name, *topic_value.get_next(timeout))
+
+    def get_topic_value_age(self, topic_name):
+        """
+        Get the time elapsed since the last value was received on a topic subscribed by the wrapper
+
+        :param topic_name: name of the topic, e.g. /joint_states or /niryo_robot/robot_state
+        :type topic_name: str
+        :return: age of the value (s), None if no value was received yet or if the topic was not used yet
+        :rtype: float
+        """
+        return self.__get_topic_value_store(topic_name).get_age()
+
+    def __get_topic_value(self, topic_name):
+        return self.wait_for_topic_value(topic_name)[0]
+
+    def __get_topic_value_store(self, topic_name):
+        if topic_name not in self.__topic_values:
+            raise NiryoRosWrapperException('Topic {} is not subscribed by the wrapper'.format(topic_name))
+        self.__subscribe_topic(topic_name)
+        return self.__topic_values[topic_name]
+
+    def __check_topic_value(self, topic_name, value, stamp):
+        if stamp is None:
+            raise NiryoRosWrapperException('Timeout: could not get {} ({} topic)'.format(
+                self.__topic_descriptions[topic_name], topic_name))
+        return value, stamp
+
     # -- Subscribers callbacks
 
+    def __add_topic_value(self, topic_name, description, msg_type, callback, queue_size=None):
+        topic_value = TopicValue()
+        self.__topic_values[topic_name] = topic_value
+        self.__topic_descriptions[topic_name] = description
+        self.__topic_subscriptions[topic_name] = (msg_type, callback, queue_size)
+        return topic_value
+
+    def __subscribe_topic(self, topic_name):
+        if topic_name in self.__subscribers:
+            return
+        with self.__subscribers_lock:
+            if topic_name in self.__subscribers:
+                return
+            msg_type, callback, queue_size = self.__topic_subscriptions[topic_name]
+            self.__subscribers[topic_name] = rospy.Subscriber(topic_name, get_message_class(msg_type), callback,
+                                                              queue_size=queue_size)
+
     def __callback_sub_joint_states(self, joint_states):
-        self.__joints = list(joint_states.position[:6])
+        self.__joints.set(list(joint_states.position[:6]))
 
     def __callback_sub_robot_state(self, pose):
-        self.__pose = pose
+        self.__pose.set(pose)
 
     def __callback_sub_learning_mode(self, learning_mode):
-        self.__learning_mode_on = learning_mode.data
+        self.__learning_mode_on.set(learning_mode.data)
 
     def __callback_sub_current_tool_id(self, msg):
-        self.__current_tool_id = msg.data
+        self.__current_tool_id.set(msg.data)
 
     def __callback_sub_hardware_status(self, hw_status):
-        self.__hw_status = hw_status
+        self.__hw_status.set(hw_status)
 
     def __callback_sub_digital_io_state(self, digital_io_state):
-        self.__digital_io_state = digital_io_state
+        self.__digital_io_state.set(digital_io_state)
 
     def __callback_sub_stream_video(self, compressed_image_message):
-        self.__compressed_image_message = compressed_image_message
+        self.__compressed_image_message.set(compressed_image_message)
 
     def __callback_camera_intrinsics(self, camera_info_message):
-        self.__camera_intrinsics_message = camera_info_message
+        self.__camera_intrinsics_message.set(camera_info_message)
 
     def __callback_sub_conveyors_feedback(self, conveyors_feedback):
-        self.__conveyors_feedback = conveyors_feedback
+        self.__conveyors_feedback.set(conveyors_feedback)
 
     # -- Service & Action executors
     def __call_service(self, service_name, service_msg_type, *args):
@@ -184,62 +316,108 @@ class NiryoRosWrapper:
         :raises NiryoRosWrapperException: Timeout during waiting of services
         :return: Response
         """
-        # Connect to service
+        # Connect to service (first call only) and call it through a persistent connection
         try:
-            rospy.wait_for_service(service_name, self.__service_timeout)
-        except rospy.ROSException as e:
+            return call_service(service_name, service_msg_type, *args, timeout=self.__service_timeout)
+        except (rospy.ROSException, rospy.ServiceException) as e:
             raise NiryoRosWrapperException(e)
 
-        # Call service
-        try:
-            service = rospy.ServiceProxy(service_name, service_msg_type)
-            response = service(*args)
-            return response
-        except rospy.ServiceException as e:
-            raise NiryoRosWrapperException(e)
+    def __get_robot_action_client(self):
+        if self.__robot_action_server_client is None:
+            self.__robot_action_server_client = actionlib.SimpleActionClient(self.__robot_action_server_name,
+                                                                             RobotMoveAction)
+        return self.__robot_action_server_client
+
+    def __execute_robot_move_action(self, goal, feedback_cb=None, timeout=None):
+        return self.__execute_robot_move_action_async(goal, feedback_cb, timeout).result()
 
-    def __execute_robot_move_action(self, goal):
+    def __execute_robot_move_action_async(self, goal, feedback_cb=None, timeout=None, get_result=None):
+        """
+        Send the goal without waiting for its result. Only one goal is executed at a time
+
+        :param get_result: function giving the result of the future from the RobotMoveResult of a succeeded goal.
+                           The result is the status and message of the goal if None
+        :raises NiryoRosWrapperException: if the action server is not up or if a goal is still executed
+        :return: future of the status and message of the goal
+        :rtype: MoveFuture
+        """
         # Connect to server
-        if not self.__robot_action_server_client.wait_for_server(rospy.Duration(self.__action_connection_timeout)):
+        if not self.__get_robot_action_client().wait_for_server(rospy.Duration(self.__action_connection_timeout)):
             rospy.logwarn("ROS Wrapper - Failed to connect to Robot action server")
 
             raise NiryoRosWrapperException('Action Server is not up : {}'.format(self.__robot_action_server_name))
 
-        # Send goal and check response
-        goal_state, response = self.__send_goal_and_wait_for_completed(goal)
-
-        if response.status == CommandStatus.GOAL_STILL_ACTIVE:
-            rospy.loginfo("ROS Wrapper - Command still active: try to stop it")
-            self.__robot_action_server_client.cancel_goal()
-            self.__robot_action_server_client.stop_tracking_goal()
-            rospy.sleep(0.2)
-            rospy.loginfo("ROS Wrapper - Trying to resend command ...")
-            goal_state, response = self.__send_goal_and_wait_for_completed(goal)
+        future = MoveFuture(self.__get_robot_action_client().cancel_goal)
+        with self.__move_future_lock:
+            if self.__move_future is not None and not self.__move_future.done():
+                raise NiryoRosWrapperException('A command is still executed, wait for its result first')
+            self.__move_future = future
+
+        self.__send_goal(future, goal, feedback_cb, timeout, get_result, resend=True)
+        return future
+
+    def __send_goal(self, future, goal, feedback_cb, timeout, get_result, resend):
+        if timeout is None:
+            timeout = self.__action_execute_timeout
+        timeout_timer = threading.Timer(timeout, self.__goal_timeout, (future,))
+        timeout_timer.daemon = True
+
+        def done_cb(goal_state, response):
+            timeout_timer.cancel()
+            if resend and response is not None and response.status == CommandStatus.GOAL_STILL_ACTIVE:
+                resend_thread = threading.Thread(target=self.__resend_goal,
+                                                 args=(future, goal, feedback_cb, timeout, get_result))
+                resend_thread.daemon = True
+                resend_thread.start()
+            else:
+                self.__set_goal_result(future, goal_state, response, get_result)
 
+        timeout_timer.start()
+        try:
+            self.__get_robot_action_client().send_goal(goal, done_cb=done_cb, feedback_cb=feedback_cb)
+        except Exception as e:
+            # The future of a goal which has not been sent would never be done
+            timeout_timer.cancel()
+            future.set_exception(e)
+            raise
+
+    def __resend_goal(self, future, goal, feedback_cb, timeout, get_result):
+        rospy.loginfo("ROS Wrapper - Command still active: try to stop it")
+        self.__get_robot_action_client().cancel_goal()
+        self.__get_robot_action_client().stop_tracking_goal()
+        rospy.sleep(0.2)
+        rospy.loginfo("ROS Wrapper - Trying to resend command ...")
+        self.__send_goal(future, goal, feedback_cb, timeout, get_result, resend=False)
+
+    def __goal_timeout(self, future):
+        if future.done():
+            return
+        self.__get_robot_action_client().cancel_goal()
+        self.__get_robot_action_client().stop_tracking_goal()
+        future.set_exception(NiryoRosWrapperException(
+            'Action Server timeout : {}'.format(self.__robot_action_server_name)))
+
+    def __set_goal_result(self, future, goal_state, response, get_result):
         if goal_state != GoalStatus.SUCCEEDED:
-            self.__robot_action_server_client.stop_tracking_goal()
+            self.__get_robot_action_client().stop_tracking_goal()
 
+        message = response.message if response is not None else ""
         if goal_state == GoalStatus.REJECTED:
-            raise NiryoRosWrapperException('Goal has been rejected : {}'.format(response.message))
+            future.set_exception(NiryoRosWrapperException('Goal has been rejected : {}'.format(message)))
         elif goal_state == GoalStatus.ABORTED:
-            raise NiryoRosWrapperException('Goal has been aborted : {}'.format(response.message))
+            future.set_exception(NiryoRosWrapperException('Goal has been aborted : {}'.format(message)))
         elif goal_state != GoalStatus.SUCCEEDED:
-            raise NiryoRosWrapperException('Error when processing goal : {}'.format(response.message))
-
-        return response.status, response.message
-
-    def __send_goal_and_wait_for_completed(self, goal):
-        self.__robot_action_server_client.send_goal(goal)
-
-        if not self.__robot_action_server_client.wait_for_result(timeout=rospy.Duration(self.__action_execute_timeout)):
-            self.__robot_action_server_client.cancel_goal()
-            self.__robot_action_server_client.stop_tracking_goal()
-            raise NiryoRosWrapperException('Action Server timeout : {}'.format(self.__robot_action_server_name))
-
-        goal_state = self.__robot_action_server_client.get_state()
-        response = self.__robot_action_server_client.get_result()
+            future.set_exception(NiryoRosWrapperException('Error when processing goal : {}'.format(message)))
+        elif get_result is not None:
+            future.set_result(get_result(response))
+        else:
+            future.set_result((response.status, response.message))
 
-        return goal_state, response
+    @staticmethod
+    def __get_done_future(result):
+        future = MoveFuture()
+        future.set_result(result)
+        return future
 
     # --- Functions interface
     def __classic_return_w_check(self, result):
@@ -326,13 +504,7 @@ class NiryoRosWrapper:
         :return: ``True`` if activate else ``False``
         :rtype: bool
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__learning_mode_on is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException('Timeout: could not get learning mode '
-                                               '(/niryo_robot/learning_mode/state topic)')
-        return self.__learning_mode_on
+        return self.__get_topic_value('/niryo_robot/learning_mode/state')
 
     def set_learning_mode(self, set_bool):
         """
@@ -377,12 +549,7 @@ class NiryoRosWrapper:
         :return: list of joints value
         :rtype: list[float]
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__joints is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException('Timeout: could not get joints (/joint_states topic)')
-        return self.__joints
+        return self.__get_topic_value('/joint_states')
 
     def get_pose(self):
         """
@@ -391,12 +558,7 @@ class NiryoRosWrapper:
         :return: RobotState object (position.x/y/z && rpy.roll/pitch/yaw && orientation.x/y/z/w)
         :rtype: RobotState
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__pose is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException('Timeout: could not get pose (/niryo_robot/robot_state topic)')
-        return self.__pose
+        return self.__get_topic_value('/niryo_robot/robot_state')
 
     def get_pose_as_list(self):
         """
@@ -427,11 +589,18 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        return self.move_joints_async(j1, j2, j3, j4, j5, j6).result()
+
+    def move_joints_async(self, j1, j2, j3, j4, j5, j6):
+        """
+        Start a Move joints action without waiting for its end
+
+        :return: future of the status, message
+        :rtype: MoveFuture
+        """
         goal = RobotMoveGoal()
-        goal.cmd.cmd_type = RobotCommand.MOVE_ONLY
-        goal.cmd.arm_cmd.cmd_type = MoveCommandType.JOINTS
-        goal.cmd.arm_cmd.joints = [j1, j2, j3, j4, j5, j6]
-        return self.__execute_robot_move_action(goal)
+        goal.cmd = self.get_move_joints_command(j1, j2, j3, j4, j5, j6)
+        return self.__execute_robot_move_action_async(goal)
 
     def move_to_sleep_pose(self):
         """
@@ -465,6 +634,15 @@ class NiryoRosWrapper:
 
         return self.__move_pose_with_cmd(MoveCommandType.POSE, x, y, z, roll, pitch, yaw)
 
+    def move_pose_async(self, x, y, z, roll, pitch, yaw):
+        """
+        Start to move robot end effector pose to a (x, y, z, roll, pitch, yaw) pose without waiting for the end
+
+        :return: future of the status, message
+        :rtype: MoveFuture
+        """
+        return self.__move_pose_with_cmd_async(MoveCommandType.POSE, x, y, z, roll, pitch, yaw)
+
     def move_pose_saved(self, pose_name):
         """
         Move robot end effector pose to a pose saved
@@ -487,17 +665,47 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
-        x, y, z, roll, pitch, yaw = pose
+        return self.__move_pose_with_cmd_async(cmd_type, *pose).result()
+
+    def __move_pose_with_cmd_async(self, cmd_type, *pose):
         goal = RobotMoveGoal()
-        goal.cmd.cmd_type = RobotCommand.MOVE_ONLY
-        goal.cmd.arm_cmd.cmd_type = cmd_type
-        goal.cmd.arm_cmd.position.x = x
-        goal.cmd.arm_cmd.position.y = y
-        goal.cmd.arm_cmd.position.z = z
-        goal.cmd.arm_cmd.rpy.roll = roll
-        goal.cmd.arm_cmd.rpy.pitch = pitch
-        goal.cmd.arm_cmd.rpy.yaw = yaw
-        return self.__execute_robot_move_action(goal)
+        goal.cmd = self.__get_move_pose_command(cmd_type, *pose)
+        return self.__execute_robot_move_action_async(goal)
+
+    @staticmethod
+    def __get_move_pose_command(cmd_type, x, y, z, roll, pitch, yaw):
+        cmd = RobotCommand()
+        cmd.cmd_type = RobotCommand.MOVE_ONLY
+        cmd.arm_cmd.cmd_type = cmd_type
+        cmd.arm_cmd.position.x = x
+        cmd.arm_cmd.position.y = y
+        cmd.arm_cmd.position.z = z
+        cmd.arm_cmd.rpy.roll = roll
+        cmd.arm_cmd.rpy.pitch = pitch
+        cmd.arm_cmd.rpy.yaw = yaw
+        return cmd
+
+    @staticmethod
+    def __add_tool_trigger(cmd, trigger_type, tool_cmd):
+        """
+        Attach a tool command to an arm command : the commander sends it during the motion
+        (trigger_type AT_TIME : at the start of the motion, AFTER_MOTION : once the target is reached)
+
+        :param cmd: arm command
+        :type cmd: RobotCommand
+        :param trigger_type: ToolTrigger type
+        :param tool_cmd: tool command. If None, the arm command is not modified
+        :type tool_cmd: ToolCommand
+        :return: the arm command
+        :rtype: RobotCommand
+        """
+        if tool_cmd is not None:
+            cmd.cmd_type = RobotCommand.MOVE_AND_TOOL
+            trigger = ToolTrigger()
+            trigger.trigger_type = trigger_type
+            trigger.tool_cmd = tool_cmd
+            cmd.tool_triggers.append(trigger)
+        return cmd
 
     def shift_pose(self, axis, value):
         """
@@ -520,6 +728,16 @@ class NiryoRosWrapper:
     def move_linear_pose(self, x, y, z, roll, pitch, yaw):
         return self.__move_pose_with_cmd(MoveCommandType.LINEAR_POSE, x, y, z, roll, pitch, yaw)
 
+    def move_linear_pose_async(self, x, y, z, roll, pitch, yaw):
+        """
+        Start to move robot end effector pose to a (x, y, z, roll, pitch, yaw) pose in a straight line,
+        without waiting for the end
+
+        :return: future of the status, message
+        :rtype: MoveFuture
+        """
+        return self.__move_pose_with_cmd_async(MoveCommandType.LINEAR_POSE, x, y, z, roll, pitch, yaw)
+
     def set_jog_use_state(self, state):
         """
         Turn jog controller On or Off
@@ -693,6 +911,17 @@ class NiryoRosWrapper:
                                      GetNameDescriptionList)
         return result.name_list
 
+    def build_roadmap(self):
+        """
+        Plan the paths between every pair of saved poses : the moves from a saved pose to another one
+        are then executed without planning. Has to be called again after saving poses or changing the planning scene
+
+        :return: status, message
+        :rtype: (int, str)
+        """
+        result = self.__call_service('/niryo_robot_commander/build_roadmap', Trigger)
+        return self.__classic_return_w_check(result)
+
     # - Pick/Place
 
     def pick_from_pose(self, x, y, z, roll, pitch, yaw):
@@ -719,14 +948,15 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
        """
-        self.release_with_tool()
-
-        self.move_pose(x, y, z + 0.05, roll, pitch, yaw)
-        self.move_pose(x, y, z, roll, pitch, yaw)
-
-        self.grasp_with_tool()
-
-        return self.move_pose(x, y, z + 0.05, roll, pitch, yaw)
+        # The tool is released during the approach, and grasps as soon as the arm is down,
+        # all the moves are executed in a single goal
+        return self.execute_commands([
+            self.__add_tool_trigger(self.get_move_pose_command(x, y, z + 0.05, roll, pitch, yaw),
+                                    ToolTrigger.AT_TIME, self.__get_release_tool_cmd()),
+            self.__add_tool_trigger(self.get_move_pose_command(x, y, z, roll, pitch, yaw),
+                                    ToolTrigger.AFTER_MOTION, self.__get_grasp_tool_cmd()),
+            self.get_move_pose_command(x, y, z + 0.05, roll, pitch, yaw),
+        ])
 
     def place_from_pose(self, x, y, z, roll, pitch, yaw):
         """
@@ -752,12 +982,12 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
-        self.move_pose(x, y, z + 0.05, roll, pitch, yaw)
-        self.move_pose(x, y, z, roll, pitch, yaw)
-
-        self.release_with_tool()
-
-        return self.move_pose(x, y, z + 0.05, roll, pitch, yaw)
+        return self.execute_commands([
+            self.get_move_pose_command(x, y, z + 0.05, roll, pitch, yaw),
+            self.__add_tool_trigger(self.get_move_pose_command(x, y, z, roll, pitch, yaw),
+                                    ToolTrigger.AFTER_MOTION, self.__get_release_tool_cmd()),
+            self.get_move_pose_command(x, y, z + 0.05, roll, pitch, yaw),
+        ])
 
     def pick_and_place(self, pick_pose, place_pose, dist_smoothing=0.0):
         """
@@ -787,6 +1017,105 @@ class NiryoRosWrapper:
 
         return self.move_pose(*place_pose_high)
 
+    # - Commands sequence
+
+    def execute_commands(self, commands, step_callback=None):
+        """
+        Execute a sequence of commands in a single action goal : the commander executes them one after the other,
+        and plans each move while the previous one is executed. The sequence stops at the first command failing
+
+        :param commands: commands built with get_move_joints_command, get_move_pose_command,
+                         get_grasp_command, get_release_command...
+        :type commands: list[RobotCommand]
+        :param step_callback: function called with the index, status and message of each command when it finishes
+        :return: status, message
+        :rtype: (int, str)
+        """
+        return self.execute_commands_async(commands, step_callback).result()
+
+    def execute_commands_async(self, commands, step_callback=None):
+        """
+        Start to execute a sequence of commands without waiting for its end (see execute_commands)
+
+        :param commands: commands built with get_move_joints_command, get_move_pose_command,
+                         get_grasp_command, get_release_command...
+        :type commands: list[RobotCommand]
+        :param step_callback: function called with the index, status and message of each command when it finishes
+        :return: future of the status, message
+        :rtype: MoveFuture
+        """
+        goal = RobotMoveGoal()
+        goal.cmds = list(commands)
+        if not goal.cmds:
+            return self.__get_done_future((CommandStatus.SUCCESS, "No command to execute"))
+
+        def publish_step(feedback):
+            step_callback(feedback.step, feedback.status, feedback.message)
+
+        feedback_cb = publish_step if step_callback is not None else None
+        return self.__execute_robot_move_action_async(goal, feedback_cb,
+                                                      timeout=self.__action_execute_timeout * len(goal.cmds))
+
+    @staticmethod
+    def get_move_joints_command(j1, j2, j3, j4, j5, j6):
+        """
+        Move joints command, to execute with execute_commands
+
+        :rtype: RobotCommand
+        """
+        cmd = RobotCommand()
+        cmd.cmd_type = RobotCommand.MOVE_ONLY
+        cmd.arm_cmd.cmd_type = MoveCommandType.JOINTS
+        cmd.arm_cmd.joints = [j1, j2, j3, j4, j5, j6]
+        return cmd
+
+    def get_move_pose_command(self, x, y, z, roll, pitch, yaw):
+        """
+        Move pose command, to execute with execute_commands
+
+        :rtype: RobotCommand
+        """
+        return self.__get_move_pose_command(MoveCommandType.POSE, x, y, z, roll, pitch, yaw)
+
+    def get_move_linear_pose_command(self, x, y, z, roll, pitch, yaw):
+        """
+        Move linear pose command, to execute with execute_commands
+
+        :rtype: RobotCommand
+        """
+        return self.__get_move_pose_command(MoveCommandType.LINEAR_POSE, x, y, z, roll, pitch, yaw)
+
+    def get_grasp_command(self, pin_id=-1):
+        """
+        Grasp command of the current tool, to execute with execute_commands
+
+        :param pin_id: [Only required for electromagnet] Pin ID of the electromagnet
+        :type pin_id: PinID
+        :raises NiryoRosWrapperException: If no tool is equipped
+        :rtype: RobotCommand
+        """
+        return self.__get_tool_only_command(self.__get_grasp_tool_cmd(pin_id))
+
+    def get_release_command(self, pin_id=-1):
+        """
+        Release command of the current tool, to execute with execute_commands
+
+        :param pin_id: [Only required for electromagnet] Pin ID of the electromagnet
+        :type pin_id: PinID
+        :raises NiryoRosWrapperException: If no tool is equipped
+        :rtype: RobotCommand
+        """
+        return self.__get_tool_only_command(self.__get_release_tool_cmd(pin_id))
+
+    @staticmethod
+    def __get_tool_only_command(tool_cmd):
+        if tool_cmd is None:
+            raise NiryoRosWrapperException('No tool equipped')
+        cmd = RobotCommand()
+        cmd.cmd_type = RobotCommand.TOOL_ONLY
+        cmd.tool_cmd = tool_cmd
+        return cmd
+
     # - Trajectories
 
     def get_trajectory_saved(self, trajectory_name):
@@ -829,7 +1158,7 @@ class NiryoRosWrapper:
         list_poses = result.list_poses
         return self.__execute_trajectory_from_formatted_poses(list_poses)
 
-    def execute_trajectory_from_poses(self, list_poses_raw, dist_smoothing=0.0):
+    def execute_trajectory_from_poses(self, list_poses_raw, dist_smoothing=0.0, blend_radii=None):
         """
         Execute trajectory from a list of pose
 
@@ -837,13 +1166,33 @@ class NiryoRosWrapper:
         :type list_poses_raw: list[list[float]]
         :param dist_smoothing: Distance from waypoints before smoothing trajectory
         :type dist_smoothing: float
+        :param blend_radii: Distance from each waypoint before smoothing trajectory. Replaces dist_smoothing if given
+        :type blend_radii: list[float]
         :return: status, message
         :rtype: (int, str)
         """
+        if len(list_poses_raw) < 2:
+            return "Give me at least 2 points"
+        return self.execute_trajectory_from_poses_async(list_poses_raw, dist_smoothing, blend_radii).result()
+
+    def execute_trajectory_from_poses_async(self, list_poses_raw, dist_smoothing=0.0, blend_radii=None):
+        """
+        Start to execute a trajectory from a list of pose without waiting for its end
+
+        :param list_poses_raw: list of [x, y, z, qx, qy, qz, qw]
+        :type list_poses_raw: list[list[float]]
+        :param dist_smoothing: Distance from waypoints before smoothing trajectory
+        :type dist_smoothing: float
+        :param blend_radii: Distance from each waypoint before smoothing trajectory. Replaces dist_smoothing if given
+        :type blend_radii: list[float]
+        :raises NiryoRosWrapperException: if less than 2 poses are given
+        :return: future of the status, message
+        :rtype: MoveFuture
+        """
         from niryo_robot_poses_handlers.transform_functions import quaternion_from_euler
 
         if len(list_poses_raw) < 2:
-            return "Give me at least 2 points"
+            raise NiryoRosWrapperException("Give me at least 2 points")
         list_poses = []
         for pose in list_poses_raw:
             point = Point(*pose[:3])
@@ -854,7 +1203,7 @@ class NiryoRosWrapper:
                 quaternion = angle
             orientation = Quaternion(*quaternion)
             list_poses.append(Pose(point, orientation))
-        return self.__execute_trajectory_from_formatted_poses(list_poses, dist_smoothing)
+        return self.__execute_trajectory_from_formatted_poses_async(list_poses, dist_smoothing, blend_radii)
 
     def save_trajectory(self, trajectory_name, list_poses_raw):
         """
@@ -897,14 +1246,18 @@ class NiryoRosWrapper:
         goal.cmd.arm_cmd.args = [str(radius), str(angle_step), str(total_steps)]
         return self.__execute_robot_move_action(goal)
 
-    def __execute_trajectory_from_formatted_poses(self, list_poses, dist_smoothing=0.0):
+    def __execute_trajectory_from_formatted_poses(self, list_poses, dist_smoothing=0.0, blend_radii=None):
+        return self.__execute_trajectory_from_formatted_poses_async(list_poses, dist_smoothing, blend_radii).result()
 
+    def __execute_trajectory_from_formatted_poses_async(self, list_poses, dist_smoothing=0.0, blend_radii=None):
         goal = RobotMoveGoal()
         goal.cmd.cmd_type = RobotCommand.MOVE_ONLY
         goal.cmd.arm_cmd.cmd_type = MoveCommandType.EXECUTE_TRAJ
         goal.cmd.arm_cmd.list_poses = list_poses
         goal.cmd.arm_cmd.dist_smoothing = dist_smoothing
-        return self.__execute_robot_move_action(goal)
+        if blend_radii is not None:
+            goal.cmd.arm_cmd.blend_radii = blend_radii
+        return self.__execute_robot_move_action_async(goal)
 
     def delete_trajectory(self, trajectory_name):
         """
@@ -978,13 +1331,7 @@ class NiryoRosWrapper:
         :return: Tool Id
         :rtype: ToolID
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__current_tool_id is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException(
-                    'Timeout: could not get current tool id (/niryo_robot_tools/current_id topic)')
-        return self.__current_tool_id
+        return self.__get_topic_value('/niryo_robot_tools/current_id')
 
     def update_tool(self):
         """
@@ -1009,14 +1356,36 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        return self.grasp_with_tool_async(pin_id).result()
+
+    def grasp_with_tool_async(self, pin_id=-1):
+        """
+        Start to grasp with the tool without waiting for the end (see grasp_with_tool)
+
+        :param pin_id: [Only required for electromagnet] Pin ID of the electromagnet
+        :type pin_id: PinID
+        :return: future of the status, message. Its result is None if no tool is equipped
+        :rtype: MoveFuture
+        """
+        tool_cmd = self.__get_grasp_tool_cmd(pin_id)
+        if tool_cmd is None:
+            return self.__get_done_future(None)
+        return self.__execute_robot_move_action_async(self.__get_tool_goal(tool_cmd))
+
+    def __get_grasp_tool_cmd(self, pin_id=-1):
+        """
+        :return: grasp command of the current tool, None if no tool is equipped
+        :rtype: ToolCommand
+        """
         tool_id = self.get_current_tool_id()
 
         if tool_id in (ToolID.GRIPPER_1, ToolID.GRIPPER_2, ToolID.GRIPPER_3, ToolID.GRIPPER_4):
-            return self.close_gripper()
+            return self.__get_gripper_cmd(500, "close_gripper")
         elif tool_id == ToolID.VACUUM_PUMP_1:
-            return self.pull_air_vacuum_pump()
+            return self.__get_vacuum_pump_cmd("pull_air_vacuum_pump")
         elif tool_id == ToolID.ELECTROMAGNET_1:
-            return self.activate_electromagnet(pin_id)
+            return self.__get_electromagnet_cmd(pin_id, "activate_digital_io")
+        return None
 
     def release_with_tool(self, pin_id=-1):
         """
@@ -1031,14 +1400,44 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        return self.release_with_tool_async(pin_id).result()
+
+    def release_with_tool_async(self, pin_id=-1):
+        """
+        Start to release with the tool without waiting for the end (see release_with_tool)
+
+        :param pin_id: [Only required for electromagnet] Pin ID of the electromagnet
+        :type pin_id: PinID
+        :return: future of the status, message. Its result is None if no tool is equipped
+        :rtype: MoveFuture
+        """
+        tool_cmd = self.__get_release_tool_cmd(pin_id)
+        if tool_cmd is None:
+            return self.__get_done_future(None)
+        return self.__execute_robot_move_action_async(self.__get_tool_goal(tool_cmd))
+
+    def __get_release_tool_cmd(self, pin_id=-1):
+        """
+        :return: release command of the current tool, None if no tool is equipped
+        :rtype: ToolCommand
+        """
         tool_id = self.get_current_tool_id()
 
         if tool_id in (ToolID.GRIPPER_1, ToolID.GRIPPER_2, ToolID.GRIPPER_3, ToolID.GRIPPER_4):
-            return self.open_gripper()
+            return self.__get_gripper_cmd(500, "open_gripper")
         elif tool_id == ToolID.VACUUM_PUMP_1:
-            return self.push_air_vacuum_pump()
+            return self.__get_vacuum_pump_cmd("push_air_vacuum_pump")
         elif tool_id == ToolID.ELECTROMAGNET_1:
-            return self.deactivate_electromagnet(pin_id)
+            return self.__get_electromagnet_cmd(pin_id, "deactivate_digital_io")
+        return None
+
+    def __execute_tool_cmd(self, tool_cmd):
+        return self.__execute_robot_move_action(self.__get_tool_goal(tool_cmd))
+
+    def __get_tool_goal(self, tool_cmd):
+        goal = RobotMoveGoal()
+        goal.cmd = self.__get_tool_only_command(tool_cmd)
+        return goal
 
     # - Gripper
     def open_gripper(self, speed=500):
@@ -1064,15 +1463,17 @@ class NiryoRosWrapper:
         return self.__deal_with_gripper(speed, "close_gripper")
 
     def __deal_with_gripper(self, speed, command_str):
-        goal = RobotMoveGoal()
-        goal.cmd.cmd_type = RobotCommand.TOOL_ONLY
-        goal.cmd.tool_cmd.tool_id = self.get_current_tool_id()
-        goal.cmd.tool_cmd.cmd_type = self.__tool_command_list[command_str]
+        return self.__execute_tool_cmd(self.__get_gripper_cmd(speed, command_str))
+
+    def __get_gripper_cmd(self, speed, command_str):
+        tool_cmd = ToolCommand()
+        tool_cmd.tool_id = self.get_current_tool_id()
+        tool_cmd.cmd_type = self.__tool_command_list[command_str]
         if "open" in command_str:
-            goal.cmd.tool_cmd.gripper_open_speed = speed
+            tool_cmd.gripper_open_speed = speed
         else:
-            goal.cmd.tool_cmd.gripper_close_speed = speed
-        return self.__execute_robot_move_action(goal)
+            tool_cmd.gripper_close_speed = speed
+        return tool_cmd
 
     # - Vacuum
     def pull_air_vacuum_pump(self):
@@ -1094,12 +1495,13 @@ class NiryoRosWrapper:
         return self.__deal_with_vacuum_pump("push_air_vacuum_pump")
 
     def __deal_with_vacuum_pump(self, command_str):
-        goal = RobotMoveGoal()
-        goal.cmd.cmd_type = RobotCommand.TOOL_ONLY
-        goal.cmd.tool_cmd.cmd_type = MoveCommandType.TOOL
-        goal.cmd.tool_cmd.tool_id = ToolID.VACUUM_PUMP_1
-        goal.cmd.tool_cmd.cmd_type = self.__tool_command_list[command_str]
-        return self.__execute_robot_move_action(goal)
+        return self.__execute_tool_cmd(self.__get_vacuum_pump_cmd(command_str))
+
+    def __get_vacuum_pump_cmd(self, command_str):
+        tool_cmd = ToolCommand()
+        tool_cmd.tool_id = ToolID.VACUUM_PUMP_1
+        tool_cmd.cmd_type = self.__tool_command_list[command_str]
+        return tool_cmd
 
     # - Electromagnet
     def setup_electromagnet(self, pin_id):
@@ -1142,13 +1544,14 @@ class NiryoRosWrapper:
         return self.__deal_with_electromagnet(pin_id, 'deactivate_digital_io')
 
     def __deal_with_electromagnet(self, pin, command_str):
-        goal = RobotMoveGoal()
-        goal.cmd.cmd_type = RobotCommand.TOOL_ONLY
-        goal.cmd.tool_cmd.cmd_type = MoveCommandType.TOOL
-        goal.cmd.tool_cmd.tool_id = ToolID.ELECTROMAGNET_1
-        goal.cmd.tool_cmd.cmd_type = self.__tool_command_list[command_str]
-        goal.cmd.tool_cmd.gpio = pin
-        return self.__execute_robot_move_action(goal)
+        return self.__execute_tool_cmd(self.__get_electromagnet_cmd(pin, command_str))
+
+    def __get_electromagnet_cmd(self, pin, command_str):
+        tool_cmd = ToolCommand()
+        tool_cmd.tool_id = ToolID.ELECTROMAGNET_1
+        tool_cmd.cmd_type = self.__tool_command_list[command_str]
+        tool_cmd.gpio = pin
+        return tool_cmd
 
     # - Hardware
 
@@ -1163,6 +1566,8 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        from niryo_robot_rpi.srv import SetDigitalIO
+
         result = self.__call_service('/niryo_robot_rpi/set_digital_io_mode',
                                      SetDigitalIO, pin_id, pin_mode)
         return self.__classic_return_w_check(result)
@@ -1178,6 +1583,8 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        from niryo_robot_rpi.srv import SetDigitalIO
+
         result = self.__call_service('/niryo_robot_rpi/set_digital_io_state',
                                      SetDigitalIO, pin_id, digital_state)
         return self.__classic_return_w_check(result)
@@ -1191,6 +1598,8 @@ class NiryoRosWrapper:
         :return: state
         :rtype: PinState
         """
+        from niryo_robot_rpi.srv import GetDigitalIO
+
         result = self.__call_service('/niryo_robot_rpi/get_digital_io',
                                      GetDigitalIO, pin_id)
         self.__check_result_status(result)
@@ -1207,13 +1616,7 @@ class NiryoRosWrapper:
         :return: Infos contains in a HardwareStatus object (see niryo_robot_msgs)
         :rtype: HardwareStatus
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__hw_status is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException(
-                    'Timeout: could not get hardware status (/niryo_robot_hardware_interface/hardware_status topic)')
-        return self.__hw_status
+        return self.__get_topic_value('/niryo_robot_hardware_interface/hardware_status')
 
     def get_digital_io_state(self):
         """
@@ -1222,13 +1625,7 @@ class NiryoRosWrapper:
         :return: Infos contains in a DigitalIOState object (see niryo_robot_msgs)
         :rtype: DigitalIOState
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__digital_io_state is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException(
-                    'Timeout: could not get digital io state (/niryo_robot_rpi/digital_io_state topic)')
-        return self.__digital_io_state
+        return self.__get_topic_value('/niryo_robot_rpi/digital_io_state')
 
     # - Conveyor
 
@@ -1240,6 +1637,8 @@ class NiryoRosWrapper:
         :return: ID
         :rtype: ConveyorID
         """
+        from conveyor_interface.srv import SetConveyor, SetConveyorRequest
+
         req = SetConveyorRequest()
         req.cmd = SetConveyorRequest.ADD
         result = self.__call_service('/niryo_robot/conveyor/ping_and_set_conveyor',
@@ -1262,6 +1661,8 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        from conveyor_interface.srv import SetConveyor, SetConveyorRequest
+
         req = SetConveyorRequest()
         req.cmd = SetConveyorRequest.REMOVE
         req.id = conveyor_id
@@ -1285,6 +1686,8 @@ class NiryoRosWrapper:
         :return: status, message
         :rtype: (int, str)
         """
+        from conveyor_interface.srv import ControlConveyor
+
         result = self.__call_service('/niryo_robot/conveyor/control_conveyor',
                                      ControlConveyor, conveyor_id, bool_control_on, speed, direction)
         return self.__classic_return_w_check(result)
@@ -1296,13 +1699,7 @@ class NiryoRosWrapper:
         :return: List[ID, connection_state, running, speed, direction]
         :rtype: List(int, bool, bool, int, int)
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__conveyors_feedback is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException(
-                    'Timeout: could not get conveyor 1 feedback (/niryo_robot/conveyor/feedback topic)')
-        fb = self.__conveyors_feedback
+        fb = self.__get_topic_value('/niryo_robot/conveyor/feedback')
         return fb.conveyors
 
     # - Vision
@@ -1314,13 +1711,8 @@ class NiryoRosWrapper:
         :return: string containing a JPEG compressed image
         :rtype: str
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__compressed_image_message is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException(
-                    'Timeout: could not video stream message (/niryo_robot_vision/compressed_video_stream topic)')
-        return self.__compressed_image_message.data
+        compressed_image_message = self.__get_topic_value('/niryo_robot_vision/compressed_video_stream')
+        return compressed_image_message.data
 
     def get_target_pose_from_rel(self, workspace_name, height_offset, x_rel, y_rel, yaw_rel):
         """
@@ -1375,17 +1767,17 @@ class NiryoRosWrapper:
 
     def vision_pick_w_obs_joints(self, workspace_name, height_offset, shape, color, observation_joints):
         """
-        Move Joints to observation_joints, then execute a vision pick
+        Move Joints to observation_joints, then execute a vision pick, in a single goal
         """
-        self.move_joints(*observation_joints)
-        return self.vision_pick(workspace_name, height_offset, shape, color)
+        return self.__execute_vision_pick([self.get_move_joints_command(*observation_joints),
+                                           self.get_vision_pick_command(workspace_name, height_offset, shape, color)])
 
     def vision_pick_w_obs_pose(self, workspace_name, height_offset, shape, color, observation_pose_list):
         """
-        Move Pose to observation_pose, then execute a vision pick
+        Move Pose to observation_pose, then execute a vision pick, in a single goal
         """
-        self.move_pose(*observation_pose_list)
-        return self.vision_pick(workspace_name, height_offset, shape, color)
+        return self.__execute_vision_pick([self.get_move_pose_command(*observation_pose_list),
+                                           self.get_vision_pick_command(workspace_name, height_offset, shape, color)])
 
     def vision_pick(self, workspace_name, height_offset, shape, color):
         """
@@ -1397,6 +1789,9 @@ class NiryoRosWrapper:
         5. actuate the current tool
         6. lift the object
 
+        The commander executes all the phases in a single goal : the tool is released during the approach,
+        and the approach and pick poses are computed in a single call
+
         :param workspace_name: name of the workspace
         :type workspace_name: str
         :param height_offset: offset between the workspace and the target height
@@ -1408,24 +1803,43 @@ class NiryoRosWrapper:
         :return: object_found, object_shape, object_color
         :rtype: (bool, ObjectShape, ObjectColor)
         """
-        object_found, rel_pose, obj_shape, obj_color = self.detect_object(workspace_name, shape, color)
-        if not object_found:
-            return False, "", ""
-
-        pick_pose = self.get_target_pose_from_rel(
-            workspace_name, height_offset, rel_pose.x, rel_pose.y, rel_pose.yaw)
-        approach_pose = self.get_target_pose_from_rel(
-            workspace_name, height_offset + 0.05, rel_pose.x, rel_pose.y, rel_pose.yaw)
-
-        self.release_with_tool()
+        return self.__execute_vision_pick([self.get_vision_pick_command(workspace_name, height_offset, shape, color)])
 
-        self.move_pose(*self.robot_state_msg_to_list(approach_pose))
-        self.move_pose(*self.robot_state_msg_to_list(pick_pose))
+    def get_vision_pick_command(self, workspace_name, height_offset, shape, color):
+        """
+        Vision pick command with the current tool, to execute with execute_commands (see vision_pick)
+        If no object is found, the next commands of the sequence are skipped
 
-        self.grasp_with_tool()
+        :rtype: RobotCommand
+        """
+        cmd = RobotCommand()
+        cmd.cmd_type = RobotCommand.VISION_PICK
+        vision_pick_cmd = cmd.vision_pick_cmd
+        vision_pick_cmd.workspace = workspace_name
+        vision_pick_cmd.height_offset = height_offset
+        vision_pick_cmd.approach_height = 0.05
+        vision_pick_cmd.shape = shape
+        vision_pick_cmd.color = color
+        vision_pick_cmd.tool_id = self.get_current_tool_id()
+        release_cmd = self.__get_release_tool_cmd()
+        if release_cmd is not None:
+            vision_pick_cmd.release_cmd = release_cmd
+        grasp_cmd = self.__get_grasp_tool_cmd()
+        if grasp_cmd is not None:
+            vision_pick_cmd.grasp_cmd = grasp_cmd
+        return cmd
 
-        self.move_pose(*self.robot_state_msg_to_list(approach_pose))
-        return True, obj_shape, obj_color
+    def __execute_vision_pick(self, commands):
+        """
+        :return: object_found, object_shape, object_color
+        :rtype: (bool, ObjectShape, ObjectColor)
+        """
+        goal = RobotMoveGoal()
+        goal.cmds = commands
+        future = self.__execute_robot_move_action_async(
+            goal, timeout=self.__action_execute_timeout * (len(commands) + 3),
+            get_result=lambda response: (response.obj_found, response.obj_shape, response.obj_color))
+        return future.result()
 
     def move_to_object(self, workspace, height_offset, shape, color):
         """
@@ -1481,13 +1895,8 @@ class NiryoRosWrapper:
         :return: raw camera intrinsics, distortions coefficients
         :rtype: (list, list)
         """
-        timeout = rospy.get_time() + 2.0
-        while self.__camera_intrinsics_message is None:
-            rospy.sleep(0.05)
-            if rospy.get_time() > timeout:
-                raise NiryoRosWrapperException(
-                    'Timeout: could not video stream message (/niryo_robot_vision/camera_intrinsics topic)')
-        return self.__camera_intrinsics_message.K, self.__camera_intrinsics_message.D
+        camera_intrinsics_message = self.__get_topic_value('/niryo_robot_vision/camera_intrinsics')
+        return camera_intrinsics_message.K, camera_intrinsics_message.D
 
     # - Workspace
     def save_workspace_from_poses(self, name, list_poses_raw):
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+import unittest
+import os
+import tempfile
+import threading
+import time
+
+from niryo_robot_python_ros_wrapper.call_log import CallRecorder, read_call_log, replay_calls, \
+    format_latency_report
+from niryo_robot_python_ros_wrapper.move_future import MoveFuture
+
+
+class Robot(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def move(self, value, speed=1.0):
+        self.calls.append(('move', value, speed))
+        time.sleep(0.01)
+        return 1, "moved"
+
+    def move_twice(self, value):
+        self.calls.append(('move_twice', value))
+        return self.move(value), self.move(value)
+
+    def move_async(self, value):
+        self.calls.append(('move_async', value))
+        future = MoveFuture()
+        threading.Timer(0.05, future.set_result, ((1, "moved"),)).start()
+        return future
+
+    def fail(self):
+        self.calls.append(('fail',))
+        raise ValueError("failed")
+
+    def get_lock(self):
+        self.calls.append(('get_lock',))
+        return threading.Lock()
+
+    def execute(self, commands, step_callback=None):
+        self.calls.append(('execute', commands))
+        for step in range(len(commands)):
+            step_callback(step)
+        return 1, "executed"
+
+
+class TestCallLog(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = os.path.join(tempfile.mkdtemp(), "calls.log")
+        self.robot = Robot()
+        recorder = CallRecorder(self.file_path)
+        for name in ('move', 'move_twice', 'move_async', 'fail', 'get_lock'):
+            setattr(self.robot, name, recorder.wrap(name, getattr(self.robot, name)))
+
+        self.robot.move(1, speed=0.5)
+        self.robot.move_twice(2)
+        self.assertRaises(ValueError, self.robot.fail)
+        self.robot.move_async(3).result()
+        self.robot.get_lock()
+        recorder.close()
+
+    def test_read(self):
+        calls = read_call_log(self.file_path)
+        self.assertEqual([call.name for call in calls], ['move', 'move_twice', 'fail', 'move_async', 'get_lock'])
+        self.assertEqual(calls[0].args, (1,))
+        self.assertEqual(calls[0].kwargs, {'speed': 0.5})
+        self.assertEqual(calls[1].result, ((1, "moved"), (1, "moved")))
+        self.assertIn("failed", calls[2].error)
+        self.assertEqual(calls[3].result, (1, "moved"))
+        self.assertGreaterEqual(calls[3].end - calls[3].start, 0.05)
+        self.assertIsInstance(calls[4].result, str)
+
+    def test_replay(self):
+        robot = Robot()
+        replayed = replay_calls(robot, read_call_log(self.file_path))
+        self.assertEqual(robot.calls, [('move', 1, 0.5), ('move_twice', 2), ('move', 2, 1.0), ('move', 2, 1.0),
+                                       ('fail',), ('move_async', 3), ('get_lock',)])
+        self.assertEqual([name for name, _, _, _ in replayed], ['move', 'move_twice', 'fail', 'move_async',
+                                                                'get_lock'])
+        self.assertIsNotNone(replayed[2][3])
+        self.assertGreaterEqual(replayed[3][2], 0.05)
+
+        report = format_latency_report(replayed)
+        self.assertIn("move_twice", report)
+
+    def test_unpicklable_arguments(self):
+        file_path = os.path.join(tempfile.mkdtemp(), "calls.log")
+        recorder = CallRecorder(file_path)
+        execute = recorder.wrap('execute', Robot().execute)
+        steps = []
+        self.assertEqual(execute([1, 2], step_callback=lambda step: steps.append(step)), (1, "executed"))
+        self.assertEqual(steps, [0, 1])
+        recorder.close()
+
+        calls = read_call_log(file_path)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].args, ([1, 2],))
+        self.assertIn("lambda", calls[0].kwargs['step_callback'])
+        self.assertEqual(calls[0].result, (1, "executed"))
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+import sys
+import unittest
+import threading
+
+from niryo_robot_python_ros_wrapper.move_future import MoveFuture, MoveFutureTimeout
+
+
+class TestMoveFuture(unittest.TestCase):
+
+    def setUp(self):
+        self.cancelled = []
+        self.future = MoveFuture(lambda: self.cancelled.append(True))
+
+    def test_result(self):
+        threading.Timer(0.05, self.future.set_result, ((1, "ok"),)).start()
+        self.assertFalse(self.future.done())
+        self.assertEqual(self.future.result(1.0), (1, "ok"))
+        self.assertTrue(self.future.done())
+        self.assertIsNone(self.future.exception())
+        self.assertFalse(self.future.set_result((-1, "late")))
+        self.assertEqual(self.future.result(), (1, "ok"))
+
+    def test_exception(self):
+        self.future.set_exception(ValueError("failed"))
+        self.assertRaises(ValueError, self.future.result)
+        self.assertIsInstance(self.future.exception(), ValueError)
+
+    def test_timeout(self):
+        self.assertRaises(MoveFutureTimeout, self.future.result, 0.05)
+        self.assertFalse(self.future.wait(0.0))
+
+    def test_callbacks(self):
+        results = []
+        self.future.add_done_callback(lambda future: results.append(future.result()))
+        self.future.set_result(1)
+        self.future.add_done_callback(lambda future: results.append(future.result() + 1))
+        self.assertEqual(results, [1, 2])
+
+    def test_cancel(self):
+        self.assertTrue(self.future.cancel())
+        self.assertEqual(self.cancelled, [True])
+        self.future.set_result(1)
+        self.assertFalse(self.future.cancel())
+        self.assertFalse(MoveFuture().cancel())
+
+    @unittest.skipIf(sys.version_info < (3, 5), "asyncio facade requires Python 3")
+    def test_await(self):
+        import asyncio
+
+        loop = asyncio.new_event_loop()
+        try:
+            threading.Timer(0.05, self.future.set_result, ((1, "ok"),)).start()
+            # The future is awaitable
+            self.assertEqual(loop.run_until_complete(self.future), (1, "ok"))
+
+            future = MoveFuture()
+            asyncio_future = future.to_asyncio(loop)
+            future.set_exception(ValueError("failed"))
+            self.assertRaises(ValueError, loop.run_until_complete, asyncio_future)
+        finally:
+            loop.close()
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
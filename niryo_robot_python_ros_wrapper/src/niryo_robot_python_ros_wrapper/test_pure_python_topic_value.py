@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+
+import unittest
+import threading
+import time
+
+from niryo_robot_python_ros_wrapper.topic_value import TopicValue
+
+
+class TestTopicValue(unittest.TestCase):
+
+    def setUp(self):
+        self.topic_value = TopicValue()
+
+    def set_later(self, delay, value):
+        timer = threading.Timer(delay, self.topic_value.set, (value,))
+        timer.start()
+        return timer
+
+    def test_no_value(self):
+        self.assertEqual(self.topic_value.get(0.05), (None, None))
+        self.assertIsNone(self.topic_value.get_age())
+
+    def test_last_value(self):
+        self.topic_value.set(1)
+        self.topic_value.set(2)
+        value, stamp = self.topic_value.get(0.0)
+        self.assertEqual(value, 2)
+        self.assertLessEqual(stamp, time.time())
+        self.assertGreaterEqual(self.topic_value.get_age(), 0.0)
+
+    def test_wait_first_value(self):
+        self.set_later(0.05, 1).join()
+        start = time.time()
+        self.set_later(0.05, 2)
+        self.assertEqual(self.topic_value.get(1.0, newer_than=start)[0], 2)
+
+    def test_next_value(self):
+        self.topic_value.set(1)
+        self.set_later(0.05, 2)
+        value, stamp = self.topic_value.get_next(1.0)
+        self.assertEqual(value, 2)
+        self.assertEqual(self.topic_value.get_next(0.05), (None, None))
+        self.assertEqual(self.topic_value.get(0.0, newer_than=stamp), (None, None))
+
+
+def process_py():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    process_py()
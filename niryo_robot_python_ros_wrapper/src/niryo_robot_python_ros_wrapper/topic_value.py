@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+import threading
+import time
+
+
+class TopicValue(object):
+    """
+    Latest value received on a topic
+    Readers waiting for a value are woken up as soon as it is received instead of polling it
+    """
+
+    def __init__(self, clock=time.time):
+        """
+        :param clock: function giving the current time in seconds, used to stamp the values
+        """
+        self.__clock = clock
+        self.__condition = threading.Condition()
+        self.__value = None
+        self.__stamp = None
+
+    def set(self, value):
+        with self.__condition:
+            self.__value = value
+            self.__stamp = self.__clock()
+            self.__condition.notify_all()
+
+    def get(self, timeout, newer_than=None):
+        """
+        Wait for a value received after newer_than
+
+        :param timeout: max time to wait for the value (s)
+        :type timeout: float
+        :param newer_than: time the value must have been received after. Any value is accepted if None
+        :type newer_than: float
+        :return: value and its reception time, (None, None) if no value was received before the timeout
+        :rtype: (object, float)
+        """
+        with self.__condition:
+            if self.__is_valid(newer_than):
+                return self.__value, self.__stamp
+            deadline = self.__clock() + timeout
+            while not self.__is_valid(newer_than):
+                remaining = deadline - self.__clock()
+                if remaining <= 0:
+                    return None, None
+                self.__condition.wait(remaining)
+            return self.__value, self.__stamp
+
+    def get_next(self, timeout):
+        """
+        Wait for the next value received
+
+        :param timeout: max time to wait for the value (s)
+        :type timeout: float
+        :return: value and its reception time, (None, None) if no value was received before the timeout
+        :rtype: (object, float)
+        """
+        return self.get(timeout, newer_than=self.__clock())
+
+    def __is_valid(self, newer_than):
+        if self.__stamp is None:
+            return False
+        return newer_than is None or self.__stamp > newer_than
+
+    def get_age(self):
+        """
+        :return: time since the last value was received (s), None if no value was received
+        :rtype: float
+        """
+        stamp = self.__stamp
+        if stamp is None:
+            return None
+        return self.__clock() - stamp
@@ -7,6 +7,7 @@ import re
 
 from niryo_robot_msgs.srv import SetBool, SetInt, Trigger
 from niryo_robot_msgs.msg import CommandStatus
+from niryo_robot_msgs.service_proxy_pool import call_service
 
 ENABLE_BUS_MOTORS_SUCCESS = 1
 ENABLE_BUS_MOTORS_READ_FAIL = -1
@@ -33,11 +34,9 @@ class LedState:
 def send_hotspot_command():
     rospy.loginfo("HOTSPOT")
     send_led_state(LedState.WAIT_HOTSPOT)
-    rospy.wait_for_service('/niryo_robot/wifi/set_hotspot', timeout=0.5)
     try:
-        set_hotspot = rospy.ServiceProxy('/niryo_robot/wifi/set_hotspot', SetInt)
-        set_hotspot()
-    except rospy.ServiceException:
+        call_service('/niryo_robot/wifi/set_hotspot', SetInt, timeout=0.5)
+    except (rospy.ServiceException, rospy.ROSException):
         rospy.logwarn("Could not call set_hotspot service")
 
 
@@ -45,9 +44,7 @@ def send_trigger_program_autorun():
     rospy.loginfo("Trigger program autorun from button")
     topic_name = "/niryo_robot_programs_manager/execute_program_autorun"
     try:
-        rospy.wait_for_service(topic_name, 0.1)
-        trigger = rospy.ServiceProxy(topic_name, Trigger)
-        resp = trigger()
+        resp = call_service(topic_name, Trigger, timeout=0.1)
         return resp.status, resp.message
     except (rospy.ServiceException, rospy.ROSException):
         return CommandStatus.FAILURE, "Send trigger autorun error"
@@ -56,13 +53,8 @@ def send_trigger_program_autorun():
 def send_reboot_motors_command():
     rospy.loginfo("Send reboot motor command")
     try:
-        rospy.wait_for_service('/niryo_robot/reboot_motors', timeout=0.5)
-    except rospy.ROSException:
-        pass
-    try:
-        reboot_motors = rospy.ServiceProxy('/niryo_robot/reboot_motors', Trigger)
-        reboot_motors()
-    except rospy.ServiceException:
+        call_service('/niryo_robot/reboot_motors', Trigger, timeout=0.5)
+    except (rospy.ServiceException, rospy.ROSException):
         pass
 
 
@@ -71,12 +63,8 @@ def send_shutdown_command():
     send_led_state(LedState.SHUTDOWN)
     rospy.loginfo("Activate learning mode")
     try:
-        rospy.wait_for_service('/niryo_robot/learning_mode/activate', timeout=1)
-    except rospy.ROSException:
-        pass
-    try:
-        rospy.ServiceProxy('/niryo_robot/learning_mode/activate', SetBool)(True)
-    except rospy.ServiceException:
+        call_service('/niryo_robot/learning_mode/activate', SetBool, True, timeout=1)
+    except (rospy.ServiceException, rospy.ROSException):
         pass
     send_reboot_motors_command()
     rospy.sleep(0.2)
@@ -93,12 +81,8 @@ def send_reboot_command():
     send_led_state(LedState.SHUTDOWN)
     rospy.loginfo("Activate learning mode")
     try:
-        rospy.wait_for_service('/niryo_robot/learning_mode/activate', timeout=0.5)
-    except rospy.ROSException:
-        pass
-    try:
-        rospy.ServiceProxy('/niryo_robot/learning_mode/activate', SetBool)(True)
-    except rospy.ServiceException:
+        call_service('/niryo_robot/learning_mode/activate', SetBool, True, timeout=0.5)
+    except (rospy.ServiceException, rospy.ROSException):
         pass
     send_reboot_motors_command()
     rospy.sleep(0.2)
@@ -111,18 +95,15 @@ def send_reboot_command():
 
 
 def send_led_state(state):
-    rospy.wait_for_service('/niryo_robot/rpi/set_led_state', timeout=0.5)
     try:
-        set_led = rospy.ServiceProxy('/niryo_robot/rpi/set_led_state', SetInt)
-        set_led(state)
-    except rospy.ServiceException:
+        call_service('/niryo_robot/rpi/set_led_state', SetInt, state, timeout=0.5)
+    except (rospy.ServiceException, rospy.ROSException):
         rospy.logwarn("Could not call set_led_state service")
 
 
 def activate_learning_mode(activate):
     try:
-        rospy.wait_for_service('/niryo_robot/learning_mode/activate', timeout=0.5)
-        rospy.ServiceProxy('/niryo_robot/learning_mode/activate', SetBool)(activate)
+        call_service('/niryo_robot/learning_mode/activate', SetBool, activate, timeout=0.5)
 
     except (rospy.ServiceException, rospy.ROSException) as e:
         return False
@@ -132,8 +113,6 @@ def activate_learning_mode(activate):
 def stop_robot_action():
     # Stop current move command
     try:
-        rospy.wait_for_service('/niryo_robot_commander/stop_command', timeout=0.5)
-        stop_cmd = rospy.ServiceProxy('/niryo_robot_commander/stop_command', Trigger)
-        stop_cmd()
+        call_service('/niryo_robot_commander/stop_command', Trigger, timeout=0.5)
     except (rospy.ServiceException, rospy.ROSException) as e:
         pass
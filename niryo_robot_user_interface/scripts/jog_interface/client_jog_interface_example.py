@@ -5,6 +5,7 @@ import rospy
 from niryo_robot_msgs.msg import CommandStatus
 from std_msgs.msg import Bool
 
+from niryo_robot_commander.msg import JogVelocity
 from niryo_robot_commander.srv import JogShift, JogShiftRequest
 from niryo_robot_msgs.srv import SetBool
 
@@ -17,6 +18,8 @@ class JogClient:
         self.__jog_enabled_subscriber = rospy.Subscriber('/niryo_robot/jog_interface/is_enabled',
                                                          Bool, self.__callback_subscriber_jog_enabled,
                                                          queue_size=1)
+        self.__jog_velocity_publisher = rospy.Publisher('/niryo_robot/jog_interface/jog_velocity',
+                                                        JogVelocity, queue_size=1)
 
     def __callback_subscriber_jog_enabled(self, ros_data):
         self.__jog_enabled = ros_data.data
@@ -50,6 +53,16 @@ class JogClient:
         rospy.sleep(0.15 - (rospy.get_time() - init_time))
         return response
 
+    def send_jog_velocity(self, cmd, velocities):
+        """
+        Stream a velocity to the jog controller. It has to be sent again at least every 0.2s,
+        otherwise the robot stops
+        """
+        msg = JogVelocity()
+        msg.cmd = cmd
+        msg.velocities = velocities
+        self.__jog_velocity_publisher.publish(msg)
+
 
 if __name__ == "__main__":
     # Creating Client Object
@@ -4,7 +4,7 @@ import rospy
 
 from client_jog_interface_example import JogClient
 
-from niryo_robot_commander.srv import JogShiftRequest
+from niryo_robot_commander.msg import JogVelocity
 
 from pynput.mouse import Button, Listener, Controller
 
@@ -86,17 +86,19 @@ if __name__ == "__main__":
 
     mouse_listener = MyMouseListener()
 
-    actualization_rate = rospy.Rate(10)
+    # Mouse moves are streamed as velocities, the jog controller smooths them
+    period = 0.04
+    actualization_rate = rospy.Rate(1.0 / period)
     while not mouse_listener.clicked:
         init = time.time()
         mouse_dx = mouse_listener.get_x_diff()
         mouse_dy = mouse_listener.get_y_diff()
         mouse_dz = mouse_listener.get_z_diff()
         mouse_listener.reset()
-        robot_dx = - float(mouse_dy) * 1e-4
-        robot_dy = - float(mouse_dx) * 1e-4
-        robot_dz = float(mouse_dz) * 5e-3
-        jc.ask_for_jog_shift(cmd=JogShiftRequest.POSE_SHIFT,
-                             shift_values=[robot_dx, robot_dy, robot_dz, 0.0, 0.0, 0.0])
+        robot_vx = - float(mouse_dy) * 1e-4 / period
+        robot_vy = - float(mouse_dx) * 1e-4 / period
+        robot_vz = float(mouse_dz) * 5e-3 / period
+        jc.send_jog_velocity(cmd=JogVelocity.POSE_VELOCITY,
+                             velocities=[robot_vx, robot_vy, robot_vz, 0.0, 0.0, 0.0])
 
         actualization_rate.sleep()